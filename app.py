@@ -1,9 +1,16 @@
-from flask import Flask, render_template, request, redirect, send_file
+from flask import Flask, render_template, request, redirect, send_file, jsonify, Response, stream_with_context
 from cmvrp_tabu_search import (
-    run_cmvrp, load_input_data, load_vehicle_count,
-    allocate_customers, tabu_search_vrp, fuel_price, fuel_consumption)
-import json, os
-import pandas as pd
+    solve_cmvrp, load_config, fuel_price, fuel_consumption, render_map_html)
+from problem_model import STOP_DEPOT, STOP_CUSTOMER, STOP_REST, STOP_NGINAP
+from solution_cache import clear_solution_cache
+from solve_jobs import submit_solve_job, submit_sweep_job, get_job, stop_job
+from fleet_sweep import parse_counts
+from location_store import (
+    add_location, delete_location, load_locations, iter_locations, locations_in_bbox, import_json, export_json)
+from bulk_io import (
+    detect_format, import_locations, export_lines, write_export, route_rows, location_fields, route_fields, formats)
+import io
+import json
 
 app = Flask(__name__)
 
@@ -15,11 +22,35 @@ def index():
 def set_kendaraan():
     vehicle_count = request.form.get('vehicle_count', type=int)
     if vehicle_count:
-        config = {"vehicle_count": vehicle_count}
+        config = load_config()
+        config["vehicle_count"] = vehicle_count
         with open("config.json", "w") as f:
             json.dump(config, f)
+        clear_solution_cache()
     return redirect('/')
 
+@app.route('/kendaraan/sweep', methods=['POST'])
+def sweep_kendaraan():
+    # Kurva profit/biaya untuk beberapa ukuran armada dalam satu job. Body JSON atau form:
+    # counts ("1-6", "2,4,6" atau list angka; default 1..2x vehicle_count) atau splits (list {depot: jumlah})
+    body = request.get_json(silent=True) or request.form
+    splits = body.get("splits")
+    counts = body.get("counts") or f"1-{2 * load_config().get('vehicle_count', 1)}"
+    try:
+        if isinstance(splits, str):
+            splits = json.loads(splits)
+        if isinstance(counts, str):
+            counts = parse_counts(counts)
+        counts = [int(count) for count in counts]
+    except (TypeError, ValueError):
+        return jsonify({"error": "counts harus berupa rentang/list angka dan splits list {depot: jumlah}"}), 400
+    if splits is None and (not counts or min(counts) < 1):
+        return jsonify({"error": "jumlah kendaraan harus >= 1"}), 400
+    if splits is not None and not (isinstance(splits, list) and all(isinstance(split, dict) for split in splits)):
+        return jsonify({"error": "splits harus berupa list {depot: jumlah}"}), 400
+    job_id = submit_sweep_job(counts, splits)
+    return jsonify({"job_id": job_id, "status_url": f"/jobs/{job_id}"}), 202
+
 @app.route('/submit', methods=['POST'])
 def submit():
     name = request.form['name']
@@ -41,60 +72,189 @@ def submit():
 
     if tipe == "depot":
         data["supply"] = supply
-    
-    if not os.path.exists("data_lokasi.json"):
-        with open("data_lokasi.json", "w") as f:
-            json.dump([], f)
 
-    with open("data_lokasi.json", "r+") as f:
-        lokasi = json.load(f)
-        lokasi.append(data)
-        f.seek(0)
-        json.dump(lokasi, f, indent=4)
+    add_location(data)
+    clear_solution_cache(keep_latest=True)
 
     return redirect('/lokasi')
 
 @app.route('/hapus/<int:index>', methods=['POST'])
 def hapus(index):
-    if os.path.exists("data_lokasi.json"):
-        with open("data_lokasi.json", "r+") as f:
-            data = json.load(f)
-            if 0 <= index < len(data):
-                data.pop(index)
-                f.seek(0)
-                f.truncate()
-                json.dump(data, f, indent=4)
+    if delete_location(index):
+        clear_solution_cache(keep_latest=True)
     return redirect('/lokasi')
 
 @app.route('/lokasi')
 def lokasi():
-    if os.path.exists("data_lokasi.json"):
-        with open("data_lokasi.json", "r") as f:
-            data = json.load(f)
+    return render_template('lokasi.html', data=load_locations())
+
+@app.route('/lokasi/bbox')
+def lokasi_bbox():
+    # Lokasi dalam kotak min_lat..max_lat, min_lon..max_lon; ?type=customer,depot untuk menyaring jenis
+    try:
+        bounds = [float(request.args[key]) for key in ("min_lat", "min_lon", "max_lat", "max_lon")]
+    except (KeyError, ValueError):
+        return jsonify({"error": "min_lat, min_lon, max_lat, max_lon wajib diisi angka"}), 400
+    types = request.args.get("type")
+    return jsonify(locations_in_bbox(*bounds, types=types.split(",") if types else None))
+
+@app.route('/lokasi/export')
+def lokasi_export():
+    return jsonify(export_json())
+
+@app.route('/lokasi/import', methods=['POST'])
+def lokasi_import():
+    # Body JSON (list item seperti data_lokasi.json) atau file upload 'file'; ?mode=replace untuk mengganti semua
+    if 'file' in request.files:
+        items = json.load(request.files['file'])
     else:
-        data = []
-    return render_template('lokasi.html', data=data)
+        items = request.get_json(silent=True)
+    if not isinstance(items, list):
+        return jsonify({"error": "data harus berupa list lokasi"}), 400
+    replace = request.args.get("mode") == "replace"
+    try:
+        count = import_json(items, replace=replace)
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({"error": f"item lokasi tidak valid: {e}"}), 400
+    # Solusi terakhir tetap jadi basis re-optimasi inkremental selama depot tidak berubah
+    depot_changed = replace or any(item.get("type") == "depot" for item in items)
+    clear_solution_cache(keep_latest=not depot_changed)
+    return jsonify({"imported": count})
 
 @app.route('/visualisasi')
 def visualisasi():
-    file_path = run_cmvrp()
-    return send_file(file_path)
-
-from cmvrp_tabu_search import run_cmvrp, load_input_data
+    # Halaman ringan tanpa solve di request: browser mengirim job ke /jobs, menunggu statusnya, lalu mengambil
+    # GeoJSON hasilnya (query string ikut diteruskan, mis. ?stops=0; ?cluster=1 dibaca di halaman)
+    return render_map_html(job_url='/jobs')
+
+@app.route('/jobs', methods=['POST'])
+def buat_job():
+    job_id = submit_solve_job()
+    return jsonify({"job_id": job_id, "status_url": f"/jobs/{job_id}"}), 202
+
+@app.route('/jobs/<job_id>')
+def status_job(job_id):
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({"error": "job tidak ditemukan"}), 404
+    job.pop("html_path")
+    job.pop("geojson_path")
+    if job["status"] == "selesai":
+        job["result_url"] = f"/jobs/{job_id}/hasil"
+        if job["kind"] == "solve":
+            job["geojson_url"] = f"/jobs/{job_id}/geojson"
+    return jsonify(job)
+
+@app.route('/jobs/<job_id>/stop', methods=['POST'])
+def hentikan_job(job_id):
+    if get_job(job_id) is None:
+        return jsonify({"error": "job tidak ditemukan"}), 404
+    if not stop_job(job_id):
+        return jsonify({"error": "job sudah selesai"}), 409
+    return jsonify({"job_id": job_id, "status_url": f"/jobs/{job_id}"}), 202
+
+@app.route('/jobs/<job_id>/hasil')
+def hasil_job(job_id):
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({"error": "job tidak ditemukan"}), 404
+    if job["status"] != "selesai":
+        return jsonify({"status": job["status"], "error": job["error"]}), 409
+    if job["kind"] == "sweep":
+        return jsonify({"curve": job["curve"], "best": job["best"]})
+    return send_file(job["html_path"])
+
+@app.route('/jobs/<job_id>/geojson')
+def geojson_job(job_id):
+    # ?stops=0 hanya mengirim garis rute tanpa titik singgahan
+    job = get_job(job_id)
+    if job is None or job["kind"] != "solve":
+        return jsonify({"error": "job tidak ditemukan"}), 404
+    if job["status"] != "selesai":
+        return jsonify({"status": job["status"], "error": job["error"]}), 409
+    with open(job["geojson_path"]) as f:
+        geojson = json.load(f)
+    if request.args.get("stops", "1") == "0":
+        geojson["features"] = [f for f in geojson["features"] if f["geometry"]["type"] != "Point"]
+    return jsonify(geojson)
+
+@app.route('/statistik')
+def statistik_solver():
+    # Counter, timer, dan jejak konvergensi solve terakhir; ?trace=0 untuk tanpa jejak per iterasi
+    result = solve_cmvrp(collect_stats=True)
+    stats = dict(result["stats"])
+    if request.args.get("trace", "1") == "0":
+        stats.pop("trace")
+    stats["total_cost"] = round(sum(route[5] for route in result["routes"]), 2)
+    return jsonify(stats)
+
+def _bulk_response(rows, fields, fmt, filename):
+    # CSV / JSON Lines di-stream per baris; Parquet dibuat utuh di memori
+    if fmt == "parquet":
+        buffer = io.BytesIO()
+        write_export(rows, fields, fmt, buffer)
+        buffer.seek(0)
+        return send_file(buffer, mimetype="application/octet-stream", as_attachment=True, download_name=f"{filename}.parquet")
+    mimetype = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    return Response(stream_with_context(export_lines(rows, fields, fmt)), mimetype=mimetype,
+                    headers={"Content-Disposition": f"attachment; filename={filename}.{fmt}"})
+
+@app.route('/lokasi/bulk', methods=['POST'])
+def lokasi_bulk_import():
+    # Upload 'file' (CSV / JSON Lines / Parquet); ?format= jika ekstensi tidak jelas, ?mode=replace untuk mengganti semua
+    upload = request.files.get('file')
+    if upload is None:
+        return jsonify({"error": "file wajib diunggah"}), 400
+    fmt = detect_format(upload.filename, request.args.get("format"))
+    if fmt not in formats:
+        return jsonify({"error": f"format harus salah satu dari {', '.join(formats)}"}), 400
+    try:
+        summary = import_locations(upload.stream, fmt, replace=request.args.get("mode") == "replace")
+    except ImportError as e:
+        return jsonify({"error": f"format {fmt} tidak didukung di server ini: {e}"}), 400
+    except (ValueError, UnicodeDecodeError) as e:
+        return jsonify({"error": f"file tidak bisa dibaca: {e}"}), 400
+    if not summary["imported"] and summary["error_count"]:
+        # Tidak ada baris valid: data lokasi tidak diubah sama sekali
+        return jsonify(dict(summary, error="tidak ada baris valid, data lokasi tidak diubah")), 400
+    if summary["imported"]:
+        clear_solution_cache(keep_latest=request.args.get("mode") != "replace")
+    return jsonify(summary)
+
+@app.route('/lokasi/bulk')
+def lokasi_bulk_export():
+    fmt = request.args.get("format", "csv")
+    if fmt not in formats:
+        return jsonify({"error": f"format harus salah satu dari {', '.join(formats)}"}), 400
+    try:
+        return _bulk_response(iter_locations(), location_fields, fmt, "lokasi")
+    except ImportError as e:
+        return jsonify({"error": f"format {fmt} tidak didukung di server ini: {e}"}), 400
+
+@app.route('/rute/export')
+def rute_export():
+    fmt = request.args.get("format", "csv")
+    if fmt not in formats:
+        return jsonify({"error": f"format harus salah satu dari {', '.join(formats)}"}), 400
+    try:
+        return _bulk_response(route_rows(solve_cmvrp()), route_fields, fmt, "rute")
+    except ImportError as e:
+        return jsonify({"error": f"format {fmt} tidak didukung di server ini: {e}"}), 400
+
+laporan_fields = ("Kendaraan", "Jarak Tempuh (km)", "Overnight (x)", "Waktu Pelayanan (jam)", "Waktu Istirahat (jam)",
+                  "Waktu Menginap (jam)", "Waktu Perjalanan (jam)", "Total Waktu (jam)", "Biaya", "Revenue", "Profit")
 
 @app.route('/laporan')
 def tampilkan_laporan():
-    depots, customers, rest_areas, menginap_locs = load_input_data()
-    vehicle_count = load_vehicle_count()
-    assignments = allocate_customers(customers, depots, vehicle_count)
+    result = solve_cmvrp()
+    assignments, all_routes = result["assignments"], result["routes"]
 
     total_fuel = total_operasional = total_revenue = 0
     kendaraan_data = []
     laporan_csv = []
 
-    for i, vehicle in enumerate(assignments, start=1):
+    for i, (vehicle, route_result) in enumerate(zip(assignments, all_routes), start=1):
         customers_list = vehicle.get("customers", [])
-        depot_info = vehicle.get("depot", ("Unknown", [0.0, 0.0]))
 
         if not customers_list:
             row = {
@@ -121,12 +281,6 @@ def tampilkan_laporan():
             })
             continue
 
-        depot_coord = depot_info[1]
-        route_result = tabu_search_vrp(
-            depot_coord, customers_list, customers,
-            rest_areas=rest_areas, menginap_locs=menginap_locs
-        )
-
         _, _, overnight, dist, revenue, cost, profit, service_time, rest_time, nginap_time, total_time, travel_time, work_time = route_result
 
         fuel_cost = (dist / fuel_consumption) * fuel_price
@@ -161,9 +315,8 @@ def tampilkan_laporan():
     total_biaya = total_fuel + total_operasional
     profit_total = total_revenue - total_biaya
 
-    # Simpan ke CSV
-    df = pd.DataFrame(laporan_csv)
-    df.to_csv("laporan_cmvrp.csv", index=False)
+    # Simpan ke CSV (modul csv bawaan; pandas tidak perlu dimuat saat worker start)
+    write_export(laporan_csv, laporan_fields, "csv", "laporan_cmvrp.csv")
 
     return render_template("laporan.html",
                            kendaraan_data=kendaraan_data,
@@ -175,16 +328,15 @@ def tampilkan_laporan():
 
 @app.route('/laporan_rute')
 def laporan_rute():
-    depots, customers, rest_areas, menginap_locs = load_input_data()
-    vehicle_count = load_vehicle_count()
-    assignments = allocate_customers(customers, depots, vehicle_count)
+    result = solve_cmvrp()
+    rest_areas, menginap_locs = result["rest_areas"], result["menginap_locs"]
+    assignments, all_routes = result["assignments"], result["routes"]
 
     rute_kendaraan = []
 
-    for i, vehicle in enumerate(assignments, start=1):
+    for i, (vehicle, route_result) in enumerate(zip(assignments, all_routes), start=1):
         customers_list = vehicle.get("customers", [])
-        depot_nama, depot_data = vehicle.get("depot", ("Unknown", [0.0, 0.0]))
-        depot_koordinat = depot_data
+        depot_nama = vehicle.get("depot", ("Unknown", [0.0, 0.0]))[0]
 
         if not customers_list:
             rute_kendaraan.append({
@@ -194,39 +346,30 @@ def laporan_rute():
             })
             continue
 
-        route_coords, assigned_customers, overnight_stays, total_distance, total_revenue, total_cost, profit, total_service_time, total_rest_time, total_nginap_time, total_time, total_travel_time, total_work_time = tabu_search_vrp(
-            depot_koordinat, customers_list, customers,
-            rest_areas=rest_areas, menginap_locs=menginap_locs
-        )
+        route_coords, assigned_customers, overnight_stays, total_distance, total_revenue, total_cost, profit, total_service_time, total_rest_time, total_nginap_time, total_time, total_travel_time, total_work_time = route_result
 
-        assigned_dict = {tuple(coord): (name, round(serv_time, 2))
-                         for coord, name, serv_time in assigned_customers}
+        assigned_iter = iter(assigned_customers)
 
         rute = []
-        for pt in route_coords:
+        for event, node, coord in route_coords:
             row = {"lokasi": "", "aktivitas": "", "waktu_servis": ""}
 
-            if isinstance(pt, tuple) and isinstance(pt[0], str):
-                label, coord = pt
-                coord = tuple(coord)
-                if label == "rest":
-                    nama = next((k for k, v in rest_areas.items() if tuple(v) == coord), "Virtual Rest Area")
-                    row["lokasi"] = nama
-                    row["aktivitas"] = "Istirahat"
-                elif label == "nginap":
-                    nama = next((k for k, v in menginap_locs.items() if tuple(v) == coord), "Virtual Menginap")
-                    row["lokasi"] = nama
-                    row["aktivitas"] = "Menginap"
-            elif isinstance(pt, (tuple, list)) and len(pt) == 2:
-                coord = tuple(pt)
-                if coord in assigned_dict:
-                    nama, service_time = assigned_dict[coord]
-                    row["lokasi"] = nama
-                    row["aktivitas"] = "Pelanggan"
-                    row["waktu_servis"] = f"{service_time:.2f} jam"
-                elif coord == tuple(depot_data[:2]):
-                    row["lokasi"] = depot_nama
-                    row["aktivitas"] = "Depot"
+            if event == STOP_REST:
+                nama = next((k for k, v in rest_areas.items() if tuple(v) == coord), None) if node >= 0 else None
+                row["lokasi"] = nama or "Virtual Rest Area"
+                row["aktivitas"] = "Istirahat"
+            elif event == STOP_NGINAP:
+                nama = next((k for k, v in menginap_locs.items() if tuple(v) == coord), None) if node >= 0 else None
+                row["lokasi"] = nama or "Virtual Menginap"
+                row["aktivitas"] = "Menginap"
+            elif event == STOP_CUSTOMER:
+                _, nama, service_time = next(assigned_iter)
+                row["lokasi"] = nama
+                row["aktivitas"] = "Pelanggan"
+                row["waktu_servis"] = f"{service_time:.2f} jam"
+            elif event == STOP_DEPOT:
+                row["lokasi"] = depot_nama
+                row["aktivitas"] = "Depot"
 
             if row["lokasi"]:
                 rute.append(row)
@@ -265,15 +408,8 @@ def submit_rest_area():
     elif tipe == "depot":
         data["supply"] = request.form.get('supply', type=int)
 
-    if not os.path.exists("data_lokasi.json"):
-        with open("data_lokasi.json", "w") as f:
-            json.dump([], f)
-
-    with open("data_lokasi.json", "r+") as f:
-        lokasi = json.load(f)
-        lokasi.append(data)
-        f.seek(0)
-        json.dump(lokasi, f, indent=4)
+    add_location(data)
+    clear_solution_cache(keep_latest=tipe != "depot")
 
     return redirect('/lokasi')
 
@@ -0,0 +1,234 @@
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+
+import cmvrp_tabu_search as cmvrp
+from bulk_io import detect_format, export_lines, read_rows, route_rows, validate_location
+from location_store import db_path, load_locations
+from matrix_store import resolve_storage
+from road_network import road_network_from_config
+from solver_stats import SolverStats
+
+# Solve banyak skenario tanpa Flask dan tanpa HTML: tiap file instance x tiap titik grid parameter dijalankan paralel,
+# hasil (rute, biaya, waktu) ditulis per skenario begitu selesai ke JSON Lines atau CSV.
+# Parameter biaya/waktu di bawah di-override pada modul cmvrp_tabu_search selama skenario berjalan; kunci grid
+# lain diteruskan sebagai config solve (vehicle_count, tabu_iterations, construction, islands, time_limit, ...).
+cost_parameters = ("speed", "fuel_price", "fuel_consumption", "cost_per_km", "overnight_stay_cost", "rest_cost",
+                   "max_daily_hours", "max_work_hours", "rest_time", "nginap_time", "service_time_per_demand",
+                   "diversification_weight")
+# vehicle_capacity dan tabu_tenure terikat sebagai nilai default argumen fungsi solver, jadi tidak bisa di-override
+fixed_parameters = ("vehicle_capacity", "tabu_tenure")
+summary_fields = ("scenario", "instance", "status", "error", "vehicles", "customers", "served", "distance", "revenue",
+                  "cost", "profit", "overnight_stays", "prepare_s", "solve_s", "elapsed_s")
+
+# Cache per proses: instance dan matriks jarak dipakai ulang oleh skenario berikutnya di worker yang sama
+_instances = {}
+_matrices = {}
+
+def load_instance(path):
+    # data_lokasi.json (list item), database SQLite location_store (.db), atau CSV/JSONL/Parquet seperti bulk_io
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".json":
+        with open(path, "r") as f:
+            items = json.load(f)
+    elif ext in (".db", ".sqlite"):
+        items = load_locations(path=path)
+    else:
+        items = [validate_location(row) for row in read_rows(path, detect_format(path))]
+    return cmvrp.parse_locations(items)
+
+def scenario_grid(grid):
+    # dict {param: [nilai, ...]} -> hasil kali kartesius; list dict -> skenario eksplisit apa adanya
+    if grid is None:
+        return [{}]
+    if isinstance(grid, list):
+        scenarios = [dict(scenario) for scenario in grid]
+    else:
+        values = [value if isinstance(value, list) else [value] for value in grid.values()]
+        scenarios = [dict(zip(grid, combo)) for combo in itertools.product(*values)]
+    for scenario in scenarios:
+        fixed = [name for name in scenario if name in fixed_parameters]
+        if fixed:
+            raise ValueError(f"Parameter tidak bisa diubah per skenario: {', '.join(fixed)}")
+    return scenarios
+
+@contextmanager
+def cost_overrides(values):
+    saved = {name: getattr(cmvrp, name) for name in values}
+    for name, value in values.items():
+        setattr(cmvrp, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(cmvrp, name, value)
+
+def _instance(path):
+    if path not in _instances:
+        _instances[path] = load_instance(path)
+    return _instances[path]
+
+def _matrix(path, config):
+    # Kunci = instance + semua yang memengaruhi matriks (kecepatan untuk matriks waktu, penyedia jarak, storage)
+    key = (path, cmvrp.speed, config.get("distance_provider"), config.get("osm_file"), config.get("matrix_storage"))
+    if key not in _matrices:
+        depots, customers, rest_areas, menginap_locs = _instance(path)
+        _matrices[key] = cmvrp.build_distance_matrix(depots, customers, rest_areas, menginap_locs,
+                                                     road_network_from_config(config), config.get("matrix_storage"))
+    return _matrices[key]
+
+def _split(params, base_config):
+    overrides = {name: value for name, value in params.items() if name in cost_parameters}
+    # Paralelisme ada di tingkat skenario; solver di dalamnya serial kecuali skenario meminta workers sendiri
+    config = dict(base_config, workers=1)
+    config.update((name, value) for name, value in params.items() if name not in cost_parameters)
+    return overrides, config
+
+def run_scenario(task):
+    # Satu skenario -> dict hasil; error dicatat di hasil (status "gagal") agar batch tetap lanjut
+    index, path, params, base_config, include_stops, collect_stats = task
+    started = time.perf_counter()
+    record = {"scenario": index, "instance": path, "parameters": params, "status": "selesai", "error": None}
+    try:
+        overrides, config = _split(params, base_config)
+        depots, customers, rest_areas, menginap_locs = _instance(path)
+        stats = SolverStats() if collect_stats else None
+        with cost_overrides(overrides):
+            matrix = _matrix(path, config)
+            record["prepare_s"] = round(time.perf_counter() - started, 4)
+            solve_started = time.perf_counter()
+            assignments, routes = cmvrp.solve_instance(depots, customers, rest_areas, menginap_locs,
+                                                       config.get("vehicle_count", 1), config, matrix=matrix, stats=stats)
+            record["solve_s"] = round(time.perf_counter() - solve_started, 4)
+        record.update(
+            vehicles=len(routes), customers=len(customers), served=sum(len(route[1]) for route in routes),
+            distance=round(sum(route[3] for route in routes), 2), revenue=round(sum(route[4] for route in routes), 2),
+            cost=round(sum(route[5] for route in routes), 2), profit=round(sum(route[6] for route in routes), 2),
+            overnight_stays=sum(route[2] for route in routes),
+        )
+        record["routes"] = [{
+            "depot": vehicle["depot"][0], "customers": [name for _, name, _ in route[1]], "distance": route[3],
+            "revenue": route[4], "cost": route[5], "profit": route[6], "overnight_stays": route[2], "total_time": route[10],
+        } for vehicle, route in zip(assignments, routes)]
+        if include_stops:
+            result = {"assignments": assignments, "routes": routes, "rest_areas": rest_areas, "menginap_locs": menginap_locs}
+            record["stops"] = list(route_rows(result))
+        if stats is not None:
+            record["timers"] = {name: entry["total_s"] for name, entry in stats.to_dict()["timers"].items()}
+    except Exception as e:
+        record.update(status="gagal", error=f"{type(e).__name__}: {e}")
+    record["elapsed_s"] = round(time.perf_counter() - started, 4)
+    return record
+
+def _warm_matrices(tasks):
+    # Matriks yang disimpan di disk (OSM, memmap, knn) dihitung sekali di proses utama sebelum pool dimulai;
+    # worker lalu membuka file yang sama lewat memory-map alih-alih menghitung ulang masing-masing
+    # (instance yang gagal dibaca dilewati; errornya dilaporkan oleh skenario itu sendiri)
+    for _, path, params, base_config, _, _ in tasks:
+        overrides, config = _split(params, base_config)
+        try:
+            depots, customers, rest_areas, menginap_locs = _instance(path)
+            n = len(depots) + len(customers) + len(rest_areas) + len(menginap_locs)
+            if road_network_from_config(config) is not None or resolve_storage(n, config.get("matrix_storage")) != "memory":
+                with cost_overrides(overrides):
+                    _matrix(path, config)
+        except Exception:
+            continue
+
+def run_batch(instances, grid=None, config=None, workers=None, include_stops=False, collect_stats=False):
+    # Generator hasil per skenario dalam urutan selesai (lihat field "scenario"); config = config dasar
+    # (default config.json), workers = jumlah proses (default semua CPU)
+    if config is None:
+        config = cmvrp.load_config()
+    tasks = [(index, path, params, config, include_stops, collect_stats)
+             for index, (path, params) in enumerate(itertools.product(instances, scenario_grid(grid)), start=1)]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers > 1 and len(tasks) > 1:
+        _warm_matrices(tasks)
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            futures = [pool.submit(run_scenario, task) for task in tasks]
+            for future in as_completed(futures):
+                yield future.result()
+    else:
+        for task in tasks:
+            yield run_scenario(task)
+
+def write_results(results, target="-", fmt="jsonl", parameter_names=()):
+    # Ditulis dan di-flush per skenario agar batch yang berjalan lama bisa dipantau; target "-" = stdout.
+    # CSV berisi ringkasan satu baris per skenario (kolom parameter grid ikut); rute lengkap hanya di JSON Lines.
+    out = sys.stdout if target == "-" else open(target, "w", newline="")
+    try:
+        if fmt == "csv":
+            fields = summary_fields + tuple(name for name in parameter_names if name not in summary_fields)
+            chunks = export_lines(({**record["parameters"], **record} for record in results), fields, "csv")
+        else:
+            chunks = (json.dumps(record) + "\n" for record in results)
+        for chunk in chunks:
+            out.write(chunk)
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+def _parse_value(text):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve banyak skenario CMVRP tanpa Flask/HTML, hasil ke JSON Lines/CSV")
+    parser.add_argument("instances", nargs="*", help=f"file lokasi: .json, .db, .csv, .jsonl, .parquet (default: {db_path})")
+    parser.add_argument("--grid", help="file JSON: {parameter: [nilai, ...]} (kombinasi semua) atau list skenario")
+    parser.add_argument("--set", action="append", default=[], metavar="NAMA=NILAI[,NILAI...]",
+                        help="tambah dimensi grid, mis. --set vehicle_count=2,3,4 --set fuel_price=10000,12000")
+    parser.add_argument("--config", default="config.json", help="config dasar semua skenario")
+    parser.add_argument("--workers", type=int, help="jumlah proses paralel (default: semua CPU)")
+    parser.add_argument("--output", default="-", help="file hasil (default: stdout)")
+    parser.add_argument("--format", choices=("jsonl", "csv"), help="default: dari ekstensi file output")
+    parser.add_argument("--stops", action="store_true", help="sertakan semua singgahan tiap rute (JSON Lines)")
+    parser.add_argument("--stats", action="store_true", help="sertakan timer solver per skenario (JSON Lines)")
+    args = parser.parse_args(argv)
+
+    grid = None
+    if args.grid:
+        with open(args.grid, "r") as f:
+            grid = json.load(f)
+    if args.set:
+        if isinstance(grid, list):
+            parser.error("--set tidak bisa digabung dengan grid berupa list skenario")
+        grid = dict(grid or {})
+        for item in args.set:
+            name, _, values = item.partition("=")
+            grid[name.strip()] = [_parse_value(value) for value in values.split(",")]
+    config = {}
+    if os.path.exists(args.config):
+        with open(args.config, "r") as f:
+            config = json.load(f)
+    fmt = args.format or ("csv" if args.output.lower().endswith(".csv") else "jsonl")
+    instances = args.instances or [db_path]
+    try:
+        scenarios = scenario_grid(grid)
+    except ValueError as e:
+        parser.error(str(e))
+    parameter_names = list(dict.fromkeys(name for scenario in scenarios for name in scenario))
+    total = len(instances) * len(scenarios)
+
+    def progress(results):
+        for done, record in enumerate(results, start=1):
+            summary = f"profit {record['profit']}" if record["status"] == "selesai" else record["error"]
+            print(f"[{done}/{total}] skenario {record['scenario']} ({record['instance']}): {record['status']}, "
+                  f"{summary}, {record['elapsed_s']} s", file=sys.stderr)
+            yield record
+
+    results = run_batch(instances, grid, config, args.workers, include_stops=args.stops, collect_stats=args.stats)
+    write_results(progress(results), args.output, fmt, parameter_names)
+
+if __name__ == "__main__":
+    main()
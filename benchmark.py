@@ -0,0 +1,196 @@
+import argparse
+import json
+import math
+import random
+import time
+import tracemalloc
+
+import cmvrp_tabu_search as cmvrp
+
+# Kota-kota acuan bergaya Kalimantan Barat: (nama, lat, lon, bobot sebaran pelanggan)
+towns = [
+    ("Pontianak", -0.03, 109.33, 5),
+    ("Mempawah", 0.36, 108.96, 2),
+    ("Singkawang", 0.91, 108.98, 3),
+    ("Sambas", 1.36, 109.30, 2),
+    ("Bengkayang", 0.82, 109.48, 1),
+    ("Ngabang", 0.38, 109.95, 1),
+    ("Sanggau", 0.12, 110.59, 2),
+    ("Sekadau", 0.03, 110.95, 1),
+    ("Sintang", 0.07, 111.50, 2),
+    ("Nanga Pinoh", -0.33, 111.74, 1),
+    ("Putussibau", 0.84, 112.93, 1),
+    ("Ketapang", -1.85, 109.97, 2),
+]
+default_sizes = (20, 50, 100, 300)
+
+def generate_instance(n_customers, seed=0, n_depots=2, spread=0.08):
+    # Instance sintetis dengan skema yang sama seperti data_lokasi.json
+    rnd = random.Random(seed)
+    lokasi = []
+    total_demand = 0
+    customers = []
+    weights = [t[3] for t in towns]
+    for i in range(n_customers):
+        town = rnd.choices(towns, weights=weights)[0]
+        demand = rnd.randint(1, 5)
+        total_demand += demand
+        customers.append({
+            "name": f"{town[0]} {i + 1}",
+            "type": "customer",
+            "lat": town[1] + rnd.gauss(0, spread),
+            "lon": town[2] + rnd.gauss(0, spread),
+            "demand": demand,
+            "fee": rnd.randrange(15000, 40001, 5000),
+        })
+
+    # Depot: dua di sekitar Pontianak seperti data asli, sisanya di kota lain
+    supply = math.ceil(total_demand * 1.2 / max(n_depots, 1))
+    for d in range(n_depots):
+        town = towns[0] if d < 2 else towns[1 + (d - 2) % (len(towns) - 1)]
+        lokasi.append({
+            "name": f"Depot {d + 1}",
+            "type": "depot",
+            "lat": town[1] + rnd.uniform(-0.05, 0.05),
+            "lon": town[2] + rnd.uniform(-0.05, 0.05),
+            "demand": None,
+            "fee": None,
+            "supply": supply,
+        })
+    lokasi.extend(customers)
+
+    # Rest area di sepanjang garis Pontianak -> kota tujuan, menginap di tiap kota
+    n_rest = max(2, n_customers // 50)
+    for i in range(n_rest):
+        town = towns[1 + i % (len(towns) - 1)]
+        t = rnd.uniform(0.2, 0.8)
+        lokasi.append({
+            "name": f"Rest Area {i + 1}",
+            "type": "rest_area",
+            "lat": towns[0][1] + (town[1] - towns[0][1]) * t,
+            "lon": towns[0][2] + (town[2] - towns[0][2]) * t,
+        })
+    for town in towns[1:]:
+        lokasi.append({
+            "name": f"Penginapan {town[0]}",
+            "type": "menginap",
+            "lat": town[1] + rnd.uniform(-0.02, 0.02),
+            "lon": town[2] + rnd.uniform(-0.02, 0.02),
+        })
+    return lokasi
+
+def fleet_size(customers):
+    total_demand = sum(data[2] for data in customers.values())
+    return max(1, math.ceil(total_demand * 1.1 / cmvrp.vehicle_capacity))
+
+class _EvaluationCounter:
+    # Bungkus evaluate_route_from dan evaluator batch untuk menghitung jumlah evaluasi tetangga
+    def __init__(self):
+        self.count = 0
+        self.original = cmvrp.evaluate_route_from
+        self.original_batch = cmvrp._simulate_batch
+
+    def __call__(self, *args, **kwargs):
+        self.count += 1
+        return self.original(*args, **kwargs)
+
+    def _batch(self, nodes, *args, **kwargs):
+        self.count += len(nodes)
+        return self.original_batch(nodes, *args, **kwargs)
+
+    def __enter__(self):
+        cmvrp.evaluate_route_from = self
+        cmvrp._simulate_batch = self._batch
+        return self
+
+    def __exit__(self, *exc):
+        cmvrp.evaluate_route_from = self.original
+        cmvrp._simulate_batch = self.original_batch
+
+def measure(fn, memory=True):
+    # Jalankan fn untuk waktu + jumlah evaluasi, lalu (opsional) sekali lagi untuk memori puncak
+    with _EvaluationCounter() as counter:
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+    peak = None
+    if memory:
+        tracemalloc.start()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result, elapsed, counter.count, peak
+
+def run_benchmark(size, seed=0, iterations=100, construction="nearest", memory=True):
+    lokasi = generate_instance(size, seed)
+    depots, customers, rest_areas, menginap_locs = cmvrp.parse_locations(lokasi)
+    vehicle_count = fleet_size(customers)
+    config = {"construction": construction, "tabu_iterations": iterations, "seed": seed}
+    records = []
+
+    def record(stage, elapsed, evaluations, peak, cost):
+        records.append({
+            "stage": stage, "customers": size, "vehicles": vehicle_count, "seed": seed,
+            "wall_time_s": round(elapsed, 4),
+            "evaluations": evaluations,
+            "evaluations_per_s": round(evaluations / elapsed, 1) if elapsed > 0 and evaluations else None,
+            "peak_memory_mb": round(peak / 2**20, 2) if peak is not None else None,
+            "cost": cost,
+        })
+
+    matrix, elapsed, evaluations, peak = measure(
+        lambda: cmvrp.build_distance_matrix(depots, customers, rest_areas, menginap_locs), memory)
+    record("build_distance_matrix", elapsed, evaluations, peak, None)
+
+    assignments, elapsed, evaluations, peak = measure(
+        lambda: cmvrp.allocate_customers(customers, depots, vehicle_count, matrix=matrix, method=construction), memory)
+    unassigned = len(customers) - sum(len(v["customers"]) for v in assignments)
+    record("allocate_customers", elapsed, evaluations, peak, None)
+    records[-1]["unassigned"] = unassigned
+
+    # tabu_search_vrp diukur pada rute kendaraan terpanjang hasil alokasi
+    vehicle = max(assignments, key=lambda v: len(v["customers"]))
+    route, elapsed, evaluations, peak = measure(
+        lambda: cmvrp.tabu_search_vrp(vehicle["depot"][1], vehicle["customers"], customers, rest_areas, menginap_locs,
+                                      iterations=iterations, matrix=matrix), memory)
+    record("tabu_search_vrp", elapsed, evaluations, peak, route[5])
+    records[-1]["route_customers"] = len(vehicle["customers"])
+
+    # Pipeline lengkap run_cmvrp tanpa I/O file dan HTML
+    (assignments, all_routes), elapsed, evaluations, peak = measure(
+        lambda: cmvrp.solve_instance(depots, customers, rest_areas, menginap_locs, vehicle_count, config), memory)
+    record("run_cmvrp", elapsed, evaluations, peak, round(sum(r[5] for r in all_routes), 2))
+    records[-1]["profit"] = round(sum(r[6] for r in all_routes), 2)
+    return records
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark solver CMVRP pada instance sintetis")
+    parser.add_argument("--sizes", default=",".join(map(str, default_sizes)),
+                        help="jumlah pelanggan, dipisah koma (20 s/d 5000)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--iterations", type=int, default=100, help="iterasi tabu per kendaraan")
+    parser.add_argument("--construction", default="nearest", choices=("nearest", "savings", "sweep"))
+    parser.add_argument("--skip-memory", action="store_true", help="lewati pengukuran memori puncak")
+    parser.add_argument("--output", help="tambahkan hasil ke file JSON Lines")
+    parser.add_argument("--write-instance", help="simpan instance terakhir sebagai JSON (format data_lokasi.json)")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    header = f"{'stage':<22}{'cust':>6}{'veh':>5}{'time (s)':>11}{'eval/s':>12}{'mem (MB)':>10}{'cost':>16}"
+    print(header)
+    print("-" * len(header))
+    for size in sizes:
+        records = run_benchmark(size, args.seed, args.iterations, args.construction, memory=not args.skip_memory)
+        for rec in records:
+            print(f"{rec['stage']:<22}{rec['customers']:>6}{rec['vehicles']:>5}{rec['wall_time_s']:>11.3f}"
+                  f"{rec['evaluations_per_s'] or '-':>12}{rec['peak_memory_mb'] if rec['peak_memory_mb'] is not None else '-':>10}"
+                  f"{rec['cost'] if rec['cost'] is not None else '-':>16}")
+            if args.output:
+                with open(args.output, "a") as f:
+                    f.write(json.dumps(rec) + "\n")
+    if args.write_instance:
+        with open(args.write_instance, "w") as f:
+            json.dump(generate_instance(sizes[-1], args.seed), f, indent=4)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+import argparse
+import csv
+import io
+import json
+import os
+
+from location_store import import_batches, iter_locations
+from problem_model import STOP_DEPOT, STOP_CUSTOMER, STOP_REST, STOP_NGINAP
+
+# Impor/ekspor massal: file dibaca baris per baris dan divalidasi per batch sebelum masuk ke database
+batch_size = 1000
+max_reported_errors = 100
+location_types = ("depot", "customer", "rest_area", "menginap")
+location_fields = ("name", "type", "lat", "lon", "demand", "fee", "supply")
+route_fields = ("kendaraan", "urutan", "aktivitas", "lokasi", "lat", "lon", "manual", "waktu_servis")
+formats = ("csv", "jsonl", "parquet")
+_activity = {STOP_DEPOT: "Depot", STOP_CUSTOMER: "Pelanggan", STOP_REST: "Istirahat", STOP_NGINAP: "Menginap"}
+
+def detect_format(filename, fmt=None):
+    if fmt:
+        return fmt
+    ext = os.path.splitext(filename or "")[1].lower().lstrip(".")
+    if ext in ("jsonl", "ndjson"):
+        return "jsonl"
+    if ext in ("parquet", "pq"):
+        return "parquet"
+    return "csv"
+
+def read_rows(source, fmt):
+    # source: path atau file biner; hasil berupa dict mentah per baris
+    if fmt == "parquet":
+        # Parquet dibaca lewat pandas (butuh pyarrow/fastparquet); tidak bisa dibaca per baris
+        import pandas as pd
+        frame = pd.read_parquet(source)
+        for row in frame.to_dict("records"):
+            yield {key: (None if value != value else value) for key, value in row.items()}  # NaN -> None
+        return
+    if isinstance(source, str):
+        source = open(source, "rb")
+    with io.TextIOWrapper(source, encoding="utf-8-sig", newline="") as text:
+        if fmt == "jsonl":
+            for line in text:
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError as e:
+                        # Baris rusak dilaporkan per baris oleh validate_location, bukan menggagalkan seluruh file
+                        yield e
+        else:
+            yield from csv.DictReader(text)
+
+def _number(value, cast):
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    number = float(value)
+    if cast is int:
+        if number != int(number):
+            raise ValueError(f"{value!r} bukan bilangan bulat")
+        return int(number)
+    return number
+
+def validate_location(row):
+    # Normalisasi satu baris ke format item data_lokasi.json; ValueError jika tidak valid
+    if isinstance(row, ValueError):
+        raise ValueError(f"JSON tidak valid: {row}")
+    if not isinstance(row, dict):
+        raise ValueError("baris bukan objek JSON")
+    name = str(row.get("name") or "").strip()
+    if not name:
+        raise ValueError("name kosong")
+    tipe = str(row.get("type") or "").strip()
+    if tipe not in location_types:
+        raise ValueError(f"type tidak dikenal: {tipe!r}")
+    lat = _number(row.get("lat"), float)
+    lon = _number(row.get("lon"), float)
+    if lat is None or lon is None or not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise ValueError("lat/lon tidak valid")
+    item = {"name": name, "type": tipe, "lat": lat, "lon": lon}
+    if tipe == "customer":
+        item["demand"] = _number(row.get("demand"), int)
+        item["fee"] = _number(row.get("fee"), int)
+        if item["demand"] is None or item["demand"] <= 0:
+            raise ValueError("demand pelanggan harus > 0")
+        if item["fee"] is None or item["fee"] < 0:
+            raise ValueError("fee pelanggan harus >= 0")
+    elif tipe == "depot":
+        supply = _number(row.get("supply"), int)
+        if supply is not None:
+            item["supply"] = supply
+    return item
+
+def import_locations(source, fmt="csv", replace=False, path=None):
+    # Kembalikan ringkasan {imported, error_count, errors}; baris tidak valid dilewati dan dilaporkan
+    errors = []
+    error_count = 0
+
+    def batches():
+        nonlocal error_count
+        batch = []
+        for line, row in enumerate(read_rows(source, fmt), start=1):
+            try:
+                batch.append(validate_location(row))
+            except (ValueError, TypeError) as e:
+                error_count += 1
+                if len(errors) < max_reported_errors:
+                    errors.append({"row": line, "error": str(e)})
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    imported = import_batches(batches(), replace=replace, path=path)
+    return {"imported": imported, "error_count": error_count, "errors": errors}
+
+def export_lines(rows, fields, fmt):
+    # Generator teks CSV / JSON Lines, satu potong per baris agar bisa di-stream
+    if fmt == "jsonl":
+        for row in rows:
+            yield json.dumps(row) + "\n"
+        return
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction="ignore")
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+def write_export(rows, fields, fmt, target):
+    # target: path atau file biner (Parquet ditulis sekaligus lewat pandas, tidak di-stream)
+    if fmt == "parquet":
+        import pandas as pd
+        pd.DataFrame(list(rows), columns=list(fields)).to_parquet(target, index=False)
+        return
+    with open(target, "w", newline="") as f:
+        for chunk in export_lines(rows, fields, fmt):
+            f.write(chunk)
+
+def route_rows(result):
+    # Satu baris per singgahan dari hasil solve_cmvrp, dengan penamaan seperti /laporan_rute
+    rest_names = {tuple(v[:2]): k for k, v in reversed(list(result["rest_areas"].items()))}
+    nginap_names = {tuple(v[:2]): k for k, v in reversed(list(result["menginap_locs"].items()))}
+    for i, (vehicle, route) in enumerate(zip(result["assignments"], result["routes"]), start=1):
+        assigned_iter = iter(route[1])
+        for seq, (event, node, coord) in enumerate(route[0], start=1):
+            row = {"kendaraan": f"Kendaraan {i}", "urutan": seq, "aktivitas": _activity[event],
+                   "lat": coord[0], "lon": coord[1], "manual": node >= 0, "waktu_servis": None}
+            if event == STOP_CUSTOMER:
+                _, row["lokasi"], service_time = next(assigned_iter)
+                row["waktu_servis"] = round(service_time, 2)
+            elif event == STOP_DEPOT:
+                row["lokasi"] = vehicle["depot"][0]
+            elif event == STOP_REST:
+                row["lokasi"] = rest_names.get(tuple(coord)) if node >= 0 else "Virtual Rest Area"
+            else:
+                row["lokasi"] = nginap_names.get(tuple(coord)) if node >= 0 else "Virtual Menginap"
+            yield row
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Impor/ekspor massal lokasi dan rute (CSV, JSON Lines, Parquet)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="impor lokasi dari file")
+    imp.add_argument("file")
+    imp.add_argument("--replace", action="store_true", help="hapus semua lokasi lama sebelum impor")
+    for name, help_text in (("export-locations", "ekspor semua lokasi"), ("export-routes", "solve lalu ekspor rute")):
+        exp = sub.add_parser(name, help=help_text)
+        exp.add_argument("file")
+    for name, p in sub.choices.items():
+        p.add_argument("--format", choices=formats, help="default: dari ekstensi file")
+        if name != "export-routes":
+            p.add_argument("--db", help="path database lokasi")
+    args = parser.parse_args(argv)
+    fmt = detect_format(args.file, args.format)
+
+    if args.command == "import":
+        summary = import_locations(args.file, fmt, replace=args.replace, path=args.db)
+        print(f"{summary['imported']} lokasi diimpor, {summary['error_count']} baris ditolak")
+        for err in summary["errors"]:
+            print(f"  baris {err['row']}: {err['error']}")
+    elif args.command == "export-locations":
+        write_export(iter_locations(args.db), location_fields, fmt, args.file)
+        print(f"lokasi diekspor ke {args.file}")
+    else:
+        from cmvrp_tabu_search import solve_cmvrp
+        write_export(route_rows(solve_cmvrp()), route_fields, fmt, args.file)
+        print(f"rute diekspor ke {args.file}")
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,21 @@
 import json
+import os
 import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from math import radians, cos, sin, sqrt, atan2
 
+import numpy as np
+
+from problem_model import ProblemInstance, CompactRoute, STOP_DEPOT, STOP_CUSTOMER, STOP_REST, STOP_NGINAP
+from solution_cache import solution_key, get_solution, put_solution, set_latest_solution, get_latest_solution
+from solver_stats import SolverStats, timed
+from search_budget import SearchBudget, call_limits, search_limits, solve_budget, stop_poll_interval
+from spatial_index import GridIndex, haversine_matrix
+from location_store import load_locations, location_version
+from road_network import road_network_from_config
+from matrix_store import HaversineProvider, block_rows, distance_matrices, resolve_storage, submatrix_rows
+
 # Parameter 
 vehicle_capacity = 72
 speed = 40  # km/jam
@@ -15,6 +29,23 @@ max_work_hours = 5
 rest_time = 0.5
 nginap_time = 8  # jam
 service_time_per_demand = 2 / 60 # 2 menit per demand, dikonversi ke jam
+tabu_iterations = 500
+tabu_tenure = 10
+neighbourhood_operators = ("swap", "2opt", "oropt", "relocate")
+candidate_list_size = 10  # k tetangga terdekat per pelanggan
+oropt_segment_lengths = (2, 3)
+# Di bawah jumlah tetangga (yang mulai sebelum batas kapasitas) ini evaluasi per langkah lebih cepat daripada batch
+# numpy. Diukur per panggilan _neighbour_costs (skalar / batch, ms): rute 8 pelanggan 50 langkah 0.49 / 0.49,
+# 100 langkah 0.97 / 0.73; rute 25 pelanggan 50 langkah 0.78 / 1.37, 100 langkah 1.89 / 1.42, 400 langkah 6.7 / 1.2
+batch_min_moves = 100
+diversification_weight = 0.5  # bobot penalti frekuensi busur untuk langkah yang tidak memperbaiki
+multi_route_iterations = 200
+construction_method = "nearest"  # nearest / savings / sweep
+incremental_iterations = 30  # iterasi tabu singkat untuk rute yang berubah pada mode inkremental
+incremental_max_changes = 10  # lebih dari ini pelanggan berubah -> solve penuh
+island_constructions = ("nearest", "savings", "sweep")  # metode konstruksi bergiliran untuk tiap pulau (multi-start)
+island_epochs = 1  # >1: pulau berhenti tiap epoch untuk bertukar solusi elit lalu dilanjutkan
+island_migrants = 1  # jumlah pulau terburuk yang diganti solusi elit di tiap pertukaran
 
 def haversine(coord1, coord2):
     if isinstance(coord1[0], str) and isinstance(coord1[1], (tuple, list)):
@@ -32,9 +63,57 @@ def haversine(coord1, coord2):
     c = 2 * atan2(sqrt(a), sqrt(1 - a))
     return R * c
 
+def build_distance_matrix(depots, customers, rest_areas=None, menginap_locs=None, road_network=None, storage=None):
+    # Instance berbasis array: depot, pelanggan, rest area, lalu menginap mendapat ID integer berurutan
+    instance = ProblemInstance(depots, customers, rest_areas, menginap_locs)
+
+    # storage: memory / memmap / knn / auto (lihat matrix_store); instance besar memakai matriks di disk
+    storage = resolve_storage(len(instance), storage)
+    if road_network is None and storage == "memory":
+        # Jarak haversine semua pasangan titik dihitung sekaligus (vektor)
+        instance.dist = haversine_matrix(instance.lat, instance.lon)
+        instance.time = instance.dist / speed
+    else:
+        # Jarak/waktu lewat jaringan jalan OSM (lihat road_network) atau haversine, dibuka dari cache disk jika ada
+        provider = road_network.provider(instance.lat, instance.lon) if road_network is not None else \
+            HaversineProvider(instance.lat, instance.lon, speed)
+        instance.dist, instance.time = distance_matrices(provider, instance.lat, instance.lon, storage)
+
+    # Indeks spasial untuk pencarian titik terdekat, kunci = ID titik
+    for group in ("depot", "rest_area", "menginap"):
+        instance.indexes[group] = GridIndex(((node, instance.coord(node)) for node in instance.group_ids[group].values()), haversine)
+    return instance
+
+def node_id(matrix, coord):
+    if isinstance(coord[0], str) and isinstance(coord[1], (tuple, list)):
+        coord = coord[1]
+    return matrix.ids[(float(coord[0]), float(coord[1]))]
+
+def nearest_stop_node(matrix, group, node, max_km=10, stats=None):
+    # ID rest area / menginap manual terdekat dalam max_km (-1 jika tidak ada), dihitung sekali per titik asal
+    memo = matrix.nearest_memo[group]
+    if stats is not None:
+        stats.count(f"{group}_lookups")
+        if node in memo:
+            stats.count(f"{group}_lookup_memo_hits")
+    if node not in memo:
+        found = matrix.indexes[group].nearest(matrix.coord(node), max_km)
+        memo[node] = found[0] if found else -1
+    return memo[node]
+
+_input_data = {}
+
 def load_input_data():
-    with open("data_lokasi.json", "r") as f:
-        lokasi = json.load(f)
+    # Lokasi dibaca dari database SQLite (diisi otomatis dari data_lokasi.json saat pertama kali dipakai).
+    # Hasil parse disimpan di memori proses dan baru dibaca ulang jika location_version berubah; pemanggil
+    # mendapat salinan dict agar cache tidak ikut berubah.
+    version = location_version()
+    if _input_data.get("version") != version:
+        _input_data["data"] = parse_locations(load_locations())
+        _input_data["version"] = version
+    return tuple(dict(group) for group in _input_data["data"])
+
+def parse_locations(lokasi):
     depots = {}
     customers = {}
     rest_areas = {}
@@ -53,6 +132,12 @@ def load_input_data():
 
     return depots, customers, rest_areas, menginap_locs
 
+def depot_supply(depot_data):
+    # Batas total muatan semua kendaraan dari satu depot; None jika supply kosong/0 (tanpa batas depot, hanya
+    # kapasitas kendaraan). Supply hanya membatasi pemindahan muatan antar depot pada tabu_search_multi_route:
+    # konstruksi dan cheapest insertion tidak memeriksanya, jadi muatan awal depot boleh melebihi supply.
+    return depot_data[2] if len(depot_data) > 2 and depot_data[2] else None
+
 
 def generate_virtual_rest_area(last_coord, i=1):
     if isinstance(last_coord[0], str) and isinstance(last_coord[1], (tuple, list)):
@@ -68,59 +153,209 @@ def generate_virtual_menginap_area(last_coord, i=1):
     lon = float(last_coord[1])
     return (lat + 0.015 * i, lon + 0.015 * i)
 
-def load_vehicle_count():
+def load_config():
     try:
         with open("config.json", "r") as f:
-            config = json.load(f)
-            return config.get("vehicle_count", 1)
+            return json.load(f)
     except:
-        return 1
+        return {}
+
+def load_vehicle_count():
+    return load_config().get("vehicle_count", 1)
 
-def find_nearest_depot(customer_loc, depots):
+def find_nearest_depot(customer_loc, depots, matrix=None):
+    if matrix is not None:
+        name = matrix.names[matrix.indexes["depot"].nearest(customer_loc)[0]]
+        return name, depots[name]
     return min(depots.items(), key=lambda d: haversine(customer_loc, d[1][:2]))
 
-def allocate_customers(customers, depots, vehicle_count):
+def allocate_customers(customers, depots, vehicle_count, matrix=None, method=construction_method):
+    # method: "nearest" (nearest neighbour greedy), "savings" (Clarke-Wright) atau "sweep"
+    if matrix is None:
+        matrix = build_distance_matrix(depots, customers)
+    if method == "nearest":
+        return _nearest_neighbour_allocation(customers, depots, vehicle_count, matrix)
+    if method == "savings":
+        routes = _savings_routes(customers, depots, matrix)
+    elif method == "sweep":
+        routes = _sweep_routes(customers, depots, matrix)
+    else:
+        raise ValueError(f"Metode konstruksi tidak dikenal: {method}")
+    return _routes_to_vehicles(routes, customers, depots, vehicle_count)
+
+def _new_vehicle(depot):
+    return {
+        "route": [],
+        "customers": [],
+        "remaining_capacity": vehicle_capacity,
+        "depot": depot
+    }
+
+def _nearest_neighbour_allocation(customers, depots, vehicle_count, matrix):
     unassigned = set(customers.keys())
     assignments = []
     depot_list = list(depots.items())
+    names = list(customers)
+    cust_index = GridIndex(((c, customers[c][:2]) for c in names), haversine)
 
-    for i in range(vehicle_count):
-        vehicle = {
-            "route": [],
-            "customers": [],
-            "remaining_capacity": vehicle_capacity,
-            "depot": None
-        }
+    # Urutan pelanggan menurut jarak ke depot terdekat cukup dihitung sekali
+    by_depot_dist = []
+    if names and depot_list:
+        cust_ids = [matrix.group_ids["customer"][c] for c in names]
+        depot_ids = [matrix.group_ids["depot"][name] for name, _ in depot_list]
+        depot_dist = matrix.dist[np.ix_(cust_ids, depot_ids)].min(axis=1)
+        by_depot_dist = [names[k] for k in np.argsort(depot_dist, kind="stable")]
+    pointer = 0
 
+    for i in range(vehicle_count):
         # Ambil depot paling dekat dengan pelanggan yang tersisa
-        if unassigned:
-            first_cust = min(unassigned, key=lambda c: min(
-                haversine(customers[c][:2], depot[1][:2]) for depot in depot_list))
-            nearest_depot_name, nearest_depot_data = find_nearest_depot(customers[first_cust][:2], depots)
+        while pointer < len(by_depot_dist) and by_depot_dist[pointer] not in unassigned:
+            pointer += 1
+        if pointer < len(by_depot_dist):
+            first_cust = by_depot_dist[pointer]
+            nearest_depot_name, nearest_depot_data = find_nearest_depot(customers[first_cust][:2], depots, matrix)
         else:
             nearest_depot_name, nearest_depot_data = depot_list[0]
 
-        vehicle["depot"] = (nearest_depot_name, nearest_depot_data)
+        vehicle = _new_vehicle((nearest_depot_name, nearest_depot_data))
         current_loc = nearest_depot_data[:2]
 
         while unassigned:
-            possible = None
-            for cust in unassigned:
-                demand = customers[cust][2]
-                if demand <= vehicle["remaining_capacity"]:
-                    dist = haversine(current_loc, customers[cust][:2])
-                    if not possible or dist < haversine(current_loc, customers[possible][:2]):
-                        possible = cust
-            if not possible:
+            remaining = vehicle["remaining_capacity"]
+            found = cust_index.nearest(current_loc, accept=lambda c: customers[c][2] <= remaining)
+            if found is None:
                 break
+            possible = found[0]
             vehicle["customers"].append(possible)
             vehicle["remaining_capacity"] -= customers[possible][2]
             current_loc = customers[possible][:2]
             unassigned.remove(possible)
+            cust_index.remove(possible, current_loc)
 
         assignments.append(vehicle)
     return assignments
 
+def _home_depots(customers, depots, matrix):
+    # Depot terdekat untuk tiap pelanggan (indeks ke list(depots))
+    names = list(customers)
+    cust_ids = [matrix.group_ids["customer"][c] for c in names]
+    depot_ids = [matrix.group_ids["depot"][name] for name in depots]
+    to_depot = matrix.dist[np.ix_(cust_ids, depot_ids)]
+    return names, cust_ids, to_depot, to_depot.argmin(axis=1)
+
+def _savings_routes(customers, depots, matrix, k=candidate_list_size):
+    # Clarke-Wright untuk rute terbuka (tanpa kembali ke depot): menyambung a -> b
+    # menghemat d(depot, b) - d(a, b). Pasangan dibatasi ke k tetangga terdekat.
+    if not customers or not depots:
+        return []
+    names, cust_ids, to_depot, home = _home_depots(customers, depots, matrix)
+    n = len(names)
+    demand = [customers[c][2] for c in names]
+    savings = []
+    k = min(k, n - 1)
+    if k > 0:
+        # Per blok baris agar matriks pelanggan x pelanggan tidak pernah utuh di memori
+        for start in range(0, n, block_rows):
+            sub = np.array(matrix.dist[np.ix_(cust_ids[start:start + block_rows], cust_ids)], dtype=float)
+            sub[np.arange(len(sub)), np.arange(start, start + len(sub))] = np.inf
+            neighbours = np.argpartition(sub, k - 1, axis=1)[:, :k]
+            for row, a in enumerate(range(start, start + len(sub))):
+                for b in neighbours[row].tolist():
+                    if home[a] == home[b]:
+                        saving = to_depot[b, home[b]] - sub[row, b]
+                        if saving > 0:
+                            savings.append((float(saving), a, b))
+    savings.sort(key=lambda x: -x[0])
+
+    # Rute disimpan sebagai linked list: head_of_tail / tail_of_head untuk ujung-ujung rute
+    next_of = [None] * n
+    head_of_tail = {a: a for a in range(n)}
+    tail_of_head = {a: a for a in range(n)}
+    load = {a: demand[a] for a in range(n)}
+    for saving, a, b in savings:
+        if a not in head_of_tail or b not in tail_of_head or head_of_tail[a] == b:
+            continue
+        head = head_of_tail[a]
+        if load[head] + load[b] > vehicle_capacity:
+            continue
+        next_of[a] = b
+        tail = tail_of_head.pop(b)
+        del head_of_tail[a]
+        head_of_tail[tail] = head
+        tail_of_head[head] = tail
+        load[head] += load.pop(b)
+
+    depot_names = list(depots)
+    routes = []
+    for head in sorted(tail_of_head):
+        members = []
+        node = head
+        while node is not None:
+            members.append(names[node])
+            node = next_of[node]
+        routes.append((depot_names[home[head]], members, load[head]))
+    return routes
+
+def _sweep_routes(customers, depots, matrix):
+    # Urutkan pelanggan tiap depot menurut sudut terhadap depot, lalu potong per kapasitas.
+    # Sapuan dimulai setelah celah sudut terbesar agar klaster tidak terbelah.
+    if not customers or not depots:
+        return []
+    names, cust_ids, to_depot, home = _home_depots(customers, depots, matrix)
+    routes = []
+    for d, (depot_name, depot_data) in enumerate(depots.items()):
+        members = [k for k in range(len(names)) if home[k] == d]
+        if not members:
+            continue
+        lat = np.array([float(customers[names[k]][0]) for k in members]) - float(depot_data[0])
+        lon = np.array([float(customers[names[k]][1]) for k in members]) - float(depot_data[1])
+        angle = np.arctan2(lat, lon)
+        order = np.argsort(angle, kind="stable")
+        sorted_angle = angle[order]
+        gaps = np.diff(np.append(sorted_angle, sorted_angle[0] + 2 * np.pi))
+        start = (int(gaps.argmax()) + 1) % len(order)
+        order = np.roll(order, -start)
+
+        chunk, load = [], 0
+        for k in order.tolist():
+            cust = names[members[k]]
+            if chunk and load + customers[cust][2] > vehicle_capacity:
+                routes.append((depot_name, chunk, load))
+                chunk, load = [], 0
+            chunk.append(cust)
+            load += customers[cust][2]
+        if chunk:
+            routes.append((depot_name, chunk, load))
+    return routes
+
+def _routes_to_vehicles(routes, customers, depots, vehicle_count):
+    # Rute terbesar mendapat kendaraan sendiri; sisa pelanggan dititipkan ke kendaraan yang masih muat
+    assignments = []
+    leftovers = []
+    for depot_name, members, load in sorted(routes, key=lambda r: -r[2]):
+        if load <= vehicle_capacity and len(assignments) < vehicle_count:
+            vehicle = _new_vehicle((depot_name, depots[depot_name]))
+            vehicle["customers"] = list(members)
+            vehicle["remaining_capacity"] -= load
+            assignments.append(vehicle)
+        else:
+            leftovers.extend((depot_name, cust) for cust in members)
+    for depot_name, cust in leftovers:
+        demand = customers[cust][2]
+        fits = [v for v in assignments if v["remaining_capacity"] >= demand]
+        same_depot = [v for v in fits if v["depot"][0] == depot_name]
+        target = (same_depot or fits or [None])[0]
+        if target is None and len(assignments) < vehicle_count and demand <= vehicle_capacity:
+            target = _new_vehicle((depot_name, depots[depot_name]))
+            assignments.append(target)
+        if target is not None:
+            target["customers"].append(cust)
+            target["remaining_capacity"] -= demand
+    depot_list = list(depots.items())
+    while len(assignments) < vehicle_count:
+        assignments.append(_new_vehicle(depot_list[0]))
+    return assignments
+
 def get_nearest_or_virtual_rest_area(current, rest_areas, counter):
     nearest = None
     min_dist = float('inf')
@@ -141,7 +376,90 @@ def get_nearest_or_virtual_menginap(current, menginap_locs, counter):
             min_dist = d
     return nearest if nearest else generate_virtual_menginap_area(current, counter)
 
-def calculate_route_metrics(route, customers, depot, rest_areas=None, menginap_locs=None, remaining_capacity=vehicle_capacity):
+def calculate_route_metrics(route, customers, depot, rest_areas=None, menginap_locs=None, remaining_capacity=vehicle_capacity, matrix=None,
+                            stats=None):
+    if matrix is None:
+        matrix = build_distance_matrix({"depot": depot}, customers, rest_areas, menginap_locs)
+    customer_ids = matrix.group_ids["customer"]
+    return simulate_route([customer_ids[c] for c in route], node_id(matrix, depot[:2]), matrix, remaining_capacity, stats)
+
+def calculate_route_metrics_batch(routes, customers, depot, rest_areas=None, menginap_locs=None, remaining_capacity=vehicle_capacity,
+                                  matrix=None, stats=None):
+    # Banyak rute (urutan nama pelanggan) dari satu depot sekaligus; tiap hasil = calculate_route_metrics(route, ...)
+    if matrix is None:
+        matrix = build_distance_matrix({"depot": depot}, customers, rest_areas, menginap_locs)
+    customer_ids = matrix.group_ids["customer"]
+    return route_metrics_batch([[customer_ids[c] for c in route] for route in routes], node_id(matrix, depot[:2]), matrix,
+                               remaining_capacity, stats)
+
+def route_metrics_batch(seqs, depot_id, matrix, remaining_capacity=vehicle_capacity, stats=None):
+    # simulate_route untuk banyak urutan ID pelanggan sekaligus (tuple 13 field yang sama). Metrik numerik dihitung
+    # vektor oleh _simulate_batch; CompactRoute dan daftar pelanggan disusun dari posisi istirahat/menginap hasilnya.
+    if not len(seqs):
+        return []
+    with timed(stats, "route_metrics_batch"):
+        nodes = np.full((len(seqs), max(len(seq) for seq in seqs)), -1, dtype=np.int64)
+        for b, seq in enumerate(seqs):
+            nodes[b, :len(seq)] = seq
+        # Cukup submatriks titik yang dipakai (matrix.dist bisa memmap / knn besar)
+        ids = np.unique(np.append(nodes[nodes >= 0], depot_id))
+        local = np.where(nodes >= 0, np.searchsorted(ids, nodes), -1)
+        sub = np.ix_(ids, ids)
+        demand = np.asarray(matrix.demand, dtype=float)[ids]
+        totals = _simulate_batch(local, np.asarray(matrix.dist[sub], dtype=float), np.asarray(matrix.time[sub], dtype=float),
+                                 demand * service_time_per_demand, demand, np.asarray(matrix.fee, dtype=float)[ids],
+                                 remaining_capacity=remaining_capacity, depot=int(np.searchsorted(ids, depot_id)))
+        fields = ("served", "nginaps", "distance", "revenue", "cost", "service", "rest_time", "nginap_time", "time", "travel")
+        results = []
+        for b, (served, nginaps, distance, revenue, cost, service, rest, nginap, total_time, travel) in enumerate(
+                zip(*(totals[f].tolist() for f in fields))):
+            route, assigned = _compact_route(seqs[b][:int(served)], depot_id, matrix, totals["rests"][b], totals["overnights"][b],
+                                             stats)
+            results.append((route, assigned, int(nginaps), round(distance, 2), round(revenue, 2), round(cost, 2),
+                            round(revenue - cost, 2), round(service, 2), round(rest, 2), round(nginap, 2),
+                            round(total_time, 2), round(travel, 2), round(travel + service, 2)))
+    return results
+
+def _compact_route(seq, depot_id, matrix, rests, overnights, stats=None):
+    # Singgahan rute terlayani dengan istirahat/menginap di posisi yang sudah diketahui (sama seperti _simulate_route)
+    vehicle_route = CompactRoute()
+    vehicle_route.add(STOP_DEPOT, depot_id, matrix.coord(depot_id))
+    assigned = []
+    last_id = depot_id
+    rest_counter = 0
+    nginap_counter = 0
+    for k, cust_id in enumerate(seq):
+        if rests[k]:
+            rest_node = nearest_stop_node(matrix, "rest_area", last_id, stats=stats)
+            if rest_node >= 0:
+                vehicle_route.add(STOP_REST, rest_node, matrix.coord(rest_node))
+            else:
+                vehicle_route.add(STOP_REST, -1, generate_virtual_rest_area(matrix.coord(last_id), rest_counter))
+            rest_counter += 1
+        if overnights[k]:
+            nginap_node = nearest_stop_node(matrix, "menginap", last_id, stats=stats)
+            if nginap_node >= 0:
+                vehicle_route.add(STOP_NGINAP, nginap_node, matrix.coord(nginap_node))
+            else:
+                vehicle_route.add(STOP_NGINAP, -1, generate_virtual_menginap_area(matrix.coord(last_id), nginap_counter))
+            nginap_counter += 1
+        cust_coord = matrix.coord(cust_id)
+        vehicle_route.add(STOP_CUSTOMER, cust_id, cust_coord)
+        assigned.append((cust_coord, matrix.names[cust_id], matrix.demand[cust_id] * service_time_per_demand))
+        last_id = cust_id
+    return vehicle_route, assigned
+
+def simulate_route(seq, depot_id, matrix, remaining_capacity=vehicle_capacity, stats=None):
+    # seq: ID titik pelanggan; hasil berupa tuple 13 field dengan CompactRoute di posisi pertama
+    with timed(stats, "simulate_route"):
+        return _simulate_route(seq, depot_id, matrix, remaining_capacity, stats)
+
+def _simulate_route(seq, depot_id, matrix, remaining_capacity, stats):
+    dist_matrix = matrix.dist
+    time_matrix = matrix.time
+    demand_of = matrix.demand
+    fee_of = matrix.fee
+    last_id = depot_id
     total_time = 0
     time_since_rest = 0
     time_since_menginap = 0
@@ -155,21 +473,19 @@ def calculate_route_metrics(route, customers, depot, rest_areas=None, menginap_l
     total_service_time = 0
     total_rest_time = 0
     total_nginap_time = 0
-    vehicle_route = [depot[:2]]
+    vehicle_route = CompactRoute()
+    vehicle_route.add(STOP_DEPOT, depot_id, matrix.coord(depot_id))
     assigned = []
 
-    for cust in route:
-        demand = customers[cust][2]
+    for cust_id in seq:
+        demand = demand_of[cust_id]
         if demand > remaining_capacity:
             break  # Stop jika kapasitas tidak cukup lagi
         remaining_capacity -= demand
-        cust_coord = customers[cust][:2]
-        last_point = vehicle_route[-1]
-        last_coord = last_point[1] if isinstance(last_point, tuple) and isinstance(last_point[0], str) else last_point
 
         # Hitung waktu perjalanan ke titik pelanggan
-        dist = haversine(last_coord, cust_coord)
-        travel_time = dist / speed
+        dist = float(dist_matrix[last_id, cust_id])
+        travel_time = float(time_matrix[last_id, cust_id])
 
         # Tambahkan ke waktu total dan perjalanan
         total_travel_time += travel_time
@@ -178,8 +494,11 @@ def calculate_route_metrics(route, customers, depot, rest_areas=None, menginap_l
 
         # Cek apakah perlu istirahat
         if time_since_rest >= max_work_hours:
-            rest_coord = get_nearest_or_virtual_rest_area(last_coord, rest_areas, rest_counter)
-            vehicle_route.append(("rest", rest_coord))
+            rest_node = nearest_stop_node(matrix, "rest_area", last_id, stats=stats)
+            if rest_node >= 0:
+                vehicle_route.add(STOP_REST, rest_node, matrix.coord(rest_node))
+            else:
+                vehicle_route.add(STOP_REST, -1, generate_virtual_rest_area(matrix.coord(last_id), rest_counter))
             total_rest_time += rest_time
             total_time += rest_time
             time_since_rest = 0
@@ -188,8 +507,11 @@ def calculate_route_metrics(route, customers, depot, rest_areas=None, menginap_l
 
         # Cek apakah perlu menginap
         if time_since_menginap > max_daily_hours:
-            nginap_coord = get_nearest_or_virtual_menginap(last_coord, menginap_locs, nginap_counter)
-            vehicle_route.append(("nginap", nginap_coord))
+            nginap_node = nearest_stop_node(matrix, "menginap", last_id, stats=stats)
+            if nginap_node >= 0:
+                vehicle_route.add(STOP_NGINAP, nginap_node, matrix.coord(nginap_node))
+            else:
+                vehicle_route.add(STOP_NGINAP, -1, generate_virtual_menginap_area(matrix.coord(last_id), nginap_counter))
             total_nginap_time += nginap_time
             time_since_rest = 0
             time_since_menginap = 0
@@ -199,15 +521,17 @@ def calculate_route_metrics(route, customers, depot, rest_areas=None, menginap_l
 
 
         # Tambahkan ke rute dan hitung waktu pelayanan
-        vehicle_route.append(cust_coord)
-        service_time = customers[cust][2] * service_time_per_demand
+        cust_coord = matrix.coord(cust_id)
+        vehicle_route.add(STOP_CUSTOMER, cust_id, cust_coord)
+        last_id = cust_id
+        service_time = demand * service_time_per_demand
         total_service_time += service_time
         total_time += service_time
         time_since_rest += service_time
         time_since_menginap += service_time
         total_distance += dist
-        total_revenue += customers[cust][3] * customers[cust][2]
-        assigned.append((cust_coord, cust, service_time))
+        total_revenue += fee_of[cust_id] * demand
+        assigned.append((cust_coord, matrix.names[cust_id], service_time))
     
     total_work_time = total_travel_time + total_service_time
     total_cost += (total_distance / fuel_consumption) * fuel_price
@@ -226,47 +550,1035 @@ def calculate_route_metrics(route, customers, depot, rest_areas=None, menginap_l
     round(total_work_time, 2)
     )
 
-def tabu_search_vrp(depot, customer_names, customers, rest_areas=None, menginap_locs=None, iterations=500, tabu_tenure=10):
-    current_solution = customer_names[:]
+def prepare_route_data(depot_list, customer_names, customers, matrix):
+    # Indeks lokal: depot lebih dulu (0..d-1), lalu pelanggan sesuai urutan customer_names.
+    # dist/time diindeks [a][b]; untuk data besar barisnya ringkas atau dimuat sesuai kebutuhan (submatrix_rows)
+    ids = [node_id(matrix, depot[:2]) for depot in depot_list] + [matrix.group_ids["customer"][c] for c in customer_names]
+    demand = [matrix.demand[node] for node in ids]
+    return {
+        "names": [None] * len(depot_list) + list(customer_names),
+        "ids": ids,
+        "dist": submatrix_rows(matrix.dist, ids),
+        "time": submatrix_rows(matrix.time, ids),
+        "demand": demand,
+        "service": [d * service_time_per_demand for d in demand],
+    }
+
+def route_prefix_states(seq, data, remaining_capacity=vehicle_capacity, depot=0):
+    # Simpan state simulasi sebelum tiap posisi agar evaluasi langkah bisa dilanjutkan dari tengah rute
+    dist, travel, service, demand = data["dist"], data["time"], data["service"], data["demand"]
+    state = (depot, 0, 0, 0, 0, remaining_capacity)
+    states = [state]
+    for node in seq:
+        last, since_rest, since_nginap, total_distance, break_cost, capacity = state
+        if demand[node] > capacity:
+            break
+        t = travel[last][node]
+        since_rest += t
+        since_nginap += t
+        if since_rest >= max_work_hours:
+            since_rest = 0
+            break_cost += rest_cost
+        if since_nginap > max_daily_hours:
+            since_rest = 0
+            since_nginap = 0
+            break_cost += overnight_stay_cost
+        since_rest += service[node]
+        since_nginap += service[node]
+        total_distance += dist[last][node]
+        state = (node, since_rest, since_nginap, total_distance, break_cost, capacity - demand[node])
+        states.append(state)
+    return states
+
+def evaluate_route_from(seq, start, state, data):
+    # Sama persis dengan total biaya calculate_route_metrics, tanpa membangun rute koordinat
+    dist, travel, service, demand = data["dist"], data["time"], data["service"], data["demand"]
+    last, since_rest, since_nginap, total_distance, break_cost, capacity = state
+    for k in range(start, len(seq)):
+        node = seq[k]
+        if demand[node] > capacity:
+            break
+        capacity -= demand[node]
+        t = travel[last][node]
+        since_rest += t
+        since_nginap += t
+        if since_rest >= max_work_hours:
+            since_rest = 0
+            break_cost += rest_cost
+        if since_nginap > max_daily_hours:
+            since_rest = 0
+            since_nginap = 0
+            break_cost += overnight_stay_cost
+        since_rest += service[node]
+        since_nginap += service[node]
+        total_distance += dist[last][node]
+        last = node
+    total_cost = break_cost + (total_distance / fuel_consumption) * fuel_price
+    total_cost += total_distance * cost_per_km
+    return round(total_cost, 2)
+
+def route_cost(seq, data, remaining_capacity=vehicle_capacity, depot=0):
+    return evaluate_route_from(seq, 0, (depot, 0, 0, 0, 0, remaining_capacity), data)
+
+def _simulate_batch(nodes, dist, travel, service, demand, fee=None, starts=None, states=None,
+                    remaining_capacity=vehicle_capacity, depot=0):
+    # Simulasi banyak urutan sekaligus: vektor numpy di sepanjang kandidat, loop hanya per posisi.
+    # nodes: array (B, L) ID titik, -1 = padding. starts/states: mulai tiap kandidat dari state prefix
+    # (format route_prefix_states). Operasi per kandidat sama urutannya dengan evaluate_route_from/_simulate_route,
+    # jadi hasil float identik (diuji di tests/test_simulate_batch.py). fee=None: hanya biaya dan jarak (tabu search);
+    # selain itu semua metrik simulate_route, jumlah pelanggan terlayani, dan posisi istirahat/menginap (B, L).
+    count, length = nodes.shape
+    if states is None:
+        starts = np.zeros(count, dtype=np.int64)
+        state = np.tile(np.array([depot, 0, 0, 0, 0, remaining_capacity], dtype=float), (count, 1))
+        order = None
+    else:
+        # Diurutkan menurut posisi mulai, sehingga di posisi k cukup memproses prefix kandidat yang sudah mulai
+        order = np.argsort(starts, kind="stable")
+        starts = starts[order]
+        nodes = nodes[order]
+        state = np.asarray(states, dtype=float)[order]
+    last = state[:, 0].astype(np.int64)
+    since_rest, since_nginap, total_distance, break_cost, capacity = (state[:, i].copy() for i in range(1, 6))
+    full = fee is not None
+    names = ("travel", "service", "revenue", "rest_time", "nginap_time", "time", "nginaps", "served") if full else ()
+    total = {name: np.zeros(count) for name in names}
+    if full:
+        total["rests"] = np.zeros((count, length), dtype=bool)
+        total["overnights"] = np.zeros((count, length), dtype=bool)
+    active = np.ones(count, dtype=bool)
+    started = np.searchsorted(starts, np.arange(length), side="right")
+    # Matriks diratakan agar busur (last, node) cukup diambil dengan satu take per posisi
+    width = travel.shape[1]
+    flat_travel = np.ascontiguousarray(travel).ravel()
+    flat_dist = np.ascontiguousarray(dist).ravel()
+    for k in range(int(starts[0]) if count else length, length):
+        m = started[k]
+        node = nodes[:m, k]
+        live = active[:m] & (node >= 0)
+        # sel = slice jika semua kandidat yang sudah mulai masih jalan (kasus umum, tanpa salin), selain itu indeks
+        sel = slice(0, m) if live.all() else np.flatnonzero(live)
+        if not isinstance(sel, slice):
+            if not len(sel):
+                continue
+            node = node[sel]
+        node_demand = demand.take(node)
+        over = node_demand > capacity[sel]
+        if over.any():
+            # Kapasitas tidak cukup: kandidat berhenti di sini seperti break pada simulasi per rute
+            live = np.arange(m) if isinstance(sel, slice) else sel
+            active[live[over]] = False
+            sel = live[~over]
+            node = node[~over]
+            node_demand = node_demand[~over]
+            if not len(sel):
+                continue
+        capacity[sel] -= node_demand
+        arc = last[sel] * width + node
+        t = flat_travel.take(arc)
+        rest_now = since_rest[sel] + t
+        nginap_now = since_nginap[sel] + t
+        rest = rest_now >= max_work_hours
+        nginap = nginap_now > max_daily_hours
+        stopped = rest | nginap
+        if stopped.any():
+            # Menambah 0.0 pada kandidat tanpa istirahat tidak mengubah nilai, jadi tetap identik dengan versi per rute
+            break_cost[sel] = break_cost[sel] + rest_cost * rest + overnight_stay_cost * nginap
+            rest_now[stopped] = 0
+            nginap_now[nginap] = 0
+        node_service = service.take(node)
+        since_rest[sel] = rest_now + node_service
+        since_nginap[sel] = nginap_now + node_service
+        total_distance[sel] += flat_dist.take(arc)
+        if full:
+            total["travel"][sel] += t
+            total["service"][sel] += node_service
+            total["revenue"][sel] += fee.take(node) * node_demand
+            total["rest_time"][sel] += rest_time * rest
+            total["nginap_time"][sel] += nginap_time * nginap
+            total["time"][sel] = total["time"][sel] + rest_time * rest + node_service
+            total["nginaps"][sel] += nginap
+            total["served"][sel] += 1
+            total["rests"][sel, k] = rest
+            total["overnights"][sel, k] = nginap
+        last[sel] = node
+    total_cost = break_cost + (total_distance / fuel_consumption) * fuel_price
+    total_cost += total_distance * cost_per_km
+    total.update(distance=total_distance, cost=total_cost)
+    if order is not None:
+        for name, values in total.items():
+            total[name] = np.empty_like(values)
+            total[name][order] = values
+    return total
+
+def _route_arrays(data):
+    # Versi numpy dari data rute lokal, dibuat sekali per data
+    if "dist_array" not in data:
+        for key in ("dist", "time", "service", "demand"):
+            data[f"{key}_array"] = np.asarray(data[key], dtype=float)
+    return data["dist_array"], data["time_array"], data["service_array"], data["demand_array"]
+
+def build_candidate_lists(data, k=candidate_list_size):
+    # k tetangga terdekat untuk tiap titik lokal (depot ikut sebagai kandidat); jarak sama diurutkan menurut indeks.
+    # Per blok baris dengan argpartition agar matriks lokal tidak pernah utuh di memori dan tanpa sort n log n per baris.
+    dist = data["dist"]
+    n = len(dist)
+    k = min(k, n - 1)
+    if k <= 0:
+        return [[] for _ in range(n)]
+    candidates = []
+    for start in range(0, n, block_rows):
+        block = np.array([dist[a] for a in range(start, min(start + block_rows, n))], dtype=float)
+        block[np.arange(len(block)), np.arange(start, start + len(block))] = np.inf
+        kth = np.partition(block, k - 1, axis=1)[:, k - 1:k]
+        for row, limit in zip(block, kth):
+            near = np.flatnonzero(row <= limit)
+            candidates.append(near[np.argsort(row[near], kind="stable")][:k].tolist())
+    return candidates
+
+def neighbourhood_moves(seq, candidates, operators=neighbourhood_operators):
+    n = len(seq)
+    pos = [-1] * len(candidates)  # depot berada di posisi -1
+    for p, node in enumerate(seq):
+        pos[node] = p
+    moves = {}
+    for i, a in enumerate(seq):
+        for b in candidates[a]:
+            j = pos[b]
+            if "swap" in operators and j >= 0:
+                moves[("swap", min(i, j), max(i, j))] = None
+            if "2opt" in operators:
+                # Balik segmen agar a langsung bersebelahan dengan b
+                lo, hi = (i + 1, j) if i < j else (j + 1, i)
+                if lo < hi:
+                    moves[("2opt", lo, hi)] = None
+            if "relocate" in operators and j != i - 1:
+                moves[("relocate", i, 1, j)] = None
+            if "oropt" in operators:
+                for length in oropt_segment_lengths:
+                    if i + length <= n and not i <= j < i + length and j != i - 1:
+                        moves[("oropt", i, length, j)] = None
+    return list(moves)
+
+def apply_move(seq, move):
+    # Kembalikan (posisi pertama yang berubah, urutan baru)
+    kind = move[0]
+    if kind == "swap":
+        _, i, j = move
+        new = seq[:]
+        new[i], new[j] = new[j], new[i]
+        return i, new
+    if kind == "2opt":
+        _, i, j = move
+        return i, seq[:i] + seq[i:j + 1][::-1] + seq[j + 1:]
+    # relocate / or-opt: pindahkan segmen seq[i:i+length] ke setelah posisi j
+    _, i, length, j = move
+    segment = seq[i:i + length]
+    rest = seq[:i] + seq[i + length:]
+    k = j + 1 if j < i else j + 1 - length
+    return min(i, k), rest[:k] + segment + rest[k:]
+
+_move_codes = {"swap": 0, "2opt": 1, "relocate": 2, "oropt": 3}
+_move_kinds = ("swap", "2opt", "relocate", "oropt")
+
+def neighbourhood_params(seq, candidates, operators=neighbourhood_operators):
+    # Versi vektor neighbourhood_moves: array (B, 4) (kode langkah, i, j, panjang segmen) dengan isi dan urutan
+    # yang sama (urut posisi, kandidat, lalu operator; duplikat disimpan di kemunculan pertama).
+    # candidates: array (titik lokal, k) dari build_candidate_lists.
+    n = len(seq)
+    seq = np.asarray(seq, dtype=np.int64)
+    pos = np.full(len(candidates), -1, dtype=np.int64)  # depot berada di posisi -1
+    pos[seq] = np.arange(n)
+    j = pos[candidates[seq]]
+    i = np.broadcast_to(np.arange(n)[:, None], j.shape)
+    slots = []
+    if "swap" in operators:
+        slots.append((0, np.minimum(i, j), np.maximum(i, j), 0, j >= 0))
+    if "2opt" in operators:
+        # Balik segmen agar a langsung bersebelahan dengan b
+        lo, hi = np.where(i < j, i + 1, j + 1), np.maximum(i, j)
+        slots.append((1, lo, hi, 0, lo < hi))
+    if "relocate" in operators:
+        slots.append((2, i, j, 1, j != i - 1))
+    if "oropt" in operators:
+        for length in oropt_segment_lengths:
+            slots.append((3, i, j, length, (i + length <= n) & ~((i <= j) & (j < i + length)) & (j != i - 1)))
+    if not slots or not j.size:
+        return np.empty((0, 4), dtype=np.int64)
+    params = np.stack([np.stack(np.broadcast_arrays(*slot[:4]), axis=-1) for slot in slots], axis=2).reshape(-1, 4)
+    valid = np.stack([slot[4] for slot in slots], axis=2).ravel()
+    params = params[valid]
+    size = max(oropt_segment_lengths + (1,)) + 1
+    keys = ((params[:, 0] * (n + 1) + params[:, 1]) * (n + 1) + params[:, 2] + 1) * size + params[:, 3]
+    first = np.unique(keys, return_index=True)[1]
+    first.sort()
+    return params[first]
+
+def param_move(row):
+    # Satu baris neighbourhood_params -> tuple langkah (format neighbourhood_moves / apply_move)
+    code, i, j, length = (int(v) for v in row)
+    if code < 2:
+        return (_move_kinds[code], i, j)
+    return (_move_kinds[code], i, length, j)
+
+def move_starts(params):
+    # Posisi pertama yang berubah oleh tiap langkah (sama dengan apply_move)
+    kind, i, j, seg = params.T
+    k = np.where(j < i, j + 1, j + 1 - seg)
+    return np.where(kind >= 2, np.minimum(i, k), i)
+
+def neighbour_matrix(seq, params, width=None):
+    # Versi vektor apply_move untuk semua langkah sekaligus: (posisi pertama yang berubah, array (B, width) urutan baru).
+    # width: cukup kolom awal rute (posisi setelahnya tidak pernah terlayani)
+    kind, i, j, seg = params.T
+    pos = np.arange(len(seq) if width is None else width)
+    index = np.empty((len(params), len(pos)), dtype=np.int64)
+    # Swap: tukar posisi i dan j
+    rows = np.flatnonzero(kind == 0)
+    index[rows] = np.where(pos == i[rows, None], j[rows, None], np.where(pos == j[rows, None], i[rows, None], pos))
+    # 2-opt: balik segmen i..j
+    rows = np.flatnonzero(kind == 1)
+    lo, hi = i[rows, None], j[rows, None]
+    index[rows] = np.where((pos >= lo) & (pos <= hi), lo + hi - pos, pos)
+    # Relocate / or-opt: segmen i..i+seg-1 disisipkan di posisi k pada sisa rute
+    rows = np.flatnonzero(kind >= 2)
+    lo, hi, size = i[rows, None], j[rows, None], seg[rows, None]
+    k = np.where(hi < lo, hi + 1, hi + 1 - size)
+    rest = pos - size * (pos >= k)
+    index[rows] = np.where((pos >= k) & (pos < k + size), lo + pos - k, rest + size * (rest >= lo))
+    return move_starts(params), np.asarray(seq, dtype=np.int64)[index]
+
+def _served_width(seq, data, capacity):
+    # Posisi sesudah ini tidak pernah terlayani: bahkan pelanggan dengan demand terkecil tidak muat lagi
+    demand = np.sort(_route_arrays(data)[3][seq])
+    return min(len(seq), int(np.searchsorted(np.cumsum(demand), capacity, side="right")) + 1)
+
+def _neighbour_costs(seq, params, states, current_cost, data):
+    # Biaya semua tetangga (array B); langkah yang mulai setelah batas kapasitas tidak mengubah biaya rute.
+    # Kurang dari batch_min_moves langkah dievaluasi satu per satu, selebihnya dengan _simulate_batch.
+    costs = np.full(len(params), float(current_cost))
+    starts = move_starts(params)
+    inside = np.flatnonzero(starts < len(states))
+    if len(inside) < batch_min_moves:
+        for b in inside.tolist():
+            start, neighbor = apply_move(seq, param_move(params[b]))
+            costs[b] = evaluate_route_from(neighbor, start, states[start], data)
+        return costs
+    if len(inside):
+        starts, nodes = neighbour_matrix(seq, params[inside], _served_width(seq, data, states[0][5]))
+        dist, travel, service, demand = _route_arrays(data)
+        totals = _simulate_batch(nodes, dist, travel, service, demand, starts=starts,
+                                 states=np.asarray(states, dtype=float)[starts])
+        costs[inside] = round_costs(totals["cost"])
+    return costs
+
+def round_costs(values):
+    # Sama dengan round(v, 2) per elemen: rint(v * 100) / 100 hanya bisa berbeda jika v * 100 hampir tepat di x.5,
+    # dan nilai seperti itu dibulatkan dengan round Python
+    scaled = values * 100
+    rounded = np.rint(scaled) / 100
+    near = np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6)
+    rounded[near] = [round(v, 2) for v in values[near].tolist()]
+    return rounded
+
+def added_arcs(path, params):
+    # Versi vektor move_arcs(...)[1]: array (B, 4) titik asal dan tujuan busur yang ditambahkan tiap langkah.
+    # path = [0] + seq + [akhir rute]; langkah dengan kurang dari 4 busur diisi busur (akhir, akhir).
+    path = np.asarray(path, dtype=np.int64)
+    end = path[-1]
+    kind, i, j, seg = params.T
+    src = np.full((len(params), 4), end, dtype=np.int64)
+    dst = src.copy()
+    # Swap: a = path[i + 1] dan b = path[j + 1] bertukar tempat
+    a, b = path[i + 1], path[j + 1]
+    swap = kind == 0
+    src[swap, 0], dst[swap, 0] = path[i][swap], b[swap]
+    apart = swap & (j > i + 1)
+    src[apart, 1], dst[apart, 1] = b[apart], path[i + 2][apart]
+    src[apart, 2], dst[apart, 2] = path[j][apart], a[apart]
+    src[swap, 3], dst[swap, 3] = a[swap], path[j + 2][swap]
+    # 2-opt
+    rows = kind == 1
+    src[rows, 0], dst[rows, 0] = path[i][rows], b[rows]
+    src[rows, 1], dst[rows, 1] = a[rows], path[j + 2][rows]
+    # Relocate / or-opt
+    rows = np.flatnonzero(kind >= 2)
+    i, j, seg = i[rows], j[rows], seg[rows]
+    src[rows, 0], dst[rows, 0] = path[i], path[i + seg + 1]
+    src[rows, 1], dst[rows, 1] = path[j + 1], path[i + 1]
+    src[rows, 2], dst[rows, 2] = path[i + seg], path[j + 2]
+    return src, dst
+
+def move_arcs(seq, move, path=None):
+    # Busur yang dihapus dan ditambahkan oleh langkah, sebagai pasangan (a, b); depot = titik 0 sebelum posisi
+    # pertama, None = akhir rute. path = [0] + seq + [None] bisa diberikan agar tidak dibangun ulang tiap langkah.
+    if path is None:
+        path = [0] + seq + [None]
+    kind = move[0]
+    if kind == "swap":
+        _, i, j = move
+        a, b = path[i + 1], path[j + 1]
+        if j == i + 1:
+            return ((path[i], a), (b, path[j + 2])), ((path[i], b), (a, path[j + 2]))
+        return (((path[i], a), (a, path[i + 2]), (path[j], b), (b, path[j + 2])),
+                ((path[i], b), (b, path[i + 2]), (path[j], a), (a, path[j + 2])))
+    if kind == "2opt":
+        _, i, j = move
+        return (((path[i], path[i + 1]), (path[j + 1], path[j + 2])),
+                ((path[i], path[j + 1]), (path[i + 1], path[j + 2])))
+    _, i, length, j = move
+    first, last = path[i + 1], path[i + length]
+    return (((path[i], first), (last, path[i + length + 1]), (path[j + 1], path[j + 2])),
+            ((path[i], path[i + length + 1]), (path[j + 1], first), (last, path[j + 2])))
+
+def tabu_search_vrp(depot, customer_names, customers, rest_areas=None, menginap_locs=None, iterations=tabu_iterations, tabu_tenure=tabu_tenure, matrix=None,
+                    operators=neighbourhood_operators, candidate_size=candidate_list_size, progress=None, stats=None,
+                    time_limit=None, max_evaluations=None, stagnation_limit=None, stop=None, shared=None):
+    # Anytime: berhenti sebelum iterasi habis jika batas waktu/evaluasi/stagnasi tercapai atau stop() bernilai True,
+    # lalu kembalikan solusi terbaik sejauh ini. shared: SolveBudget seluruh solve yang ikut dihabiskan pemanggilan ini
+    budget = SearchBudget(time_limit, max_evaluations, stagnation_limit, stop, shared)
+    with timed(stats, "tabu_search_vrp"):
+        return _tabu_search_vrp(depot, customer_names, customers, rest_areas, menginap_locs, iterations, tabu_tenure, matrix,
+                                operators, candidate_size, progress, stats, budget)
+
+def _tabu_search_vrp(depot, customer_names, customers, rest_areas, menginap_locs, iterations, tabu_tenure, matrix,
+                     operators, candidate_size, progress, stats, budget):
+    if matrix is None:
+        matrix = build_distance_matrix({"depot": depot}, customers, rest_areas, menginap_locs)
+    data = prepare_route_data([depot], customer_names, customers, matrix)
+    candidates = np.array(build_candidate_lists(data, candidate_size), dtype=np.int64).reshape(len(data["ids"]), -1)
+    current_solution = list(range(1, len(customer_names) + 1))
     best_solution = current_solution[:]
-    best_cost = calculate_route_metrics(best_solution, customers, depot, rest_areas, menginap_locs)[5]  # total cost
-    tabu_list = []
-    
-    for _ in range(iterations):
-        neighborhood = []
-        for i in range(len(current_solution)):
-            for j in range(i + 1, len(current_solution)):
-                neighbor = current_solution[:]
-                neighbor[i], neighbor[j] = neighbor[j], neighbor[i]
-                if (i, j) not in tabu_list:
-                    neighborhood.append((neighbor, (i, j)))
-        if not neighborhood:
+    best_cost = route_cost(best_solution, data)  # total cost
+    # Memori tabu berbasis atribut: tabu[a, b] = iterasi terakhir busur (a, b) yang baru dihapus tabu untuk ditambahkan
+    # lagi, disimpan untuk kedua arah. Titik lokal 0..n, indeks end = akhir rute. Matriks numpy agar semua langkah
+    # tetangga bisa disaring sekaligus.
+    end = len(data["ids"])
+    tabu = np.full((end + 1, end + 1), -1, dtype=np.int64)
+    # Frekuensi tiap busur ditambahkan, untuk diversifikasi; skala penalti = rata-rata biaya per busur
+    frequency = np.zeros((end + 1, end + 1), dtype=np.int64)
+    penalty_scale = diversification_weight * best_cost / max(len(customer_names), 1)
+
+    for it in range(iterations):
+        # Langkah hanya mengubah rute mulai posisi tertentu, jadi simulasi dilanjutkan dari state sebelum posisi itu
+        if stats is not None:
+            started = time.perf_counter()
+        states = route_prefix_states(current_solution, data)
+        current_cost = route_cost(current_solution, data)
+        params = neighbourhood_params(current_solution, candidates, operators)
+        path = [0] + current_solution + [end]
+        # Semua tetangga dievaluasi dan disaring tabu/aspirasi sekaligus (vektor numpy, tanpa loop per langkah)
+        costs = _neighbour_costs(current_solution, params, states, current_cost, data)
+        src, dst = added_arcs(path, params)
+        is_tabu = (tabu[src, dst] >= it).any(axis=1)
+        # Aspirasi: langkah tabu tetap boleh jika menghasilkan solusi terbaik baru
+        aspirated = is_tabu & (costs < best_cost)
+        allowed = np.flatnonzero(~is_tabu | aspirated)
+        # Penalti frekuensi hanya untuk langkah yang tidak memperbaiki solusi saat ini
+        penalty = penalty_scale * frequency[src, dst].sum(axis=1) / (it + 1)
+        scores = np.where(costs >= current_cost, costs + penalty, costs)[allowed]
+        if stats is not None:
+            stats.add_time("neighbourhood_evaluation", time.perf_counter() - started)
+            stats.count("iterations")
+            stats.count("neighbours_evaluated", len(params))
+            stats.count("tabu_skipped", int(is_tabu.sum() - aspirated.sum()))
+            stats.count("aspiration_accepted", int(aspirated.sum()))
+        if not len(allowed):
             break
-        neighborhood.sort(key=lambda x: calculate_route_metrics(x[0], customers, depot, rest_areas, menginap_locs)[5])
-        best_neighbor, move = neighborhood[0]
-        current_solution = best_neighbor
-        tabu_list.append(move)
-        if len(tabu_list) > tabu_tenure:
-            tabu_list.pop(0)
-        cost = calculate_route_metrics(best_solution, customers, depot, rest_areas, menginap_locs)[5]
-        if cost < best_cost:
+        best = allowed[int(np.argmin(scores))]
+        move = param_move(params[best])
+        move_cost = float(costs[best])
+        neighbor = apply_move(current_solution, move)[1]
+        removed, added = move_arcs(current_solution, move, path)
+        for a, b in removed:
+            tabu[a, b] = tabu[b, a] = it + tabu_tenure
+        for a, b in added:
+            frequency[a, b] += 1
+            frequency[b, a] = frequency[a, b]
+        current_solution = neighbor
+        if move_cost < best_cost:
             best_solution = current_solution[:]
-            best_cost = cost
-    return calculate_route_metrics(best_solution, customers, depot, rest_areas, menginap_locs)
+            best_cost = move_cost
+        if stats is not None:
+            stats.record_iteration(it + 1, best_cost, move_cost)
+        if progress is not None:
+            progress(it + 1, best_cost)
+        if budget.exhausted(len(params), move_cost):
+            if stats is not None:
+                stats.count(f"stopped_by_{budget.reason}")
+            break
+    return simulate_route([data["ids"][k] for k in best_solution], data["ids"][0], matrix, stats=stats)
 
-def run_cmvrp(return_assignments=False):
-    depots, customers, rest_areas, menginap_locs = load_input_data()
-    data_lokasi = json.load(open("data_lokasi.json"))
-    rest_areas = {item["name"]: (item["lat"], item["lon"]) for item in data_lokasi if item["type"] == "rest_area"}
-    menginap_locs = {item["name"]: (item["lat"], item["lon"]) for item in data_lokasi if item["type"] == "menginap"}
-    vehicle_count = load_vehicle_count()
-    assignments = allocate_customers(customers, depots, vehicle_count)
+def tabu_search_multi_route(assignments, customers, rest_areas=None, menginap_locs=None, iterations=multi_route_iterations, tabu_tenure=tabu_tenure, matrix=None,
+                            candidate_size=candidate_list_size, progress=None, stats=None,
+                            time_limit=None, max_evaluations=None, stagnation_limit=None, stop=None, shared=None):
+    # Perbaiki pembagian pelanggan antar kendaraan dengan langkah relocate/exchange lintas rute.
+    # Hasil terbaik ditulis kembali ke assignments (customers dan remaining_capacity).
+    # Langkah yang memindahkan muatan ke depot lain tidak boleh membuat muatan depot tujuan melebihi supply-nya
+    # (atau muatannya saat itu jika sejak konstruksi sudah melebihi supply); lihat depot_supply.
+    budget = SearchBudget(time_limit, max_evaluations, stagnation_limit, stop, shared)
+    depot_names = []
+    depot_list = []
+    for vehicle in assignments:
+        name, depot_data = vehicle["depot"]
+        if name not in depot_names:
+            depot_names.append(name)
+            depot_list.append(depot_data)
+    if matrix is None:
+        matrix = build_distance_matrix(dict(zip(depot_names, depot_list)), customers, rest_areas, menginap_locs)
+    assigned = [c for vehicle in assignments for c in vehicle["customers"]]
+    data = prepare_route_data(depot_list, assigned, customers, matrix)
+    candidates = build_candidate_lists(data, candidate_size)
+    demand = data["demand"]
+    d = len(depot_list)
+
+    routes = []
+    offset = d
+    for vehicle in assignments:
+        routes.append(list(range(offset, offset + len(vehicle["customers"]))))
+        offset += len(vehicle["customers"])
+    route_depot = [depot_names.index(vehicle["depot"][0]) for vehicle in assignments]
+    load = [sum(demand[c] for c in seq) for seq in routes]
+    supply = [depot_supply(depot_data) for depot_data in depot_list]
+    depot_load = [0] * d
+    for r, seq in enumerate(routes):
+        depot_load[route_depot[r]] += load[r]
+    costs = [route_cost(seq, data, depot=route_depot[r]) for r, seq in enumerate(routes)]
+    states = [route_prefix_states(seq, data, depot=route_depot[r]) for r, seq in enumerate(routes)]
+
+    def supply_ok(r1, r2, amount):
+        # amount = tambahan muatan yang berpindah dari depot r1 ke depot r2
+        d1, d2 = route_depot[r1], route_depot[r2]
+        if d1 == d2 or amount <= 0 or supply[d2] is None:
+            return True
+        return depot_load[d2] + amount <= max(supply[d2], depot_load[d2])
+
+    def cost_from(seq, start, r):
+        return evaluate_route_from(seq, start, states[r][start], data)
+
+    total = sum(costs)
+    best_total = total
+    best_routes = [seq[:] for seq in routes]
+    tabu = {}  # (pelanggan, rute) -> iterasi terakhir atribut masih tabu
+
+    for it in range(iterations):
+        if stats is not None:
+            started = time.perf_counter()
+        evaluated = 0
+        where = {}
+        for r, seq in enumerate(routes):
+            for p, node in enumerate(seq):
+                where[node] = (r, p)
+        best_move = None
+        for r1, seq1 in enumerate(routes):
+            for i, c in enumerate(seq1):
+                for b in candidates[c]:
+                    if b < d:
+                        targets = [(r2, -1) for r2 in range(len(routes)) if route_depot[r2] == b and r2 != r1]
+                    else:
+                        r2, j = where[b]
+                        if r2 == r1:
+                            continue
+                        targets = [(r2, j)]
+                    for r2, j in targets:
+                        seq2 = routes[r2]
+                        moves = []
+                        # Relocate: pindahkan c ke rute r2 tepat setelah posisi j
+                        if load[r2] + demand[c] <= vehicle_capacity and supply_ok(r1, r2, demand[c]):
+                            new1 = seq1[:i] + seq1[i + 1:]
+                            new2 = seq2[:j + 1] + [c] + seq2[j + 1:]
+                            delta = cost_from(new1, i, r1) + cost_from(new2, j + 1, r2) - costs[r1] - costs[r2]
+                            moves.append((delta, ((c, r2),), new1, new2))
+                        # Exchange: tukar c dengan pelanggan b di rute r2
+                        if j >= 0:
+                            shift = demand[c] - demand[b]
+                            if (load[r2] + shift <= vehicle_capacity and load[r1] - shift <= vehicle_capacity
+                                    and supply_ok(r1, r2, shift) and supply_ok(r2, r1, -shift)):
+                                new1 = seq1[:]
+                                new2 = seq2[:]
+                                new1[i], new2[j] = b, c
+                                delta = cost_from(new1, i, r1) + cost_from(new2, j, r2) - costs[r1] - costs[r2]
+                                moves.append((delta, ((c, r2), (b, r1)), new1, new2))
+                        evaluated += len(moves)
+                        for delta, attrs, new1, new2 in moves:
+                            is_tabu = any(tabu.get(attr, -1) >= it for attr in attrs)
+                            # Aspirasi: langkah tabu tetap boleh jika menghasilkan solusi terbaik baru
+                            if is_tabu and total + delta >= best_total:
+                                continue
+                            if best_move is None or delta < best_move[0]:
+                                best_move = (delta, attrs, r1, r2, new1, new2)
+        if stats is not None:
+            stats.add_time("multi_route_evaluation", time.perf_counter() - started)
+            stats.count("multi_route_iterations")
+            stats.count("multi_route_neighbours_evaluated", evaluated)
+        if best_move is None:
+            break
+        delta, attrs, r1, r2, new1, new2 = best_move
+        # Larang pelanggan yang dipindah kembali ke rute asalnya selama tabu_tenure iterasi
+        for node, target in attrs:
+            origin = r1 if target == r2 else r2
+            tabu[(node, origin)] = it + tabu_tenure
+        moved = sum(demand[c] for c in new2) - load[r2]
+        load[r1] -= moved
+        load[r2] += moved
+        depot_load[route_depot[r1]] -= moved
+        depot_load[route_depot[r2]] += moved
+        for r, seq in ((r1, new1), (r2, new2)):
+            routes[r] = seq
+            costs[r] = route_cost(seq, data, depot=route_depot[r])
+            states[r] = route_prefix_states(seq, data, depot=route_depot[r])
+        total = sum(costs)
+        if total < best_total:
+            best_total = total
+            best_routes = [seq[:] for seq in routes]
+        if stats is not None:
+            stats.record_iteration(it + 1, best_total, total)
+        if progress is not None:
+            progress(it + 1, best_total)
+        if budget.exhausted(evaluated, total):
+            if stats is not None:
+                stats.count(f"multi_route_stopped_by_{budget.reason}")
+            break
+
+    for vehicle, seq in zip(assignments, best_routes):
+        vehicle["customers"] = [data["names"][k] for k in seq]
+        vehicle["remaining_capacity"] = vehicle_capacity - sum(customers[c][2] for c in vehicle["customers"])
+    return assignments
+
+# Data baca-saja untuk proses worker, dikirim sekali per proses lewat initializer
+_worker_data = {}
+
+def _init_route_worker(customers, rest_areas, menginap_locs, matrix, budget=None):
+    _worker_data["customers"] = customers
+    _worker_data["rest_areas"] = rest_areas
+    _worker_data["menginap_locs"] = menginap_locs
+    _worker_data["matrix"] = matrix
+    _worker_data["budget"] = budget
+
+def _solve_vehicle(task, progress=None, stats=None, budget=None):
+    # budget: anggaran seluruh solve (default: yang dikirim ke worker lewat _init_route_worker)
+    # Tabu search deterministik (tanpa random), jadi hasil serial dan paralel sama tanpa seed per kendaraan
+    depot_data, customer_names, iterations, limits = task
+    if budget is None:
+        budget = _worker_data["budget"]
+    return tabu_search_vrp(depot_data, customer_names, _worker_data["customers"], rest_areas=_worker_data["rest_areas"],
+                           menginap_locs=_worker_data["menginap_locs"], iterations=iterations, matrix=_worker_data["matrix"],
+                           progress=progress, stats=stats, shared=budget, **limits)
+
+def _solve_vehicle_with_stats(task, stage):
+    # Versi worker untuk mode paralel: statistik dikirim balik sebagai dict lalu digabung di proses utama
+    stats = SolverStats()
+    stats.stage = stage
+    return _solve_vehicle(task, stats=stats), stats.to_dict()
+
+def _stage_progress(progress, stage):
+    if progress is None:
+        return None
+    return lambda iteration, best_cost: progress(stage, iteration, best_cost)
+
+def _wait_futures(futures, budget):
+    # Tunggu semua future sambil memeriksa stop() (hanya bisa dipanggil di proses utama); jika diminta berhenti,
+    # tanda stop bersama diset sehingga worker yang sedang berjalan mengembalikan solusi terbaiknya
+    pending = set(futures)
+    while pending:
+        _, pending = wait(pending, timeout=stop_poll_interval, return_when=FIRST_COMPLETED)
+        budget.reason()
+    return [future.result() for future in futures]
+
+def solve_routes(assignments, customers, rest_areas=None, menginap_locs=None, matrix=None, search_mode=None, workers=None,
+                 progress=None, iterations=None, stats=None, limits=None, stop=None, budget=None):
+    # progress(stage, iteration, best_cost) dipanggil tiap iterasi; pada mode paralel hanya saat kendaraan selesai.
+    # budget: SolveBudget bersama (batas waktu/evaluasi seluruh solve, default dari config.json); limits: batas per
+    # pemanggilan tabu search (default: stagnation_limit). stop() menghentikan pencarian lebih awal dengan solusi
+    # terbaik sejauh ini, juga saat worker paralel sedang berjalan.
+    config = load_config()
+    if search_mode is None:
+        search_mode = config.get("search_mode", "per_vehicle")
+    if workers is None:
+        workers = config.get("workers", 1)
+    if iterations is None:
+        iterations = config.get("tabu_iterations", tabu_iterations)
+    if limits is None:
+        limits = call_limits(config)
+    if budget is None:
+        budget = solve_budget(config, stop)
+    if matrix is None:
+        depots = {vehicle["depot"][0]: vehicle["depot"][1] for vehicle in assignments}
+        matrix = build_distance_matrix(depots, customers, rest_areas, menginap_locs, road_network_from_config(config),
+                                       config.get("matrix_storage"))
+    if search_mode == "multi_route":
+        if stats is not None:
+            stats.stage = "multi_route"
+        with timed(stats, "tabu_search_multi_route"):
+            tabu_search_multi_route(assignments, customers, rest_areas, menginap_locs, matrix=matrix,
+                                    progress=_stage_progress(progress, "multi_route"), stats=stats, shared=budget, **limits)
+
+    tasks = [(vehicle["depot"][1], vehicle["customers"], iterations, limits) for vehicle in assignments]
+    if budget.reason() == "stop":
+        # Sudah diminta berhenti: pakai urutan hasil konstruksi tanpa tabu search
+        tasks = [task[:2] + (0, limits) for task in tasks]
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), initializer=_init_route_worker,
+                                 initargs=(customers, rest_areas, menginap_locs, matrix, budget)) as pool:
+            if stats is None:
+                futures = [pool.submit(_solve_vehicle, task) for task in tasks]
+            else:
+                futures = [pool.submit(_solve_vehicle_with_stats, task, f"kendaraan {idx}")
+                           for idx, task in enumerate(tasks, start=1)]
+            results = _wait_futures(futures, budget)
+            all_routes = []
+            for idx, route_data in enumerate(results, start=1):
+                if stats is not None:
+                    route_data, worker_stats = route_data
+                    stats.merge(worker_stats)
+                if progress is not None:
+                    progress(f"kendaraan {idx}", iterations, route_data[5])
+                all_routes.append(route_data)
+            return all_routes
+    _init_route_worker(customers, rest_areas, menginap_locs, matrix)
     all_routes = []
+    for idx, task in enumerate(tasks, start=1):
+        if stats is not None:
+            stats.stage = f"kendaraan {idx}"
+        all_routes.append(_solve_vehicle(task, _stage_progress(progress, f"kendaraan {idx}"), stats, budget))
+    return all_routes
+
+def _perturb_sequence(seq, rng, strength):
+    # Acak ringan untuk titik awal baru: strength kali tukar dua posisi atau balik satu segmen
+    seq = list(seq)
+    if len(seq) < 2:
+        return seq
+    for _ in range(strength):
+        i, j = sorted(rng.sample(range(len(seq)), 2))
+        if rng.random() < 0.5:
+            seq[i], seq[j] = seq[j], seq[i]
+        else:
+            seq[i:j + 1] = seq[i:j + 1][::-1]
+    return seq
+
+def _plan_score(routes):
+    # Rencana terbaik = profit total tertinggi, lalu biaya terendah (alokasi berbeda bisa melayani pelanggan berbeda)
+    return (sum(route[6] for route in routes), -sum(route[5] for route in routes))
+
+def _run_island(task):
+    # Satu epoch untuk satu pulau: (opsional) acak titik awal, multi-route, lalu tabu search tiap kendaraan
+    vehicles, seed, perturb, multi_route, iterations, limits, bounds, collect_stats = task
+    rng = random.Random(seed)
+    stats = SolverStats() if collect_stats else None
+    customers = _worker_data["customers"]
+    # Batas epoch ini, dengan penghitung evaluasi dan tanda stop bersama seluruh solve
+    budget = _worker_data["budget"].bounded(bounds)
+    for vehicle in vehicles:
+        if perturb:
+            vehicle["customers"] = _perturb_sequence(vehicle["customers"], rng, perturb * max(1, len(vehicle["customers"]) // 10))
+    if multi_route:
+        tabu_search_multi_route(vehicles, customers, _worker_data["rest_areas"], _worker_data["menginap_locs"],
+                                matrix=_worker_data["matrix"], stats=stats, shared=budget, **limits)
+    routes = []
+    for vehicle in vehicles:
+        route = _solve_vehicle((vehicle["depot"][1], vehicle["customers"], iterations, limits), stats=stats,
+                               budget=budget)
+        # Urutan terbaik jadi titik awal epoch berikutnya; pelanggan di luar kapasitas tetap di ekor rute
+        served = [name for _, name, _ in route[1]]
+        served_set = set(served)
+        vehicle["customers"] = served + [c for c in vehicle["customers"] if c not in served_set]
+        routes.append(route)
+    return vehicles, routes, stats.to_dict() if stats else None
+
+def solve_islands(depots, customers, rest_areas, menginap_locs, vehicle_count, matrix, config, islands, progress=None,
+                  stats=None, stop=None, budget=None):
+    # Multi-start / model pulau: beberapa rencana lengkap dicari paralel dari titik awal berbeda (metode konstruksi
+    # bergiliran, lalu seed pengacakan berbeda). Dengan island_epochs > 1 iterasi dibagi per epoch dan tiap epoch
+    # mendapat bagian rata dari sisa anggaran waktu/evaluasi; di antara epoch pulau terburuk mengambil salinan
+    # rencana terbaik, dan semua pulau mulai lagi dari solusinya yang sedikit diacak. Semua pulau menghabiskan
+    # anggaran bersama yang sama (budget). stop() dicek juga selama pulau berjalan.
+    seed = config.get("seed", 0)
+    epochs = max(1, config.get("island_epochs", island_epochs))
+    migrants = min(config.get("island_migrants", island_migrants), islands - 1)
+    workers = config.get("workers") or os.cpu_count() or 1
+    iterations = -(-config.get("tabu_iterations", tabu_iterations) // epochs)
+    limits = call_limits(config)
+    if budget is None:
+        budget = solve_budget(config, stop)
+    multi_route = config.get("search_mode", "per_vehicle") == "multi_route"
+
+    method = config.get("construction", construction_method)
+    methods = [method] + [m for m in island_constructions if m != method]
+    starts = {}
+    plans = []
+    perturb = []
+    for island in range(islands):
+        m = methods[island % len(methods)]
+        if m not in starts:
+            with timed(stats, "allocate_customers"):
+                starts[m] = allocate_customers(customers, depots, vehicle_count, matrix=matrix, method=m)
+        plans.append([_copy_vehicle(vehicle) for vehicle in starts[m]])
+        # Pulau dengan metode yang sama dibedakan oleh pengacakan titik awal, makin jauh makin kuat
+        perturb.append(island // len(methods))
+
+    best = None
+    _init_route_worker(customers, rest_areas, menginap_locs, matrix, budget)
+    pool = ProcessPoolExecutor(max_workers=min(workers, islands), initializer=_init_route_worker,
+                               initargs=(customers, rest_areas, menginap_locs, matrix, budget)) if workers > 1 else None
+    try:
+        for epoch in range(epochs):
+            if best is not None and budget.reason() is not None:
+                break
+            bounds = budget.portion(1 / (epochs - epoch)).bounds()
+            tasks = [(plans[i], f"{seed}:{i}:{epoch}", perturb[i], multi_route and epoch == 0, iterations, limits, bounds,
+                      stats is not None) for i in range(islands)]
+            if pool is not None:
+                results = _wait_futures([pool.submit(_run_island, task) for task in tasks], budget)
+            else:
+                results = list(map(_run_island, tasks))
+            scores = []
+            for island, (vehicles, routes, island_stats) in enumerate(results):
+                plans[island] = vehicles
+                scores.append(_plan_score(routes))
+                if stats is not None:
+                    stats.merge(island_stats)
+                if best is None or scores[-1] > best[0]:
+                    best = (scores[-1], [_copy_vehicle(vehicle) for vehicle in vehicles], routes)
+            if stats is not None:
+                stats.count("island_epochs")
+            if progress is not None:
+                progress("pulau", epoch + 1, sum(route[5] for route in best[2]))
+            if epoch == epochs - 1:
+                break
+            # Pertukaran: pulau terburuk diganti salinan rencana elit, semua pulau diacak ringan di epoch berikutnya
+            ranking = sorted(range(islands), key=lambda i: scores[i])
+            for island in ranking[:migrants]:
+                plans[island] = [_copy_vehicle(vehicle) for vehicle in best[1]]
+                if stats is not None:
+                    stats.count("island_migrations")
+            perturb = [1] * islands
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    _, assignments, routes = best
     for vehicle in assignments:
-        depot_name, depot_data = vehicle["depot"]
-        route_data = tabu_search_vrp(depot_data, vehicle["customers"], customers, rest_areas=rest_areas, menginap_locs=menginap_locs)
-        all_routes.append(route_data)
-    generate_leaflet_html(all_routes, rest_areas, menginap_locs)
+        vehicle["remaining_capacity"] = vehicle_capacity - sum(customers[c][2] for c in vehicle["customers"])
+    return assignments, routes
+
+def solver_parameters(config=None):
+    # Semua nilai yang memengaruhi hasil solve, dipakai sebagai bagian kunci cache
+    if config is None:
+        config = load_config()
+    params = {
+        "vehicle_capacity": vehicle_capacity, "speed": speed, "fuel_price": fuel_price,
+        "fuel_consumption": fuel_consumption, "cost_per_km": cost_per_km,
+        "overnight_stay_cost": overnight_stay_cost, "rest_cost": rest_cost,
+        "max_daily_hours": max_daily_hours, "max_work_hours": max_work_hours,
+        "rest_time": rest_time, "nginap_time": nginap_time,
+        "service_time_per_demand": service_time_per_demand,
+        "tabu_iterations": config.get("tabu_iterations", tabu_iterations), "tabu_tenure": tabu_tenure,
+        "neighbourhood_operators": neighbourhood_operators, "candidate_list_size": candidate_list_size,
+        "oropt_segment_lengths": oropt_segment_lengths, "multi_route_iterations": multi_route_iterations,
+        "diversification_weight": diversification_weight, "tabu_memory": "arc",
+        "search_mode": config.get("search_mode", "per_vehicle"), "seed": config.get("seed", 0),
+        "construction": config.get("construction", construction_method),
+        "route_format": "compact",
+        **search_limits(config),
+        "distance_provider": config.get("distance_provider", "haversine"),
+        "matrix_storage": config.get("matrix_storage", "auto"),
+        "islands": config.get("islands", 1), "island_epochs": config.get("island_epochs", island_epochs),
+        "island_migrants": config.get("island_migrants", island_migrants),
+    }
+    road = road_network_from_config(config)
+    if road is not None:
+        params["road_network"] = road.fingerprint
+    return params
+
+def solve_instance(depots, customers, rest_areas, menginap_locs, vehicle_count, config=None, progress=None, matrix=None, stats=None,
+                   stop=None):
+    # Alokasi + tabu search untuk data di memori, tanpa baca/tulis file. Batas waktu/evaluasi berlaku untuk seluruh
+    # solve, termasuk pembuatan matriks dan alokasi
+    if config is None:
+        config = load_config()
+    budget = solve_budget(config, stop)
+    if matrix is None:
+        with timed(stats, "build_distance_matrix"):
+            matrix = build_distance_matrix(depots, customers, rest_areas, menginap_locs, road_network_from_config(config),
+                                           config.get("matrix_storage"))
+    islands = config.get("islands", 1)
+    if islands > 1:
+        with timed(stats, "solve_islands"):
+            return solve_islands(depots, customers, rest_areas, menginap_locs, vehicle_count, matrix, config, islands,
+                                 progress=progress, stats=stats, stop=stop, budget=budget)
+    with timed(stats, "allocate_customers"):
+        assignments = allocate_customers(customers, depots, vehicle_count, matrix=matrix,
+                                         method=config.get("construction", construction_method))
+    with timed(stats, "solve_routes"):
+        all_routes = solve_routes(assignments, customers, rest_areas, menginap_locs, matrix=matrix,
+                                  search_mode=config.get("search_mode", "per_vehicle"), workers=config.get("workers", 1),
+                                  progress=progress, iterations=config.get("tabu_iterations", tabu_iterations), stats=stats,
+                                  limits=call_limits(config), stop=stop, budget=budget)
+    return assignments, all_routes
+
+def _copy_vehicle(vehicle):
+    # Salinan agar solusi di cache tidak ikut berubah
+    vehicle = dict(vehicle)
+    vehicle["customers"] = list(vehicle["customers"])
+    vehicle["route"] = list(vehicle.get("route", []))
+    return vehicle
+
+def cheapest_insertion(seqs, route_depot, pending, data):
+    # Sisipkan pelanggan pending (indeks lokal data) satu per satu ke posisi termurah di rute yang masih muat.
+    # Kelayakan sama dengan konstruksi pada solve penuh (allocate_customers): hanya kapasitas kendaraan, sehingga
+    # solve inkremental melayani pelanggan yang juga dilayani solve penuh. seqs diubah langsung; hasil = indeks
+    # rute yang berubah.
+    demand = data["demand"]
+    load = [sum(demand[k] for k in seq) for seq in seqs]
+    changed = set()
+    for x in pending:
+        best = None
+        for r, seq in enumerate(seqs):
+            d = route_depot[r]
+            if load[r] + demand[x] > vehicle_capacity:
+                continue
+            states = route_prefix_states(seq, data, depot=d)
+            base = route_cost(seq, data, depot=d)
+            for p in range(min(len(seq), len(states) - 1) + 1):
+                delta = evaluate_route_from(seq[:p] + [x] + seq[p:], p, states[p], data) - base
+                if best is None or delta < best[0]:
+                    best = (delta, r, p)
+        if best is None:
+            continue  # tidak ada kendaraan yang muat, sama seperti alokasi penuh
+        _, r, p = best
+        seqs[r].insert(p, x)
+        load[r] += demand[x]
+        changed.add(r)
+    return changed
+
+def reoptimise_instance(previous, depots, customers, rest_areas, menginap_locs, vehicle_count, config=None, matrix=None, stats=None,
+                        stop=None):
+    # Perbarui solusi sebelumnya setelah pelanggan ditambah/dihapus: hapus/sisipkan hanya pelanggan yang berubah
+    # (cheapest insertion), lalu tabu search singkat pada rute yang terdampak. None jika harus solve penuh.
+    if config is None:
+        config = load_config()
+    instance = previous.get("instance")
+    if instance is None:
+        return None
+    # Lokasi rest area / penginapan tidak memengaruhi biaya urutan (hanya titik singgah yang dicatat), dan semua rute
+    # disimulasi ulang dengan matriks baru, jadi perubahannya tidak memerlukan solve penuh
+    if (instance["depots"] != depots or instance["vehicle_count"] != vehicle_count
+            or instance["parameters"] != solver_parameters(config)):
+        return None
+    old_customers = instance["customers"]
+    removed = {c for c in old_customers if old_customers[c] != customers.get(c)}
+    added = [c for c in customers if old_customers.get(c) != customers[c]]
+    if len(removed) + len(added) > config.get("incremental_max_changes", incremental_max_changes):
+        return None
+    if matrix is None:
+        with timed(stats, "build_distance_matrix"):
+            matrix = build_distance_matrix(depots, customers, rest_areas, menginap_locs, road_network_from_config(config),
+                                           config.get("matrix_storage"))
+
+    # Urutan kunjungan sebelumnya diambil dari rute hasil tabu search, bukan urutan alokasi
+    orders = []
+    affected = []
+    for vehicle, route in zip(previous["assignments"], previous["routes"]):
+        order = [name for _, name, _ in route[1]]
+        visited = set(order)
+        order += [c for c in vehicle["customers"] if c not in visited]
+        affected.append(any(c in removed for c in order))
+        orders.append([c for c in order if c not in removed])
+    assigned = [c for order in orders for c in order]
+    # Pelanggan baru plus pelanggan lama yang belum terlayani (mungkin muat setelah ada yang dihapus)
+    assigned_set = set(assigned)
+    pending = [c for c in customers if c not in assigned_set]
+
+    depot_names = list(depots)
+    depot_list = [depots[name] for name in depot_names]
+    vehicles = [_copy_vehicle(vehicle) for vehicle in previous["assignments"]]
+    route_depot = [depot_names.index(vehicle["depot"][0]) for vehicle in vehicles]
+    data = prepare_route_data(depot_list, assigned + pending, customers, matrix)
+    local = {name: k for k, name in enumerate(data["names"]) if name is not None}
+    seqs = [[local[c] for c in order] for order in orders]
+    with timed(stats, "cheapest_insertion"):
+        for r in cheapest_insertion(seqs, route_depot, [local[c] for c in pending], data):
+            affected[r] = True
+
+    iterations = config.get("incremental_iterations", incremental_iterations)
+    budget = solve_budget(config, stop)
+    all_routes = [None] * len(vehicles)
+    unchanged = {}
+    for idx, (vehicle, seq) in enumerate(zip(vehicles, seqs)):
+        vehicle["customers"] = [data["names"][k] for k in seq]
+        vehicle["remaining_capacity"] = vehicle_capacity - sum(customers[c][2] for c in vehicle["customers"])
+        if affected[idx]:
+            if stats is not None:
+                stats.stage = f"kendaraan {idx + 1}"
+            all_routes[idx] = tabu_search_vrp(vehicle["depot"][1], vehicle["customers"], customers, rest_areas, menginap_locs,
+                                              iterations=iterations, matrix=matrix, stats=stats, shared=budget,
+                                              **call_limits(config))
+        else:
+            unchanged.setdefault(vehicle["depot"][0], []).append(idx)
+    # Rute tidak berubah: cukup simulasi ulang (sekaligus per depot) karena ID titik pada instance baru bisa bergeser
+    for idxs in unchanged.values():
+        routes = calculate_route_metrics_batch([vehicles[idx]["customers"] for idx in idxs], customers,
+                                               vehicles[idxs[0]]["depot"][1], matrix=matrix, stats=stats)
+        for idx, route in zip(idxs, routes):
+            all_routes[idx] = route
+    if stats is not None:
+        stats.count("incremental_removed", len(removed))
+        stats.count("incremental_inserted", len(pending))
+        stats.count("incremental_routes_reoptimised", sum(affected))
+    return vehicles, all_routes
+
+def solve_cmvrp(use_cache=True, progress=None, collect_stats=None, stop=None, incremental=None):
+    # Solve sekali untuk data lokasi + konfigurasi saat ini; hasil yang sama dipakai ulang dari cache.
+    # collect_stats (default: "instrumentation" di config.json) menyertakan statistik solver di hasil["stats"].
+    # stop() menghentikan pencarian lebih awal; solusi yang dihentikan tidak disimpan ke cache.
+    # incremental (default: "incremental" di config.json) memperbarui solusi terakhir jika hanya sedikit pelanggan berubah.
+    depots, customers, rest_areas, menginap_locs = load_input_data()
+    config = load_config()
+    if collect_stats is None:
+        collect_stats = config.get("instrumentation", False)
+    if incremental is None:
+        incremental = config.get("incremental", False)
+    vehicle_count = config.get("vehicle_count", 1)
+    key = solution_key(depots, customers, rest_areas, menginap_locs, vehicle_count, solver_parameters(config))
+    solution = get_solution(key) if use_cache else None
+    # Solusi cache tanpa statistik di-solve ulang jika statistik diminta (hasil rute tetap sama)
+    if solution is None or (collect_stats and solution.get("stats") is None):
+        stats = SolverStats() if collect_stats else None
+        result = None
+        previous = get_latest_solution() if use_cache and incremental else None
+        if previous is not None:
+            with timed(stats, "reoptimise_instance"):
+                result = reoptimise_instance(previous, depots, customers, rest_areas, menginap_locs, vehicle_count, config, stats=stats,
+                                             stop=stop)
+        reoptimised = result is not None
+        if result is None:
+            result = solve_instance(depots, customers, rest_areas, menginap_locs, vehicle_count, config,
+                                    progress=progress, stats=stats, stop=stop)
+        assignments, all_routes = result
+        solution = {
+            "assignments": assignments, "routes": all_routes, "stats": stats.to_dict() if stats else None,
+            "incremental": reoptimised,
+            # Data masukan disimpan agar solve berikutnya bisa mencari pelanggan yang berubah
+            "instance": {
+                "depots": depots, "customers": customers, "rest_areas": rest_areas, "menginap_locs": menginap_locs,
+                "vehicle_count": vehicle_count, "parameters": solver_parameters(config),
+            },
+        }
+        if use_cache and not (stop is not None and stop()):
+            put_solution(key, solution)
+            set_latest_solution(key)
+    return {
+        "depots": depots, "customers": customers,
+        "rest_areas": rest_areas, "menginap_locs": menginap_locs,
+        "assignments": solution["assignments"], "routes": solution["routes"],
+        "stats": solution.get("stats"), "incremental": solution.get("incremental", False),
+    }
+
+def run_cmvrp(return_assignments=False):
+    result = solve_cmvrp()
+    rest_areas, menginap_locs = result["rest_areas"], result["menginap_locs"]
+    assignments, all_routes = result["assignments"], result["routes"]
+    generate_leaflet_html(all_routes, rest_areas, menginap_locs, assignments=assignments)
     if return_assignments:
         for idx, route in enumerate(all_routes):
             assigned_customers = route[1]
@@ -276,92 +1588,64 @@ def run_cmvrp(return_assignments=False):
         return assignments
     return "vrp_tabu_search_visualisasi.html"
 
-def generate_leaflet_html(routes, rest_areas=None, menginap_locs=None):
-    scripts = []
-    if rest_areas is None:
-        rest_areas = {}
-    if menginap_locs is None:
-        menginap_locs = {}
-
-    # Baca template HTML
-    with open("visual_template.html", "r") as f:
-        template = f.read()
+route_colors = ["red", "blue", "green", "orange", "purple", "brown", "magenta", "cyan", "black"]
+stop_kinds = {STOP_DEPOT: "depot", STOP_CUSTOMER: "customer", STOP_REST: "rest", STOP_NGINAP: "nginap"}
 
-    colors = ["red", "blue", "green", "orange", "purple", "brown", "magenta", "cyan", "black"]
-
-    # Iterasi semua rute kendaraan
+def routes_geojson(routes, assignments=None, rest_areas=None, menginap_locs=None, include_stops=True, precision=6):
+    # FeatureCollection ringkas: satu LineString per kendaraan (urutan singgahan) dan satu Point per singgahan.
+    # Koordinat GeoJSON berurutan [lon, lat], dibulatkan ke `precision` desimal; warna hanya ada di LineString.
+    rest_names = {tuple(v[:2]): k for k, v in reversed(list((rest_areas or {}).items()))}
+    nginap_names = {tuple(v[:2]): k for k, v in reversed(list((menginap_locs or {}).items()))}
+    features = []
     for idx, route_tuple in enumerate(routes):
-        color = colors[idx % len(colors)]
-        route_coords = route_tuple[0]
-        route_waypoints = []
-        if not route_coords:
+        route_stops = route_tuple[0]
+        if not len(route_stops):
             continue
-
-        for pt in route_coords:
-            if (
-                isinstance(pt, tuple) and
-                len(pt) == 2 and
-                isinstance(pt[0], str) and
-                isinstance(pt[1], tuple) and
-                len(pt[1]) == 2 and
-                all(isinstance(c, (int, float)) for c in pt[1])
-            ):
-                label, coord = pt
-                lat, lon = float(coord[0]), float(coord[1])
-
-                if label == "rest":
-                    popup_text = "Rest Area Manual" if (lat, lon) in rest_areas.values() else "Virtual Rest Area"
-                    scripts.append(
-                        f"""L.marker([{lat}, {lon}], {{
-                            icon: L.icon({{
-                                iconUrl: '/static/rest_area.png',
-                                iconSize: [25, 41],
-                                iconAnchor: [12, 41]
-                            }})
-                        }}).addTo(map).bindPopup('{popup_text}');"""
-                    )
-                elif label == "nginap":
-                    popup_text = "Lokasi Menginap Manual" if (lat, lon) in menginap_locs.values() else "Virtual Tempat Menginap"
-                    scripts.append(
-                        f"""L.marker([{lat}, {lon}], {{
-                            icon: L.icon({{
-                                iconUrl: '/static/menginap.png',
-                                iconSize: [25, 41],
-                                iconAnchor: [12, 41]
-                            }})
-                        }}).addTo(map).bindPopup('{popup_text}');"""
-                    )
+        vehicle = idx + 1
+        color = route_colors[idx % len(route_colors)]
+        depot_name = assignments[idx]["depot"][0] if assignments else None
+        line = []
+        assigned_iter = iter(route_tuple[1])
+        for seq, (event, node, (lat, lon)) in enumerate(route_stops, start=1):
+            point = [round(lon, precision), round(lat, precision)]
+            line.append(point)
+            if not include_stops:
+                continue
+            props = {"vehicle": vehicle, "seq": seq, "kind": stop_kinds[event], "manual": node >= 0}
+            if event == STOP_CUSTOMER:
+                _, props["name"], service_time = next(assigned_iter)
+                props["service_time"] = round(service_time, 2)
+            elif event == STOP_DEPOT:
+                props["name"] = depot_name
+            elif event == STOP_REST:
+                # ID titik -1 berarti lokasi virtual
+                props["name"] = rest_names.get((lat, lon)) if node >= 0 else None
             else:
-                route_waypoints.append(pt)
-
-        # Buat waypoint untuk L.Routing
-        waypoints = ',\n'.join([
-            f"L.latLng({float(pt[0])}, {float(pt[1])})"
-            for pt in route_waypoints
-            if isinstance(pt, (tuple, list)) and len(pt) == 2 and all(isinstance(x, (int, float)) for x in pt)
-        ])
-        script = f"""
-        L.Routing.control({{
-            waypoints: [
-                {waypoints}
-            ],
-            lineOptions: {{
-                styles: [{{ color: '{color}', weight: 5 }}]
-            }},
-            routeWhileDragging: false,
-            createMarker: function(i, wp) {{
-                return L.marker(wp.latLng);
-            }}
-        }}).addTo(map);
-        """
-        scripts.append(script)
-
-    # Ganti placeholder dengan script rute dan marker
-    final_html = template.replace("[[ROUTES_HERE]]", "\n".join(scripts))
-
-    # Simpan file hasil visualisasi
-    with open("vrp_tabu_search_visualisasi.html", "w") as f:
-        f.write(final_html)
+                props["name"] = nginap_names.get((lat, lon)) if node >= 0 else None
+            features.append({"type": "Feature", "geometry": {"type": "Point", "coordinates": point}, "properties": props})
+        features.append({
+            "type": "Feature",
+            "geometry": {"type": "LineString", "coordinates": line},
+            "properties": {
+                "vehicle": vehicle, "color": color, "depot": depot_name,
+                "distance": route_tuple[3], "cost": route_tuple[5], "profit": route_tuple[6],
+                "customers": len(route_tuple[1]), "overnight": route_tuple[2],
+            },
+        })
+    return {"type": "FeatureCollection", "features": features}
 
-        
+def render_map_html(geojson=None, job_url=None):
+    # Halaman peta: data disisipkan langsung (file mandiri), atau browser mengirim job solve ke job_url lalu
+    # menunggu sampai selesai dan mengambil GeoJSON hasilnya
+    with open("visual_template.html", "r") as f:
+        template = f.read()
+    # "</" di-escape agar nama lokasi tidak bisa menutup tag <script>
+    data = json.dumps(geojson, separators=(",", ":")).replace("</", "<\\/") if geojson is not None else "null"
+    return template.replace("[[GEOJSON_HERE]]", data).replace("[[JOB_URL]]", json.dumps(job_url))
 
+def generate_leaflet_html(routes, rest_areas=None, menginap_locs=None, output_path="vrp_tabu_search_visualisasi.html",
+                          assignments=None):
+    # Tulis peta mandiri berisi GeoJSON rute; digambar di browser dalam satu layer tanpa layanan routing online
+    final_html = render_map_html(routes_geojson(routes, assignments, rest_areas, menginap_locs))
+    with open(output_path, "w") as f:
+        f.write(final_html)
@@ -0,0 +1,274 @@
+import argparse
+import json
+import sys
+import time
+
+import cmvrp_tabu_search as cmvrp
+from batch_solve import load_instance
+from bulk_io import export_lines
+from road_network import road_network_from_config
+from search_budget import call_limits, solve_budget
+from solver_stats import timed
+
+# Sweep ukuran armada: beberapa jumlah kendaraan (atau pembagian kendaraan per depot) dievaluasi dalam satu job.
+# Hanya ukuran terkecil yang di-solve penuh; ukuran berikutnya mulai dari solusi ukuran sebelumnya (warm start):
+# kendaraan baru mengambil pelanggan yang belum terlayani (cheapest insertion) atau separuh rute terpanjang, lalu
+# tabu search singkat hanya pada rute yang berubah. Matriks jarak dibangun sekali untuk seluruh sweep.
+sweep_iterations = 100  # iterasi tabu untuk rute yang berubah saat armada ditambah/dikurangi
+vehicle_fixed_cost = 0  # biaya tetap per kendaraan (sewa, sopir); hanya dipakai untuk net_profit di kurva
+curve_fields = ("vehicles", "split", "used_vehicles", "customers", "served", "distance", "revenue", "cost", "profit",
+                "net_profit", "marginal_profit", "overnight_stays", "warm_start", "elapsed_s")
+
+def _unserved(ctx, seqs):
+    served = {k for seq in seqs for k in seq}
+    return [k for k in range(len(ctx["depot_list"]), len(ctx["data"]["names"])) if k not in served]
+
+def _nearest_chain(dist, start, pending):
+    # Urutan sisip nearest neighbour dari depot kendaraan baru (seperti konstruksi "nearest"), agar kapasitasnya
+    # terisi pelanggan yang searah, bukan pelanggan dekat depot yang tersebar ke segala arah
+    order = []
+    left = set(pending)
+    last = start
+    while left:
+        last = min(left, key=lambda k: (dist[last][k], k))
+        order.append(last)
+        left.remove(last)
+    return order
+
+def _route_depots(ctx, vehicles):
+    return [ctx["depot_index"][vehicle["depot"][0]] for vehicle in vehicles]
+
+def _search(ctx, vehicles, seqs, routes, changed):
+    # Tabu search hanya untuk rute yang berubah; rute lain dipakai apa adanya dari ukuran armada sebelumnya
+    names = ctx["data"]["names"]
+    customers = ctx["customers"]
+    for r in changed:
+        vehicles[r]["customers"] = [names[k] for k in seqs[r]]
+    if ctx["multi_route"] and len(changed) > 1:
+        cmvrp.tabu_search_multi_route([vehicles[r] for r in changed], customers, ctx["rest_areas"], ctx["menginap_locs"],
+                                      matrix=ctx["matrix"], stats=ctx["stats"], shared=ctx["budget"],
+                                      **ctx["limits"])
+    for r in sorted(changed):
+        vehicle = vehicles[r]
+        route = cmvrp.tabu_search_vrp(vehicle["depot"][1], vehicle["customers"], customers, ctx["rest_areas"],
+                                      ctx["menginap_locs"], iterations=ctx["iterations"], matrix=ctx["matrix"],
+                                      stats=ctx["stats"], shared=ctx["budget"], **ctx["limits"])
+        routes[r] = route
+        vehicle["customers"] = [name for _, name, _ in route[1]]
+        vehicle["remaining_capacity"] = cmvrp.vehicle_capacity - sum(customers[c][2] for c in vehicle["customers"])
+        seqs[r] = [ctx["local"][name] for name in vehicle["customers"]]
+
+def _add_vehicle(ctx, plan, candidates):
+    # Coba kendaraan baru di tiap depot kandidat, ambil rencana dengan profit tertinggi.
+    # Jika semua pelanggan sudah terlayani, kendaraan baru mengambil separuh akhir rute terlama; rencana lama dengan
+    # kendaraan baru menganggur ikut dibandingkan karena membelah rute belum tentu lebih murah.
+    vehicles, seqs, routes = plan
+    pending = _unserved(ctx, seqs)
+    longest = max((r for r in range(len(seqs)) if len(seqs[r]) > 1), key=lambda r: routes[r][10], default=None)
+    options = [(depot_name, True) for depot_name in candidates]
+    if not pending:
+        options = [(candidates[0], False)] + (options if longest is not None else [])
+    best = None
+    for depot_name, fill in options:
+        new_vehicles = [cmvrp._copy_vehicle(vehicle) for vehicle in vehicles]
+        new_vehicles.append(cmvrp._new_vehicle((depot_name, ctx["depots"][depot_name])))
+        new_seqs = [list(seq) for seq in seqs] + [[]]
+        new_routes = list(routes) + [None]
+        changed = {len(new_seqs) - 1}
+        if fill and pending:
+            order = _nearest_chain(ctx["data"]["dist"], ctx["depot_index"][depot_name], pending)
+            changed |= cmvrp.cheapest_insertion(new_seqs, _route_depots(ctx, new_vehicles), order, ctx["data"])
+        elif fill:
+            half = len(new_seqs[longest]) // 2
+            new_seqs[-1] = new_seqs[longest][half:]
+            new_seqs[longest] = new_seqs[longest][:half]
+            changed.add(longest)
+        _search(ctx, new_vehicles, new_seqs, new_routes, changed)
+        score = cmvrp._plan_score(new_routes)
+        if best is None or score > best[0]:
+            best = (score, (new_vehicles, new_seqs, new_routes))
+    return best[1]
+
+def _remove_vehicle(ctx, plan, depot_name):
+    # Kendaraan dengan profit terendah di depot itu dilepas; pelanggannya disisipkan ke kendaraan lain
+    vehicles, seqs, routes = plan
+    r = min((r for r, vehicle in enumerate(vehicles) if vehicle["depot"][0] == depot_name), key=lambda r: routes[r][6])
+    vehicles = [cmvrp._copy_vehicle(vehicle) for k, vehicle in enumerate(vehicles) if k != r]
+    seqs = [list(seq) for k, seq in enumerate(seqs) if k != r]
+    routes = [route for k, route in enumerate(routes) if k != r]
+    changed = cmvrp.cheapest_insertion(seqs, _route_depots(ctx, vehicles), _unserved(ctx, seqs), ctx["data"])
+    _search(ctx, vehicles, seqs, routes, changed)
+    return vehicles, seqs, routes
+
+def _split(plan):
+    split = {}
+    for vehicle in plan[0]:
+        split[vehicle["depot"][0]] = split.get(vehicle["depot"][0], 0) + 1
+    return split
+
+def _reach_split(ctx, plan, target):
+    # Kurangi dulu depot yang kelebihan, baru tambah depot yang kekurangan
+    for depot_name in ctx["depot_names"]:
+        for _ in range(_split(plan).get(depot_name, 0) - target.get(depot_name, 0)):
+            plan = _remove_vehicle(ctx, plan, depot_name)
+    for depot_name in ctx["depot_names"]:
+        for _ in range(target.get(depot_name, 0) - _split(plan).get(depot_name, 0)):
+            plan = _add_vehicle(ctx, plan, [depot_name])
+    return plan
+
+def _cold_plan(ctx, vehicle_count):
+    assignments, routes = cmvrp.solve_instance(ctx["depots"], ctx["customers"], ctx["rest_areas"], ctx["menginap_locs"],
+                                               vehicle_count, ctx["config"], matrix=ctx["matrix"], stats=ctx["stats"],
+                                               stop=ctx["stop"])
+    seqs = [[ctx["local"][name] for _, name, _ in route[1]] for route in routes]
+    return assignments, seqs, routes
+
+def _point(ctx, plan, started, previous, warm_start):
+    vehicles, _, routes = plan
+    profit = round(sum(route[6] for route in routes), 2)
+    point = {
+        "vehicles": len(vehicles), "split": {name: _split(plan).get(name, 0) for name in ctx["depot_names"]},
+        "used_vehicles": sum(1 for route in routes if route[1]), "customers": len(ctx["customers"]),
+        "served": sum(len(route[1]) for route in routes), "distance": round(sum(route[3] for route in routes), 2),
+        "revenue": round(sum(route[4] for route in routes), 2), "cost": round(sum(route[5] for route in routes), 2),
+        "profit": profit, "net_profit": round(profit - len(vehicles) * ctx["fixed_cost"], 2),
+        "marginal_profit": None, "overnight_stays": sum(route[2] for route in routes), "warm_start": warm_start,
+        "elapsed_s": round(time.perf_counter() - started, 4),
+    }
+    # Tambahan net_profit per kendaraan dibanding titik sebelumnya
+    if previous is not None and point["vehicles"] != previous["vehicles"]:
+        point["marginal_profit"] = round((point["net_profit"] - previous["net_profit"]) /
+                                         (point["vehicles"] - previous["vehicles"]), 2)
+    return point
+
+def sweep_fleet(depots, customers, rest_areas, menginap_locs, counts=None, splits=None, config=None, matrix=None,
+                progress=None, stats=None, stop=None):
+    # Generator (titik kurva, assignments, routes) dengan jumlah kendaraan naik.
+    # counts: jumlah kendaraan (ukuran di antaranya tetap dilalui sebagai langkah warm start);
+    # splits: list {nama depot: jumlah kendaraan} untuk pembagian per depot yang eksplisit (mengganti counts).
+    # Batas waktu/evaluasi config berlaku per ukuran armada; stop() juga menghentikan langkah yang sedang berjalan.
+    if config is None:
+        config = cmvrp.load_config()
+    if splits is not None:
+        for split in splits:
+            unknown = [name for name in split if name not in depots]
+            if unknown:
+                raise ValueError(f"Depot tidak dikenal: {', '.join(unknown)}")
+            if sum(split.values()) < 1 or min(split.values()) < 0:
+                raise ValueError("Jumlah kendaraan per depot harus >= 0 dan totalnya >= 1")
+        targets = sorted(splits, key=lambda split: sum(split.values()))
+    else:
+        counts = sorted(set(counts or [config.get("vehicle_count", 1)]))
+        if counts[0] < 1:
+            raise ValueError("Jumlah kendaraan harus >= 1")
+        targets = counts
+    if matrix is None:
+        with timed(stats, "build_distance_matrix"):
+            matrix = cmvrp.build_distance_matrix(depots, customers, rest_areas, menginap_locs,
+                                                 road_network_from_config(config), config.get("matrix_storage"))
+    depot_names = list(depots)
+    depot_list = [depots[name] for name in depot_names]
+    data = cmvrp.prepare_route_data(depot_list, list(customers), customers, matrix)
+    ctx = {
+        "depots": depots, "depot_names": depot_names, "depot_list": depot_list,
+        "depot_index": {name: d for d, name in enumerate(depot_names)},
+        "customers": customers, "rest_areas": rest_areas, "menginap_locs": menginap_locs, "matrix": matrix,
+        "data": data, "local": {name: k for k, name in enumerate(data["names"]) if name is not None},
+        "config": config, "limits": call_limits(config), "stop": stop, "budget": None, "stats": stats,
+        "iterations": config.get("sweep_iterations", sweep_iterations),
+        "multi_route": config.get("search_mode", "per_vehicle") == "multi_route",
+        "fixed_cost": config.get("vehicle_fixed_cost", vehicle_fixed_cost),
+    }
+
+    plan = None
+    previous = None
+    for index, target in enumerate(targets, start=1):
+        if stop is not None and stop():
+            return
+        started = time.perf_counter()
+        ctx["budget"] = solve_budget(config, stop)
+        size = sum(target.values()) if splits is not None else target
+        stage = f"armada {size}"
+        if stats is not None:
+            stats.stage = stage
+        warm_start = plan is not None
+        with timed(stats, "sweep_step"):
+            if plan is None:
+                plan = _cold_plan(ctx, size)
+            elif splits is None:
+                while len(plan[0]) < size:
+                    plan = _add_vehicle(ctx, plan, depot_names)
+            if splits is not None:
+                plan = _reach_split(ctx, plan, target)
+        previous = _point(ctx, plan, started, previous, warm_start)
+        if progress is not None:
+            progress(stage, index, previous["cost"])
+        yield previous, [cmvrp._copy_vehicle(vehicle) for vehicle in plan[0]], list(plan[2])
+
+def best_point(points):
+    # Net profit tertinggi; jika sama, armada terkecil
+    return max(points, key=lambda point: (point["net_profit"], -point["vehicles"]), default=None)
+
+def parse_counts(text):
+    # "2-6" atau "2,3,5"
+    counts = []
+    for part in text.split(","):
+        low, _, high = part.partition("-")
+        counts.extend(range(int(low), int(high or low) + 1))
+    return counts
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Kurva profit/biaya CMVRP untuk beberapa ukuran armada dalam satu job")
+    parser.add_argument("instance", nargs="?", help="file lokasi (.json, .db, .csv, ...); default: data lokasi aplikasi")
+    parser.add_argument("--counts", help="jumlah kendaraan, mis. 1-6 atau 2,4,6 (default: vehicle_count di config)")
+    parser.add_argument("--splits", help='file JSON berisi list pembagian per depot, mis. [{"Depot A": 2, "Depot B": 1}]')
+    parser.add_argument("--config", default="config.json", help="config solve")
+    parser.add_argument("--output", default="-", help="file kurva (default: stdout)")
+    parser.add_argument("--format", choices=("jsonl", "csv"), help="default: dari ekstensi file output")
+    args = parser.parse_args(argv)
+
+    config = {}
+    try:
+        with open(args.config, "r") as f:
+            config = json.load(f)
+    except FileNotFoundError:
+        pass
+    splits = None
+    if args.splits:
+        with open(args.splits, "r") as f:
+            splits = json.load(f)
+    try:
+        counts = parse_counts(args.counts) if args.counts else None
+    except ValueError:
+        parser.error(f"--counts tidak valid: {args.counts}")
+    if args.instance:
+        depots, customers, rest_areas, menginap_locs = load_instance(args.instance)
+    else:
+        depots, customers, rest_areas, menginap_locs = cmvrp.load_input_data()
+    fmt = args.format or ("csv" if args.output.lower().endswith(".csv") else "jsonl")
+
+    points = []
+
+    def curve():
+        for point, _, _ in sweep_fleet(depots, customers, rest_areas, menginap_locs, counts, splits, config):
+            print(f"{point['vehicles']} kendaraan {point['split']}: profit {point['profit']}, "
+                  f"biaya {point['cost']}, {point['elapsed_s']} s", file=sys.stderr)
+            points.append(point)
+            yield dict(point, split=json.dumps(point["split"])) if fmt == "csv" else point
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", newline="")
+    try:
+        for chunk in export_lines(curve(), curve_fields, fmt):
+            out.write(chunk)
+            out.flush()
+    except ValueError as e:
+        parser.error(str(e))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    best = best_point(points)
+    if best is not None:
+        print(f"Terbaik: {best['vehicles']} kendaraan {best['split']}, net profit {best['net_profit']}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+import argparse
+import json
+import os
+import sqlite3
+
+# Penyimpanan lokasi di SQLite. Tiap baris menyimpan item asli (JSON) agar ekspor sama persis dengan
+# format data_lokasi.json, ditambah kolom terindeks untuk query per jenis dan bounding box.
+db_path = "data_lokasi.db"
+json_path = "data_lokasi.json"
+
+_schema = """
+CREATE TABLE IF NOT EXISTS lokasi (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    type TEXT NOT NULL,
+    lat REAL NOT NULL,
+    lon REAL NOT NULL,
+    item TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_lokasi_type ON lokasi (type);
+CREATE INDEX IF NOT EXISTS idx_lokasi_lat_lon ON lokasi (lat, lon);
+"""
+
+_writes = 0  # penulisan lewat proses ini, bagian dari location_version
+
+def connect(path=None):
+    # Database baru otomatis diisi dari data_lokasi.json (jika ada) agar data lama tetap terpakai
+    path = path or db_path
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    if not conn.execute("PRAGMA user_version").fetchone()[0]:
+        _initialise(conn, seed=path == db_path)
+    return conn
+
+def _initialise(conn, seed):
+    # Skema dan pengisian awal sekali per database, dalam satu transaksi tulis (BEGIN IMMEDIATE menunggu lock,
+    # pernyataan DDL terpisah di mode WAL bisa langsung gagal "database is locked"). Permintaan pertama yang
+    # bersamaan menunggu lalu melihat penanda user_version sehingga data tidak terisi dua kali. Tabel yang sudah
+    # berisi (database lama) tidak diisi.
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if not conn.execute("PRAGMA user_version").fetchone()[0]:
+            for statement in _schema.split(";"):
+                if statement.strip():
+                    conn.execute(statement)
+            if seed and not conn.execute("SELECT COUNT(*) FROM lokasi").fetchone()[0] and os.path.exists(json_path):
+                with open(json_path, "r") as f:
+                    _insert(conn, json.load(f))
+            conn.execute("PRAGMA user_version = 1")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+def _row(item):
+    return (item["name"], item["type"], float(item["lat"]), float(item["lon"]), json.dumps(item))
+
+def _insert(conn, items):
+    conn.executemany("INSERT INTO lokasi (name, type, lat, lon, item) VALUES (?, ?, ?, ?, ?)", (_row(item) for item in items))
+
+def location_version(path=None):
+    # Berubah setiap kali isi database berubah, juga oleh proses lain (worker gunicorn lain): mtime dan ukuran file
+    # database plus file WAL-nya (pada mode WAL commit ditulis ke -wal dulu), ditambah jumlah penulisan di proses ini
+    path = path or db_path
+    version = [os.path.abspath(path), _writes]
+    for p in (path, path + "-wal"):
+        try:
+            stat = os.stat(p)
+            version.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            version.append(None)
+    return tuple(version)
+
+def _written():
+    global _writes
+    _writes += 1
+
+def load_locations(types=None, path=None):
+    # Semua item lokasi (dict seperti di data_lokasi.json) sesuai urutan masuk
+    conn = connect(path)
+    try:
+        if types is None:
+            rows = conn.execute("SELECT item FROM lokasi ORDER BY id")
+        else:
+            marks = ",".join("?" * len(types))
+            rows = conn.execute(f"SELECT item FROM lokasi WHERE type IN ({marks}) ORDER BY id", tuple(types))
+        return [json.loads(item) for (item,) in rows]
+    finally:
+        conn.close()
+
+def iter_locations(path=None, batch_size=1000):
+    # Sama seperti load_locations tetapi dibaca bertahap, untuk ekspor data besar
+    conn = connect(path)
+    try:
+        cursor = conn.execute("SELECT item FROM lokasi ORDER BY id")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for (item,) in rows:
+                yield json.loads(item)
+    finally:
+        conn.close()
+
+def locations_in_bbox(min_lat, min_lon, max_lat, max_lon, types=None, path=None):
+    conn = connect(path)
+    try:
+        query = "SELECT item FROM lokasi WHERE lat BETWEEN ? AND ? AND lon BETWEEN ? AND ?"
+        params = [min_lat, max_lat, min_lon, max_lon]
+        if types is not None:
+            query += f" AND type IN ({','.join('?' * len(types))})"
+            params.extend(types)
+        return [json.loads(item) for (item,) in conn.execute(query + " ORDER BY id", params)]
+    finally:
+        conn.close()
+
+def add_location(item, path=None):
+    conn = connect(path)
+    try:
+        with conn:
+            _insert(conn, [item])
+    finally:
+        conn.close()
+        _written()
+
+def delete_location(index, path=None):
+    # index = posisi item pada daftar lokasi (seperti di halaman /lokasi); False jika di luar jangkauan
+    if index < 0:
+        return False
+    conn = connect(path)
+    try:
+        with conn:
+            row = conn.execute("SELECT id FROM lokasi ORDER BY id LIMIT 1 OFFSET ?", (index,)).fetchone()
+            if row is None:
+                return False
+            conn.execute("DELETE FROM lokasi WHERE id = ?", row)
+            return True
+    finally:
+        conn.close()
+        _written()
+
+def import_batches(batches, replace=False, path=None):
+    # batches: iterable list item per batch; semua batch masuk dalam satu transaksi (gagal = tidak ada yang berubah).
+    # replace: data lama baru dihapus saat batch berisi pertama datang, dalam transaksi yang sama, sehingga impor
+    # tanpa satu pun item valid tidak menghapus apa-apa
+    conn = connect(path)
+    count = 0
+    try:
+        with conn:
+            for batch in batches:
+                if not batch:
+                    continue
+                if replace and not count:
+                    conn.execute("DELETE FROM lokasi")
+                _insert(conn, batch)
+                count += len(batch)
+        return count
+    finally:
+        conn.close()
+        _written()
+
+def import_json(source, replace=True, path=None):
+    # source: path file JSON atau list item; replace=False menambahkan ke data yang ada
+    if isinstance(source, str):
+        with open(source, "r") as f:
+            source = json.load(f)
+    return import_batches([source], replace, path)
+
+def export_json(target=None, path=None):
+    # Tulis semua lokasi dalam format data_lokasi.json; tanpa target kembalikan list-nya saja
+    items = load_locations(path=path)
+    if target is not None:
+        tmp_path = target + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(items, f, indent=4)
+        os.replace(tmp_path, target)
+    return items
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Impor/ekspor data lokasi antara SQLite dan JSON")
+    parser.add_argument("command", choices=("import", "export"))
+    parser.add_argument("file", nargs="?", default=json_path)
+    parser.add_argument("--append", action="store_true", help="impor tanpa menghapus data yang ada")
+    parser.add_argument("--db", default=db_path)
+    args = parser.parse_args(argv)
+    if args.command == "import":
+        print(f"{import_json(args.file, replace=not args.append, path=args.db)} lokasi diimpor ke {args.db}")
+    else:
+        print(f"{len(export_json(args.file, path=args.db))} lokasi diekspor ke {args.file}")
+
+if __name__ == "__main__":
+    main()
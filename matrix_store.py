@@ -0,0 +1,267 @@
+import hashlib
+import json
+import mmap
+import os
+from array import array as float_array
+from collections import OrderedDict
+from functools import partial
+
+import numpy as np
+
+from spatial_index import haversine_pairs
+
+# Matriks jarak/waktu untuk instance besar disimpan di disk (.npy) dan dibuka lewat memory-map: satu salinan
+# di page cache dipakai bersama semua proses/worker, dan tetap terpakai setelah server restart.
+# Kunci file = hash koordinat semua titik + parameter penyedia jarak.
+matrix_cache_dir = ".cache_jarak"
+matrix_storage = "auto"  # memory / memmap / knn / auto
+memmap_min_points = 5000  # auto: di bawah ini matriks float64 biasa di memori
+dense_max_bytes = 2 * 1024**3  # auto: batas ukuran dua matriks float32 padat sebelum beralih ke knn
+knn_neighbours = 50  # jumlah tetangga terdekat per titik yang disimpan pada mode knn
+block_rows = 512  # baris per blok saat mengisi matriks, membatasi memori sementara
+matrix_cache_max_bytes = 4 * 1024**3  # di atas ini file cache yang paling lama tidak dipakai dihapus (LRU)
+route_rows_list_max = 1000  # titik; sampai ukuran ini baris data rute berupa list float (paling cepat diindeks)
+route_rows_max_bytes = 128 * 1024**2  # per matriks data rute; di atas ini baris dimuat sesuai kebutuhan (LRU)
+
+# Penyedia jarak (HaversineProvider, road_network.RoadProvider) punya tiga method:
+#   cache_params()      -> nilai JSON yang ikut menentukan kunci cache
+#   block(rows, cols)   -> (dist, time) tepat; rows berbentuk (a, 1), cols (1, b) atau (a, b)
+#   estimate(rows, cols)-> (dist, time) perkiraan murah per elemen (broadcasting), untuk pasangan di luar knn
+
+class HaversineProvider:
+    __slots__ = ("lat", "lon", "speed")
+
+    def __init__(self, lat, lon, speed):
+        self.lat = np.asarray(lat, dtype=float)
+        self.lon = np.asarray(lon, dtype=float)
+        self.speed = speed
+
+    def cache_params(self):
+        return ["haversine", self.speed]
+
+    def block(self, rows, cols):
+        return self.estimate(rows, cols)
+
+    def estimate(self, rows, cols):
+        dist = haversine_pairs(self.lat[rows], self.lon[rows], self.lat[cols], self.lon[cols])
+        return dist, dist / self.speed
+
+class MappedArray:
+    # Pengganti memmap cache saat di-pickle (mis. initargs ProcessPoolExecutor): yang dikirim hanya path file,
+    # proses penerima membuka file yang sama read-only sehingga tidak ada salinan n x n per worker
+    __slots__ = ("path",)
+
+    def __init__(self, path):
+        self.path = path
+
+    def open(self):
+        return np.load(self.path, mmap_mode="r")
+
+def pack_array(array):
+    # Hanya memmap utuh hasil np.load (base = objek mmap); irisan dan array biasa di-pickle apa adanya
+    if isinstance(array, np.memmap) and array.filename and isinstance(array.base, mmap.mmap):
+        return MappedArray(array.filename)
+    return array
+
+def unpack_array(value):
+    return value.open() if isinstance(value, MappedArray) else value
+
+def _estimate_part(provider, part, rows, cols):
+    return provider.estimate(rows, cols)[part]
+
+class KnnMatrix:
+    # Matriks n x n jarang: hanya k tetangga terdekat per titik yang disimpan, sebagai kunci pasangan
+    # row * n + col yang terurut naik. Pasangan lain diambil dari estimate penyedia jarak.
+    # Mendukung m[i, j] dan m[np.ix_(a, b)] seperti array numpy biasa.
+    __slots__ = ("keys", "values", "estimate", "shape")
+
+    def __init__(self, keys, values, estimate, n):
+        self.keys = keys
+        self.values = values
+        self.estimate = estimate
+        self.shape = (n, n)
+
+    def __getstate__(self):
+        return (pack_array(self.keys), pack_array(self.values), self.estimate, self.shape)
+
+    def __setstate__(self, state):
+        keys, values, self.estimate, self.shape = state
+        self.keys = unpack_array(keys)
+        self.values = unpack_array(values)
+
+    def __getitem__(self, index):
+        rows, cols = index
+        if np.ndim(rows) == 0 and np.ndim(cols) == 0:
+            key = int(rows) * self.shape[1] + int(cols)
+            pos = int(np.searchsorted(self.keys, key))
+            if pos < len(self.keys) and self.keys[pos] == key:
+                return self.values[pos]
+            return self.estimate(rows, cols)[()]
+        rows, cols = np.broadcast_arrays(np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64))
+        out = np.array(self.estimate(rows, cols), dtype=float)
+        if not len(self.keys):
+            return out
+        keys = rows * self.shape[1] + cols
+        pos = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        hit = self.keys[pos] == keys
+        out[hit] = self.values[pos[hit]]
+        return out
+
+class RowCache:
+    # Baris source[ids][:, ids] dimuat saat dipakai dan disimpan paling banyak max_rows (LRU), untuk data rute yang
+    # terlalu besar untuk dimuat utuh (memmap / knn dengan ribuan titik). rows[a][b] seperti list baris biasa.
+    __slots__ = ("source", "ids", "rows", "max_rows")
+
+    def __init__(self, source, ids, max_rows):
+        self.source = source
+        self.ids = ids
+        self.rows = OrderedDict()
+        self.max_rows = max_rows
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, a):
+        rows = self.rows
+        row = rows.get(a)
+        if row is None:
+            block = np.asarray(self.source[np.ix_(self.ids[a:a + 1], self.ids)], dtype=float)
+            row = rows[a] = float_array("d", block.tobytes())
+            if len(rows) > self.max_rows:
+                rows.popitem(last=False)
+        else:
+            rows.move_to_end(a)
+        return row
+
+def submatrix_rows(source, ids):
+    # Baris source[ids][:, ids] untuk data rute tanpa salinan padat sementara: list float untuk instance kecil,
+    # array('d') per baris (8 byte per nilai) jika muat di route_rows_max_bytes, selain itu RowCache
+    ids = np.asarray(ids, dtype=np.int64)
+    n = len(ids)
+    if n <= route_rows_list_max:
+        return np.asarray(source[np.ix_(ids, ids)], dtype=float).tolist()
+    if n * n * 8 > route_rows_max_bytes:
+        return RowCache(source, ids, max(1, route_rows_max_bytes // (n * 8)))
+    rows = []
+    for start in range(0, n, block_rows):
+        block = np.asarray(source[np.ix_(ids[start:start + block_rows], ids)], dtype=float)
+        rows.extend(float_array("d", row.tobytes()) for row in block)
+    return rows
+
+def resolve_storage(n, storage=None):
+    # "auto": matriks kecil tetap di memori, menengah memmap float32, sangat besar knn
+    storage = storage or matrix_storage
+    if storage != "auto":
+        return storage
+    if n < memmap_min_points:
+        return "memory"
+    return "memmap" if 2 * 4 * n * n <= dense_max_bytes else "knn"
+
+def dataset_key(lat, lon, *extra):
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(lat, dtype=float).tobytes())
+    digest.update(np.ascontiguousarray(lon, dtype=float).tobytes())
+    digest.update(json.dumps(extra, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+def _cached(key, names, create):
+    # create(tmp_paths) menulis semua file; rename baru dilakukan setelah lengkap agar proses lain
+    # tidak pernah membuka file setengah jadi. Hasil dibuka read-only lewat memory-map.
+    paths = [os.path.join(matrix_cache_dir, f"{key}.{name}.npy") for name in names]
+    if all(os.path.exists(p) for p in paths):
+        # mtime dipakai sebagai waktu pemakaian terakhir untuk LRU
+        for p in paths:
+            os.utime(p)
+    else:
+        os.makedirs(matrix_cache_dir, exist_ok=True)
+        tmp_paths = [f"{p}.{os.getpid()}.tmp" for p in paths]
+        create(tmp_paths)
+        for tmp, p in zip(tmp_paths, paths):
+            os.replace(tmp, p)
+        prune_cache(keep=key)
+    return [np.load(p, mmap_mode="r") for p in paths]
+
+def prune_cache(max_bytes=None, keep=None):
+    # Hapus dataset cache yang paling lama tidak dipakai sampai total ukuran <= max_bytes. Tiap lokasi diubah
+    # menghasilkan kunci baru, jadi tanpa ini file lama menumpuk. Proses yang masih membuka file lewat memmap
+    # tetap bisa membacanya setelah file dihapus (POSIX). Hasil = jumlah dataset yang dihapus.
+    if max_bytes is None:
+        max_bytes = matrix_cache_max_bytes
+    groups = {}
+    try:
+        entries = list(os.scandir(matrix_cache_dir))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        if not entry.name.endswith(".npy"):
+            continue  # file .tmp milik proses yang sedang menulis
+        try:
+            stat = entry.stat()
+        except FileNotFoundError:
+            continue
+        size, used, paths = groups.get(entry.name.split(".", 1)[0], (0, 0, []))
+        groups[entry.name.split(".", 1)[0]] = (size + stat.st_size, max(used, stat.st_mtime), paths + [entry.path])
+    total = sum(size for size, _, _ in groups.values())
+    removed = 0
+    for key, (size, _, paths) in sorted(groups.items(), key=lambda item: item[1][1]):
+        if total <= max_bytes:
+            break
+        if key == keep:
+            continue
+        for p in paths:
+            try:
+                os.remove(p)
+            except OSError:
+                pass
+        total -= size
+        removed += 1
+    return removed
+
+def dense_matrices(provider, n, key, dtype=np.float32):
+    def create(tmp_paths):
+        dist, travel = (np.lib.format.open_memmap(p, mode="w+", dtype=dtype, shape=(n, n)) for p in tmp_paths)
+        cols = np.arange(n)
+        for start in range(0, n, block_rows):
+            rows = cols[start:start + block_rows]
+            dist[start:start + len(rows)], travel[start:start + len(rows)] = provider.block(rows[:, None], cols[None, :])
+        dist.flush()
+        travel.flush()
+
+    dist, travel = _cached(key, ("dist", "time"), create)
+    return dist, travel
+
+def knn_matrices(provider, lat, lon, key, k=None):
+    # Tetangga dipilih menurut jarak garis lurus, nilainya dihitung tepat oleh penyedia jarak
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    n = len(lat)
+    k = max(min(k or knn_neighbours, n - 1), 0)
+
+    def create(tmp_paths):
+        keys = np.lib.format.open_memmap(tmp_paths[0], mode="w+", dtype=np.int64, shape=(n * k,))
+        dist, travel = (np.lib.format.open_memmap(p, mode="w+", dtype=np.float32, shape=(n * k,)) for p in tmp_paths[1:])
+        for start in range(0, n if k else 0, block_rows):
+            rows = np.arange(start, min(start + block_rows, n))
+            straight = haversine_pairs(lat[rows, None], lon[rows, None], lat[None, :], lon[None, :])
+            straight[np.arange(len(rows)), rows] = np.inf
+            neighbours = np.sort(np.argpartition(straight, k - 1, axis=1)[:, :k], axis=1)
+            block = slice(start * k, (start + len(rows)) * k)
+            keys[block] = (rows[:, None] * n + neighbours).ravel()
+            values = provider.block(rows[:, None], neighbours)
+            dist[block] = values[0].ravel()
+            travel[block] = values[1].ravel()
+        for array in (keys, dist, travel):
+            array.flush()
+
+    keys, dist, travel = _cached(key, ("knn_keys", "knn_dist", "knn_time"), create)
+    return (KnnMatrix(keys, dist, partial(_estimate_part, provider, 0), n),
+            KnnMatrix(keys, travel, partial(_estimate_part, provider, 1), n))
+
+def distance_matrices(provider, lat, lon, storage):
+    # storage sudah di-resolve (memory / memmap / knn); memory = float64 padat, tetap lewat cache disk
+    n = len(lat)
+    if storage == "knn":
+        key = dataset_key(lat, lon, provider.cache_params(), storage, knn_neighbours)
+        return knn_matrices(provider, lat, lon, key)
+    key = dataset_key(lat, lon, provider.cache_params(), storage)
+    return dense_matrices(provider, n, key, np.float64 if storage == "memory" else np.float32)
@@ -0,0 +1,107 @@
+from array import array
+
+import numpy as np
+
+from matrix_store import pack_array, unpack_array
+
+# Kode jenis titik pada instance dan jenis singgahan pada rute
+node_groups = ("depot", "customer", "rest_area", "menginap")
+STOP_DEPOT, STOP_CUSTOMER, STOP_REST, STOP_NGINAP = 0, 1, 2, 3
+stop_labels = {STOP_REST: "rest", STOP_NGINAP: "nginap"}
+
+class ProblemInstance:
+    # Semua lokasi sebagai array per titik; ID titik = indeks array.
+    # dist/time/indexes/nearest_memo diisi oleh build_distance_matrix.
+    __slots__ = ("names", "kind", "lat", "lon", "demand", "fee", "supply",
+                 "ids", "group_ids", "dist", "time", "indexes", "nearest_memo")
+
+    def __init__(self, depots, customers, rest_areas=None, menginap_locs=None):
+        self.names = []
+        self.kind = array("b")
+        self.demand = array("d")
+        self.fee = array("d")
+        self.supply = array("d")
+        self.ids = {}
+        self.group_ids = {group: {} for group in node_groups}
+        lat = []
+        lon = []
+        for kind, (group, items) in enumerate(zip(node_groups, (depots, customers, rest_areas or {}, menginap_locs or {}))):
+            for name, data in items.items():
+                node = len(self.names)
+                coord = (float(data[0]), float(data[1]))
+                self.names.append(name)
+                self.kind.append(kind)
+                lat.append(coord[0])
+                lon.append(coord[1])
+                self.demand.append(float(data[2] or 0) if group == "customer" else 0.0)
+                self.fee.append(float(data[3] or 0) if group == "customer" else 0.0)
+                self.supply.append(float(data[2] or 0) if group == "depot" and len(data) > 2 else 0.0)
+                self.group_ids[group][name] = node
+                # Pencarian lewat koordinat (API lama) memakai titik pertama pada koordinat itu
+                self.ids.setdefault(coord, node)
+        self.lat = np.array(lat, dtype=float)
+        self.lon = np.array(lon, dtype=float)
+        self.dist = None
+        self.time = None
+        self.indexes = {}
+        self.nearest_memo = {"rest_area": {}, "menginap": {}}
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getstate__(self):
+        # Matriks memmap dari cache disk dikirim sebagai path (lihat matrix_store.pack_array)
+        state = {name: getattr(self, name) for name in self.__slots__}
+        state["dist"] = pack_array(self.dist)
+        state["time"] = pack_array(self.time)
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, unpack_array(value) if name in ("dist", "time") else value)
+
+    def coord(self, node):
+        return (float(self.lat[node]), float(self.lon[node]))
+
+class CompactRoute:
+    # Rute hasil simulasi: satu entri per singgahan (jenis, ID titik, koordinat).
+    # Rest area / menginap virtual tidak punya titik di instance, ID-nya -1.
+    __slots__ = ("events", "nodes", "lat", "lon")
+
+    def __init__(self):
+        self.events = array("b")
+        self.nodes = array("i")
+        self.lat = array("d")
+        self.lon = array("d")
+
+    def add(self, event, node, coord):
+        self.events.append(event)
+        self.nodes.append(node)
+        self.lat.append(coord[0])
+        self.lon.append(coord[1])
+
+    def __len__(self):
+        return len(self.events)
+
+    def __iter__(self):
+        for k in range(len(self.events)):
+            yield self.events[k], self.nodes[k], (self.lat[k], self.lon[k])
+
+    def __eq__(self, other):
+        if not isinstance(other, CompactRoute):
+            return NotImplemented
+        return (self.events == other.events and self.nodes == other.nodes
+                and self.lat == other.lat and self.lon == other.lon)
+
+    def __getstate__(self):
+        return (self.events, self.nodes, self.lat, self.lon)
+
+    def __setstate__(self, state):
+        self.events, self.nodes, self.lat, self.lon = state
+
+    def to_legacy(self):
+        # Format lama: koordinat biasa untuk depot/pelanggan, ("rest"/"nginap", koordinat) untuk singgahan
+        route = []
+        for event, node, coord in self:
+            route.append((stop_labels[event], coord) if event in stop_labels else coord)
+        return route
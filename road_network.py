@@ -0,0 +1,207 @@
+import heapq
+import os
+import xml.etree.ElementTree as ET
+from array import array
+from math import radians, cos, sin, sqrt, atan2
+
+import numpy as np
+
+from spatial_index import GridIndex, haversine_pairs
+
+# Penyedia jarak opsional: jarak/waktu tempuh lewat jaringan jalan dari ekstrak OpenStreetMap (.osm XML).
+# Matriks hasil shortest path disimpan oleh matrix_store dan dibuka lewat memory-map pada solve berikutnya.
+# Kecepatan (km/jam) per kelas jalan jika tag maxspeed tidak ada; *_link memakai kelas dasarnya
+road_speeds = {
+    "motorway": 80, "trunk": 60, "primary": 50, "secondary": 40, "tertiary": 35,
+    "unclassified": 30, "road": 30, "residential": 25, "track": 20, "service": 15, "living_street": 10,
+}
+connector_speed = 20  # km/jam dari titik lokasi ke node jalan terdekat
+max_snap_km = 5  # titik yang lebih jauh dari ini ke jalan memakai jarak garis lurus
+detour_factor = 1.3  # pengali jarak garis lurus untuk pasangan yang tidak terhubung jalan
+fallback_speed = 40  # km/jam untuk pasangan yang tidak terhubung jalan
+
+_loaded = {}
+
+def _haversine(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = radians(lat1), radians(lon1), radians(lat2), radians(lon2)
+    a = sin((lat2 - lat1) / 2)**2 + cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2)**2
+    return 6371.0 * 2 * atan2(sqrt(a), sqrt(1 - a))
+
+def _way_speed(tags):
+    highway = tags.get("highway", "")
+    base = highway[:-5] if highway.endswith("_link") else highway
+    if base not in road_speeds:
+        return None
+    maxspeed = tags.get("maxspeed", "").split(" ")[0]
+    return float(maxspeed) if maxspeed.replace(".", "", 1).isdigit() and float(maxspeed) > 0 else road_speeds[base]
+
+class RoadGraph:
+    # Graf jalan berarah dalam format CSR: tetangga node u ada di targets[indptr[u]:indptr[u + 1]]
+    __slots__ = ("lat", "lon", "indptr", "targets", "length_km", "time_h", "index")
+
+    def __init__(self, lat, lon, edges):
+        self.lat = lat
+        self.lon = lon
+        edges.sort(key=lambda e: e[0])
+        self.indptr = [0] * (len(lat) + 1)
+        for u, _, _, _ in edges:
+            self.indptr[u + 1] += 1
+        for u in range(len(lat)):
+            self.indptr[u + 1] += self.indptr[u]
+        self.targets = [e[1] for e in edges]
+        self.length_km = [e[2] for e in edges]
+        self.time_h = [e[3] for e in edges]
+        # Sel kecil karena node jalan jauh lebih rapat daripada lokasi pelanggan
+        self.index = GridIndex(((u, (lat[u], lon[u])) for u in range(len(lat))),
+                               lambda a, b: _haversine(a[0], a[1], b[0], b[1]), cell_deg=0.01)
+
+    def shortest_paths(self, source, targets):
+        # Dijkstra berbasis waktu tempuh (rute tercepat) dari source; jarak dijumlahkan sepanjang rute yang sama.
+        # Berhenti begitu semua target sudah final. Hasil: {target: (km, jam)}
+        best = {source: 0.0}
+        length = {source: 0.0}
+        remaining = set(targets)
+        found = {}
+        heap = [(0.0, source)]
+        indptr, nbrs, edge_km, edge_h = self.indptr, self.targets, self.length_km, self.time_h
+        while heap and remaining:
+            t, u = heapq.heappop(heap)
+            if t > best[u]:
+                continue
+            if u in remaining:
+                remaining.discard(u)
+                found[u] = (length[u], t)
+            for k in range(indptr[u], indptr[u + 1]):
+                v = nbrs[k]
+                nt = t + edge_h[k]
+                if nt < best.get(v, float("inf")):
+                    best[v] = nt
+                    length[v] = length[u] + edge_km[k]
+                    heapq.heappush(heap, (nt, v))
+        return found
+
+def parse_osm(path):
+    # Baca ekstrak .osm secara streaming (iterparse) dan simpan hanya jalan yang bisa dilalui kendaraan
+    node_index = {}
+    node_lat = array("d")
+    node_lon = array("d")
+    ways = []
+    for _, elem in ET.iterparse(path, events=("end",)):
+        if elem.tag == "node":
+            node_index[elem.get("id")] = len(node_lat)
+            node_lat.append(float(elem.get("lat")))
+            node_lon.append(float(elem.get("lon")))
+            elem.clear()
+        elif elem.tag == "way":
+            tags = {tag.get("k"): tag.get("v") for tag in elem.iter("tag")}
+            speed = _way_speed(tags)
+            if speed is not None:
+                refs = [node_index[nd.get("ref")] for nd in elem.iter("nd") if nd.get("ref") in node_index]
+                oneway = tags.get("oneway")
+                ways.append((refs, speed, oneway in ("yes", "1", "true"), oneway == "-1"))
+            elem.clear()
+        elif elem.tag == "relation":
+            elem.clear()
+
+    # Node yang tidak dipakai jalan mana pun dibuang, ID dipadatkan ulang
+    compact = {}
+    lat, lon, edges = [], [], []
+    for refs, speed, forward_only, backward_only in ways:
+        for u, v in zip(refs, refs[1:]):
+            for n in (u, v):
+                if n not in compact:
+                    compact[n] = len(lat)
+                    lat.append(node_lat[n])
+                    lon.append(node_lon[n])
+            a, b = compact[u], compact[v]
+            km = _haversine(lat[a], lon[a], lat[b], lon[b])
+            if not backward_only:
+                edges.append((a, b, km, km / speed))
+            if not forward_only:
+                edges.append((b, a, km, km / speed))
+    return RoadGraph(lat, lon, edges)
+
+class RoadProvider:
+    # Penyedia jarak untuk matrix_store; titik lokasi baru di-snap ke node jalan saat block() pertama dipanggil
+    __slots__ = ("network", "lat", "lon", "_snapped")
+
+    def __init__(self, network, lat, lon):
+        self.network = network
+        self.lat = np.asarray(lat, dtype=float)
+        self.lon = np.asarray(lon, dtype=float)
+        self._snapped = None
+
+    def cache_params(self):
+        return ["osm", self.network.fingerprint, road_speeds, connector_speed, max_snap_km, detour_factor, fallback_speed]
+
+    def snapped(self):
+        if self._snapped is None:
+            index = self.network.graph.index
+            self._snapped = []
+            for lat, lon in zip(self.lat.tolist(), self.lon.tolist()):
+                found = index.nearest((lat, lon), max_snap_km)
+                self._snapped.append((found[0], found[2]) if found else (None, None))
+        return self._snapped
+
+    def estimate(self, rows, cols):
+        # Garis lurus x faktor belok: untuk titik tanpa jalan, pasangan tidak terhubung, dan pasangan di luar knn
+        dist = haversine_pairs(self.lat[rows], self.lon[rows], self.lat[cols], self.lon[cols]) * detour_factor
+        return dist, dist / fallback_speed
+
+    def block(self, rows, cols):
+        rows, cols = np.broadcast_arrays(rows, cols)
+        dist, travel = self.estimate(rows, cols)
+        graph = self.network.graph
+        snapped = self.snapped()
+        for line in range(rows.shape[0]):
+            u, off_i = snapped[rows[line, 0]]
+            if u is None:
+                continue
+            targets = [snapped[j] for j in cols[line].tolist()]
+            paths = graph.shortest_paths(u, {v for v, _ in targets if v is not None})
+            for col, (v, off_j) in enumerate(targets):
+                if v is None or v not in paths or rows[line, col] == cols[line, col]:
+                    continue
+                km, hours = paths[v]
+                dist[line, col] = off_i + km + off_j
+                travel[line, col] = hours + (off_i + off_j) / connector_speed
+        return dist, travel
+
+class RoadNetwork:
+    # Graf baru di-parse saat matriks untuk suatu dataset belum ada di cache matrix_store
+    __slots__ = ("path", "fingerprint", "_graph")
+
+    def __init__(self, path):
+        self.path = path
+        self.fingerprint = _fingerprint(path)
+        self._graph = None
+
+    def __reduce__(self):
+        # Ke worker cukup dikirim path-nya; graf di-parse ulang di sana hanya jika memang diperlukan
+        return (load_road_network, (self.path,))
+
+    @property
+    def graph(self):
+        if self._graph is None:
+            self._graph = parse_osm(self.path)
+        return self._graph
+
+    def provider(self, lat, lon):
+        return RoadProvider(self, lat, lon)
+
+def _fingerprint(path):
+    stat = os.stat(path)
+    return [os.path.abspath(path), stat.st_size, int(stat.st_mtime)]
+
+def load_road_network(path):
+    # Satu objek per file per proses, agar graf yang sudah di-parse dipakai ulang
+    network = _loaded.get(path)
+    if network is None or network.fingerprint != _fingerprint(path):
+        network = _loaded[path] = RoadNetwork(path)
+    return network
+
+def road_network_from_config(config):
+    # "distance_provider": "osm" + "osm_file" di config.json; default tetap haversine (None)
+    if config.get("distance_provider", "haversine") != "osm":
+        return None
+    return load_road_network(config["osm_file"])
@@ -0,0 +1,126 @@
+import multiprocessing
+import time
+
+# Batas pencarian (anytime search). Semua batas opsional; tanpa batas sama sekali pencarian berjalan sampai
+# jumlah iterasi habis seperti biasa. time_limit dan max_evaluations berlaku untuk seluruh solve (SolveBudget),
+# stagnation_limit per pemanggilan tabu search.
+limit_keys = ("time_limit", "max_evaluations", "stagnation_limit")
+stop_poll_interval = 0.2  # detik antar pengecekan stop() selama worker paralel berjalan
+
+def search_limits(config):
+    # Ambil batas pencarian dari config.json (None = tanpa batas)
+    return {key: config.get(key) for key in limit_keys}
+
+def call_limits(config):
+    # Batas per pemanggilan tabu search saat dipakai di dalam solve; batas waktu/evaluasi lewat SolveBudget
+    return {"stagnation_limit": config.get("stagnation_limit")}
+
+def solve_budget(config, stop=None):
+    return SolveBudget(config.get("time_limit"), config.get("max_evaluations"), stop)
+
+class SolveBudget:
+    # Satu deadline dan satu penghitung evaluasi untuk seluruh solve: semua kendaraan, tahap multi-route, dan pulau
+    # memakai anggaran yang sama. Penghitung dan tanda stop berupa multiprocessing.Value sehingga worker ikut
+    # menambah/membacanya; objek ini dikirim ke worker lewat initargs pool, bukan sebagai argumen task.
+    # stop() hanya dipanggil di proses utama; worker melihat tanda stop yang diset lewat request_stop().
+    __slots__ = ("deadline", "max_evaluations", "counter", "stopped", "stop")
+
+    def __init__(self, time_limit=None, max_evaluations=None, stop=None, deadline=None, counter=None, stopped=None):
+        if deadline is None and time_limit is not None:
+            deadline = time.perf_counter() + time_limit
+        self.deadline = deadline
+        self.max_evaluations = max_evaluations  # batas absolut untuk nilai penghitung
+        self.counter = counter if counter is not None else multiprocessing.Value("q", 0)
+        self.stopped = stopped if stopped is not None else multiprocessing.Value("b", 0)
+        self.stop = stop
+
+    def __getstate__(self):
+        return (self.deadline, self.max_evaluations, self.counter, self.stopped)
+
+    def __setstate__(self, state):
+        self.deadline, self.max_evaluations, self.counter, self.stopped = state
+        self.stop = None
+
+    @property
+    def evaluations(self):
+        return self.counter.value
+
+    def add(self, evaluations):
+        if evaluations:
+            with self.counter.get_lock():
+                self.counter.value += evaluations
+
+    def request_stop(self):
+        self.stopped.value = 1
+
+    def reason(self):
+        # Alasan anggaran habis, atau None
+        if not self.stopped.value and self.stop is not None and self.stop():
+            self.request_stop()
+        if self.stopped.value:
+            return "stop"
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            return "time_limit"
+        if self.max_evaluations is not None and self.counter.value >= self.max_evaluations:
+            return "max_evaluations"
+        return None
+
+    def bounds(self):
+        return (self.deadline, self.max_evaluations)
+
+    def bounded(self, bounds):
+        # Deadline/batas evaluasi lain (mis. satu epoch pulau) dengan penghitung dan tanda stop yang sama
+        return SolveBudget(deadline=bounds[0], max_evaluations=bounds[1], counter=self.counter, stopped=self.stopped,
+                           stop=self.stop)
+
+    def portion(self, fraction):
+        # Bagian dari sisa anggaran: deadline dan batas evaluasi = sekarang + fraction x sisa
+        now = time.perf_counter()
+        deadline = None if self.deadline is None else now + max(0.0, self.deadline - now) * fraction
+        cap = None
+        if self.max_evaluations is not None:
+            used = self.counter.value
+            cap = used + -(-max(0, self.max_evaluations - used) * fraction // 1)
+        return self.bounded((deadline, cap))
+
+class SearchBudget:
+    # Batas untuk satu pemanggilan pencarian, ditambah anggaran seluruh solve (shared: SolveBudget) jika ada
+    __slots__ = ("time_limit", "max_evaluations", "stagnation_limit", "stop", "shared",
+                 "deadline", "evaluations", "stagnant", "best_seen", "reason")
+
+    def __init__(self, time_limit=None, max_evaluations=None, stagnation_limit=None, stop=None, shared=None):
+        # time_limit: detik; max_evaluations: jumlah tetangga yang dievaluasi;
+        # stagnation_limit: iterasi berturut-turut tanpa biaya lebih baik; stop(): True untuk berhenti sekarang
+        self.time_limit = time_limit
+        self.max_evaluations = max_evaluations
+        self.stagnation_limit = stagnation_limit
+        self.stop = stop
+        self.shared = shared
+        self.deadline = time.perf_counter() + time_limit if time_limit is not None else None
+        self.evaluations = 0
+        self.stagnant = 0
+        self.best_seen = None
+        self.reason = None
+
+    def exhausted(self, evaluations=0, cost=None):
+        # Dipanggil sekali per iterasi; True jika pencarian harus berhenti (alasan di self.reason)
+        self.evaluations += evaluations
+        if self.shared is not None:
+            self.shared.add(evaluations)
+        if cost is not None:
+            if self.best_seen is None or cost < self.best_seen:
+                self.best_seen = cost
+                self.stagnant = 0
+            else:
+                self.stagnant += 1
+        if self.stop is not None and self.stop():
+            self.reason = "stop"
+        elif self.deadline is not None and time.perf_counter() >= self.deadline:
+            self.reason = "time_limit"
+        elif self.max_evaluations is not None and self.evaluations >= self.max_evaluations:
+            self.reason = "max_evaluations"
+        elif self.stagnation_limit is not None and self.stagnant >= self.stagnation_limit:
+            self.reason = "stagnation_limit"
+        elif self.shared is not None:
+            self.reason = self.shared.reason()
+        return self.reason is not None
@@ -0,0 +1,83 @@
+import hashlib
+import json
+import os
+import pickle
+from collections import OrderedDict
+
+# Cache hasil solve: LRU di memori plus salinan pickle di disk
+cache_dir = ".cache_solusi"
+max_memory_entries = 16
+
+_memory_cache = OrderedDict()
+_latest = {"key": None}
+
+def solution_key(*parts):
+    # Hash isi data (lokasi, jumlah kendaraan, parameter solver); urutan lokasi ikut dihitung
+    payload = json.dumps(parts, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _cache_path(key):
+    return os.path.join(cache_dir, key + ".pkl")
+
+def get_solution(key):
+    if key in _memory_cache:
+        _memory_cache.move_to_end(key)
+        return _memory_cache[key]
+    path = _cache_path(key)
+    if os.path.exists(path):
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        _remember(key, value)
+        return value
+    return None
+
+def put_solution(key, value):
+    _remember(key, value)
+    os.makedirs(cache_dir, exist_ok=True)
+    # Tulis ke file sementara dulu agar request lain tidak membaca pickle setengah jadi
+    tmp_path = _cache_path(key) + ".tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(value, f)
+    os.replace(tmp_path, _cache_path(key))
+
+def set_latest_solution(key):
+    # Tandai solusi terakhir sebagai basis re-optimasi inkremental setelah data lokasi berubah
+    _latest["key"] = key
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(os.path.join(cache_dir, "latest"), "w") as f:
+        f.write(key)
+
+def get_latest_solution():
+    key = _latest["key"]
+    if key is None:
+        try:
+            with open(os.path.join(cache_dir, "latest")) as f:
+                key = f.read().strip()
+        except OSError:
+            return None
+        _latest["key"] = key
+    return get_solution(key)
+
+def _remember(key, value):
+    _memory_cache[key] = value
+    _memory_cache.move_to_end(key)
+    while len(_memory_cache) > max_memory_entries:
+        _memory_cache.popitem(last=False)
+
+def clear_solution_cache(keep_latest=False):
+    # keep_latest: pertahankan solusi terakhir sebagai basis re-optimasi inkremental
+    latest = get_latest_solution() if keep_latest else None
+    _memory_cache.clear()
+    if os.path.isdir(cache_dir):
+        for name in os.listdir(cache_dir):
+            if name.endswith(".pkl") and not (latest is not None and name == _latest["key"] + ".pkl"):
+                os.remove(os.path.join(cache_dir, name))
+    if latest is not None:
+        _remember(_latest["key"], latest)
+    else:
+        _latest["key"] = None
+        if os.path.exists(os.path.join(cache_dir, "latest")):
+            os.remove(os.path.join(cache_dir, "latest"))
@@ -0,0 +1,208 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from cmvrp_tabu_search import solve_cmvrp, generate_leaflet_html, routes_geojson, load_input_data, load_config
+from fleet_sweep import sweep_fleet, best_point
+from search_budget import stop_poll_interval
+
+# Job solve berjalan di proses terpisah agar solve CPU-bound tidak berebut GIL dengan thread request. Status job
+# disimpan di SQLite sehingga terbaca dari semua worker gunicorn dan bisa ditulis oleh proses job itu sendiri.
+job_workers = 2
+max_finished_jobs = 50
+job_output_dir = "hasil_job"
+job_db_path = os.path.join(job_output_dir, "jobs.db")
+progress_interval = 0.5  # detik minimum antar penulisan progres iterasi ke database
+
+_schema = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    created REAL NOT NULL,
+    finished REAL,
+    stop INTEGER NOT NULL DEFAULT 0,
+    state TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_finished ON jobs (finished);
+"""
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def _connect():
+    os.makedirs(os.path.dirname(job_db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(job_db_path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    if not conn.execute("PRAGMA user_version").fetchone()[0]:
+        # Sama seperti location_store: skema dibuat dalam BEGIN IMMEDIATE agar koneksi pertama yang bersamaan menunggu
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for statement in _schema.split(";"):
+                if statement.strip():
+                    conn.execute(statement)
+            conn.execute("PRAGMA user_version = 1")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    return conn
+
+def submit_solve_job():
+    return _submit("solve", _run_job)
+
+def submit_sweep_job(counts=None, splits=None):
+    # Kurva profit/biaya beberapa ukuran armada; titik kurva ditambahkan ke job["curve"] begitu tiap ukuran selesai
+    return _submit("sweep", _run_sweep_job, counts, splits)
+
+def _submit(kind, run, *args):
+    global _executor
+    job_id = uuid.uuid4().hex
+    job = {
+        "id": job_id,
+        "kind": kind,
+        "status": "antri",
+        "stage": None,
+        "iteration": 0,
+        "best_cost": None,
+        "error": None,
+        "html_path": None,
+        "geojson_path": None,
+        "stopped_early": False,
+        "created": time.time(),
+        "finished": None,
+    }
+    if kind == "sweep":
+        job.update(curve=[], best=None)
+    conn = _connect()
+    try:
+        with conn:
+            conn.execute("INSERT INTO jobs (id, created, state) VALUES (?, ?, ?)", (job_id, job["created"], json.dumps(job)))
+            _prune_jobs(conn)
+    finally:
+        conn.close()
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=job_workers)
+        try:
+            future = _executor.submit(run, job_id, *args)
+        except BrokenProcessPool:
+            # Proses job sebelumnya mati mendadak (mis. kehabisan memori): pool lama tidak bisa dipakai lagi
+            _executor = ProcessPoolExecutor(max_workers=job_workers)
+            future = _executor.submit(run, job_id, *args)
+    future.add_done_callback(lambda f: _job_done(job_id, f))
+    return job_id
+
+def _job_done(job_id, future):
+    # Error biasa sudah dicatat oleh job sendiri; di sini hanya proses job yang mati sebelum sempat menulis status
+    error = future.exception()
+    if error is not None and not (get_job(job_id) or {}).get("finished"):
+        _update_job(job_id, status="gagal", error=str(error) or type(error).__name__, finished=time.time())
+
+def get_job(job_id):
+    conn = _connect()
+    try:
+        row = conn.execute("SELECT state FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+    finally:
+        conn.close()
+
+def stop_job(job_id):
+    # Minta job berhenti; pencarian selesai dengan solusi terbaik sejauh ini
+    conn = _connect()
+    try:
+        with conn:
+            return conn.execute("UPDATE jobs SET stop = 1 WHERE id = ? AND finished IS NULL", (job_id,)).rowcount > 0
+    finally:
+        conn.close()
+
+def _update_job(job_id, **fields):
+    conn = _connect()
+    try:
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT state FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return
+            job = json.loads(row[0])
+            job.update(fields)
+            conn.execute("UPDATE jobs SET state = ?, finished = ? WHERE id = ?", (json.dumps(job), job["finished"], job_id))
+    finally:
+        conn.close()
+
+def _stop_requested(job_id):
+    # stop() dipanggil tiap iterasi pencarian, jadi database dibaca paling sering sekali per stop_poll_interval
+    checked = {"at": 0.0, "stop": False}
+
+    def stop():
+        now = time.monotonic()
+        if not checked["stop"] and now - checked["at"] >= stop_poll_interval:
+            checked["at"] = now
+            conn = _connect()
+            try:
+                row = conn.execute("SELECT stop FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            finally:
+                conn.close()
+            checked["stop"] = bool(row and row[0])
+        return checked["stop"]
+    return stop
+
+def _progress_writer(job_id):
+    # Progres iterasi ditulis paling sering sekali per progress_interval
+    written = {"at": 0.0}
+
+    def progress(stage, iteration, best_cost):
+        now = time.monotonic()
+        if now - written["at"] >= progress_interval:
+            written["at"] = now
+            _update_job(job_id, stage=stage, iteration=iteration, best_cost=best_cost)
+    return progress
+
+def _run_job(job_id):
+    # Dijalankan di proses pool job
+    _update_job(job_id, status="berjalan")
+    stop = _stop_requested(job_id)
+    try:
+        result = solve_cmvrp(progress=_progress_writer(job_id), stop=stop)
+        os.makedirs(job_output_dir, exist_ok=True)
+        html_path = os.path.join(job_output_dir, f"{job_id}.html")
+        generate_leaflet_html(result["routes"], result["rest_areas"], result["menginap_locs"], output_path=html_path,
+                              assignments=result["assignments"])
+        # GeoJSON untuk halaman /visualisasi, yang mengirim job lalu menunggu hasilnya
+        geojson_path = os.path.join(job_output_dir, f"{job_id}.geojson")
+        with open(geojson_path, "w") as f:
+            json.dump(routes_geojson(result["routes"], result["assignments"], result["rest_areas"], result["menginap_locs"]), f,
+                      separators=(",", ":"))
+        total_cost = round(sum(route[5] for route in result["routes"]), 2)
+        _update_job(job_id, status="selesai", html_path=html_path, geojson_path=geojson_path, best_cost=total_cost,
+                    stopped_early=stop(), finished=time.time())
+    except Exception as e:
+        _update_job(job_id, status="gagal", error=str(e), finished=time.time())
+
+def _run_sweep_job(job_id, counts, splits):
+    _update_job(job_id, status="berjalan")
+    stop = _stop_requested(job_id)
+    try:
+        depots, customers, rest_areas, menginap_locs = load_input_data()
+        curve = []
+        for point, _, _ in sweep_fleet(depots, customers, rest_areas, menginap_locs, counts, splits, load_config(),
+                                       progress=_progress_writer(job_id), stop=stop):
+            curve.append(point)
+            _update_job(job_id, curve=curve, best=best_point(curve))
+        _update_job(job_id, status="selesai", stopped_early=stop(), finished=time.time())
+    except Exception as e:
+        _update_job(job_id, status="gagal", error=str(e), finished=time.time())
+
+def _prune_jobs(conn):
+    # Buang job lama yang sudah selesai agar database dan hasil_job tidak tumbuh tanpa batas
+    rows = conn.execute("SELECT id, state FROM jobs WHERE finished IS NOT NULL ORDER BY finished DESC LIMIT -1 OFFSET ?",
+                        (max_finished_jobs,)).fetchall()
+    for job_id, state in rows:
+        job = json.loads(state)
+        for path in (job.get("html_path"), job.get("geojson_path")):
+            if path and os.path.exists(path):
+                os.remove(path)
+        conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
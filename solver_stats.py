@@ -0,0 +1,63 @@
+import time
+from contextlib import contextmanager
+
+# Instrumentasi opsional untuk solver. Semua fungsi solver menerima stats=None;
+# tanpa objek ini tidak ada penghitungan sama sekali.
+
+class SolverStats:
+    __slots__ = ("counters", "timers", "trace", "stage", "started")
+
+    def __init__(self):
+        self.counters = {}
+        self.timers = {}  # nama -> [total detik, jumlah panggilan]
+        self.trace = []   # (stage, iterasi, biaya terbaik, biaya solusi saat ini)
+        self.stage = None
+        self.started = time.perf_counter()
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def add_time(self, name, seconds):
+        entry = self.timers.setdefault(name, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+
+    @contextmanager
+    def timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def record_iteration(self, iteration, best_cost, current_cost):
+        self.trace.append((self.stage, iteration, best_cost, current_cost))
+
+    def merge(self, other):
+        # Gabungkan statistik dari worker (objek SolverStats atau hasil to_dict)
+        if isinstance(other, SolverStats):
+            other = other.to_dict()
+        for name, n in other["counters"].items():
+            self.count(name, n)
+        for name, entry in other["timers"].items():
+            mine = self.timers.setdefault(name, [0.0, 0])
+            mine[0] += entry["total_s"]
+            mine[1] += entry["calls"]
+        self.trace.extend(tuple(row) for row in other["trace"])
+
+    def to_dict(self):
+        return {
+            "counters": dict(self.counters),
+            "timers": {name: {"total_s": round(total, 6), "calls": calls} for name, (total, calls) in self.timers.items()},
+            "trace": [list(row) for row in self.trace],
+            "elapsed_s": round(time.perf_counter() - self.started, 6),
+        }
+
+@contextmanager
+def timed(stats, name):
+    # Seperti stats.timer(name), tetapi tidak melakukan apa-apa jika stats None
+    if stats is None:
+        yield
+        return
+    with stats.timer(name):
+        yield
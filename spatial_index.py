@@ -0,0 +1,115 @@
+from math import cos, radians, floor
+
+import numpy as np
+
+# Indeks grid lat/lon untuk mencari titik terdekat tanpa memindai semua kandidat.
+# Ukuran sel ~10 km, sama dengan radius pencarian rest area / menginap.
+default_cell_deg = 0.09
+km_per_deg = 6371.0 * 3.141592653589793 / 180
+
+class GridIndex:
+    __slots__ = ("cell_deg", "distance", "cells", "bounds", "max_abs_lat", "next_seq")
+
+    def __init__(self, items, distance, cell_deg=default_cell_deg):
+        # items: iterable (key, (lat, lon)); distance: fungsi jarak km antar dua koordinat
+        self.cell_deg = cell_deg
+        self.distance = distance
+        self.cells = {}
+        self.bounds = None
+        self.max_abs_lat = 0.0
+        self.next_seq = 0
+        for key, point in items:
+            self.add(key, point)
+
+    def _cell(self, point):
+        return (floor(float(point[0]) / self.cell_deg), floor(float(point[1]) / self.cell_deg))
+
+    def add(self, key, point):
+        cell = self._cell(point)
+        # seq menjaga urutan input sebagai tie-breaker, sama seperti pencarian linear
+        self.cells.setdefault(cell, []).append((self.next_seq, key, point))
+        self.next_seq += 1
+        self.max_abs_lat = max(self.max_abs_lat, abs(float(point[0])))
+        if self.bounds is None:
+            self.bounds = [cell[0], cell[0], cell[1], cell[1]]
+        else:
+            self.bounds = [min(self.bounds[0], cell[0]), max(self.bounds[1], cell[0]),
+                           min(self.bounds[2], cell[1]), max(self.bounds[3], cell[1])]
+
+    def remove(self, key, point):
+        cell = self._cell(point)
+        entries = self.cells.get(cell, [])
+        for idx, entry in enumerate(entries):
+            if entry[1] == key:
+                del entries[idx]
+                break
+        if not entries:
+            self.cells.pop(cell, None)
+
+    def __len__(self):
+        return sum(len(entries) for entries in self.cells.values())
+
+    def nearest(self, coord, max_km=None, accept=None):
+        # Kembalikan (key, point, jarak) terdekat, atau None jika tidak ada dalam max_km.
+        # accept(key) opsional untuk menyaring kandidat (mis. sisa kapasitas).
+        if not self.cells:
+            return None
+        ci, cj = self._cell(coord)
+        lo_i, hi_i, lo_j, hi_j = self.bounds
+        max_ring = max(abs(ci - lo_i), abs(ci - hi_i), abs(cj - lo_j), abs(cj - hi_j))
+        # Batas bawah jarak per ring, dibuat konservatif untuk kompresi bujur
+        lat_factor = cos(radians(min(90.0, max(self.max_abs_lat, abs(float(coord[0]))) + self.cell_deg))) * 0.99
+        ring_km = self.cell_deg * km_per_deg * lat_factor
+        best = None
+        for r in range(max_ring + 1):
+            if r > 0:
+                bound = (r - 1) * ring_km
+                if max_km is not None and bound > max_km:
+                    break
+                if best is not None and bound > best[0]:
+                    break
+            if 8 * r > len(self.cells):
+                # Ring sudah lebih besar dari jumlah sel terisi: cek sisa sel secara langsung
+                cells = [cell for cell in self.cells if max(abs(cell[0] - ci), abs(cell[1] - cj)) >= r]
+                best = self._scan(coord, cells, max_km, accept, best)
+                break
+            best = self._scan(coord, self._ring(ci, cj, r), max_km, accept, best)
+        if best is None:
+            return None
+        return best[2], best[3], best[0]
+
+    def _scan(self, coord, cells, max_km, accept, best):
+        for cell in cells:
+            for seq, key, point in self.cells.get(cell, ()):
+                if accept is not None and not accept(key):
+                    continue
+                d = self.distance(coord, point)
+                if max_km is not None and d > max_km:
+                    continue
+                if best is None or (d, seq) < (best[0], best[1]):
+                    best = (d, seq, key, point)
+        return best
+
+    def _ring(self, ci, cj, r):
+        if r == 0:
+            yield (ci, cj)
+            return
+        for di in range(-r, r + 1):
+            yield (ci + di, cj - r)
+            yield (ci + di, cj + r)
+        for dj in range(-r + 1, r):
+            yield (ci - r, cj + dj)
+            yield (ci + r, cj + dj)
+
+def haversine_pairs(lat1, lon1, lat2, lon2):
+    # Jarak haversine (km) elemen per elemen dengan broadcasting numpy; lat/lon dalam derajat
+    lat1, lon1 = np.radians(np.asarray(lat1, dtype=float)), np.radians(np.asarray(lon1, dtype=float))
+    lat2, lon2 = np.radians(np.asarray(lat2, dtype=float)), np.radians(np.asarray(lon2, dtype=float))
+    a = np.sin((lat2 - lat1) / 2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2)**2
+    return 6371.0 * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+def haversine_matrix(lat, lon):
+    # Jarak haversine (km) semua pasangan titik sekaligus
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    return haversine_pairs(lat[:, None], lon[:, None], lat[None, :], lon[None, :])
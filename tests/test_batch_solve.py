@@ -0,0 +1,74 @@
+import csv
+import json
+
+import pytest
+
+import batch_solve
+import benchmark
+import cmvrp_tabu_search as cmvrp
+
+timing_fields = ("prepare_s", "solve_s", "elapsed_s")
+
+
+@pytest.fixture
+def instance_path(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / "instance.json"
+    path.write_text(json.dumps(benchmark.generate_instance(12, seed=3)))
+    return str(path)
+
+
+def _strip_timing(record):
+    return {name: value for name, value in record.items() if name not in timing_fields}
+
+
+def test_grid_produces_one_record_per_scenario(instance_path):
+    grid = {"vehicle_count": [1, 2], "fuel_price": [10000, 12000]}
+    fuel_price = cmvrp.fuel_price
+    records = list(batch_solve.run_batch([instance_path], grid, {"tabu_iterations": 10}, workers=1))
+    assert [r["scenario"] for r in records] == [1, 2, 3, 4]
+    assert [r["parameters"] for r in records] == [
+        {"vehicle_count": 1, "fuel_price": 10000}, {"vehicle_count": 1, "fuel_price": 12000},
+        {"vehicle_count": 2, "fuel_price": 10000}, {"vehicle_count": 2, "fuel_price": 12000},
+    ]
+    for record in records:
+        assert record["status"] == "selesai" and record["error"] is None
+        assert record["vehicles"] == len(record["routes"]) == record["parameters"]["vehicle_count"]
+        assert record["served"] == sum(len(route["customers"]) for route in record["routes"]) <= record["customers"] == 12
+        assert record["profit"] == pytest.approx(record["revenue"] - record["cost"], abs=0.05)
+    # Override biaya dikembalikan setelah tiap skenario
+    assert cmvrp.fuel_price == fuel_price
+
+
+def test_parallel_batch_matches_serial(instance_path):
+    grid = {"vehicle_count": [1, 2], "construction": ["nearest", "sweep"]}
+    serial = list(batch_solve.run_batch([instance_path], grid, {"tabu_iterations": 10}, workers=1))
+    parallel = list(batch_solve.run_batch([instance_path], grid, {"tabu_iterations": 10}, workers=2))
+    parallel.sort(key=lambda record: record["scenario"])
+    assert [_strip_timing(r) for r in parallel] == [_strip_timing(r) for r in serial]
+
+
+def test_failed_instance_does_not_stop_the_batch(instance_path, tmp_path):
+    missing = str(tmp_path / "tidak_ada.json")
+    records = list(batch_solve.run_batch([missing, instance_path], {"vehicle_count": 1}, {"tabu_iterations": 5}, workers=1))
+    assert [r["status"] for r in records] == ["gagal", "selesai"]
+    assert records[0]["error"].startswith("FileNotFoundError")
+
+
+def test_scenario_grid():
+    assert batch_solve.scenario_grid(None) == [{}]
+    assert batch_solve.scenario_grid({"a": [1, 2], "b": 3}) == [{"a": 1, "b": 3}, {"a": 2, "b": 3}]
+    assert batch_solve.scenario_grid([{"a": 1}, {"b": 2}]) == [{"a": 1}, {"b": 2}]
+    with pytest.raises(ValueError):
+        batch_solve.scenario_grid({"vehicle_capacity": [50, 60]})
+
+
+def test_cli_writes_csv_summary(instance_path, tmp_path):
+    output = tmp_path / "hasil.csv"
+    batch_solve.main([instance_path, "--set", "vehicle_count=1,2", "--set", "tabu_iterations=5",
+                      "--workers", "1", "--output", str(output)])
+    with open(output, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [row["scenario"] for row in rows] == ["1", "2"]
+    assert [row["vehicle_count"] for row in rows] == ["1", "2"]
+    assert all(row["status"] == "selesai" for row in rows)
@@ -0,0 +1,49 @@
+import io
+import json
+
+import pytest
+
+import location_store
+from bulk_io import import_locations
+
+valid = {"name": "Pelanggan A", "type": "customer", "lat": -0.1, "lon": 109.3, "demand": 3, "fee": 1000}
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = str(tmp_path / "lokasi.db")
+    monkeypatch.setattr(location_store, "db_path", path)
+    location_store.import_json([dict(valid, name=f"Lama {k}") for k in range(3)], path=path)
+    return path
+
+def _jsonl(*lines):
+    return io.BytesIO("\n".join(lines).encode("utf-8"))
+
+def test_replace_with_only_invalid_rows_keeps_existing_locations(db):
+    source = _jsonl(json.dumps({"name": "", "type": "customer"}), json.dumps(dict(valid, type="gudang")))
+    summary = import_locations(source, "jsonl", replace=True, path=db)
+    assert summary["imported"] == 0
+    assert summary["error_count"] == 2
+    assert [item["name"] for item in location_store.load_locations(path=db)] == ["Lama 0", "Lama 1", "Lama 2"]
+
+def test_replace_with_valid_rows_replaces_locations(db):
+    summary = import_locations(_jsonl(json.dumps(dict(valid, name="Baru"))), "jsonl", replace=True, path=db)
+    assert summary["imported"] == 1
+    assert [item["name"] for item in location_store.load_locations(path=db)] == ["Baru"]
+
+def test_malformed_jsonl_line_is_skipped_and_reported(db):
+    source = _jsonl(json.dumps(dict(valid, name="Baru 1")), '{"name": "rusak",', "[1, 2]", json.dumps(dict(valid, name="Baru 2")))
+    summary = import_locations(source, "jsonl", path=db)
+    assert summary["imported"] == 2
+    assert [error["row"] for error in summary["errors"]] == [2, 3]
+    assert "JSON tidak valid" in summary["errors"][0]["error"]
+    assert len(location_store.load_locations(path=db)) == 5
+
+def test_bulk_endpoint_rejects_file_without_valid_rows(db):
+    from app import app
+    upload = (_jsonl(json.dumps({"name": "x"})), "lokasi.jsonl")
+    response = app.test_client().post("/lokasi/bulk?mode=replace", data={"file": upload},
+                                      content_type="multipart/form-data")
+    assert response.status_code == 400
+    assert response.get_json()["imported"] == 0
+    assert len(location_store.load_locations(path=db)) == 3
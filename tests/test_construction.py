@@ -0,0 +1,52 @@
+import random
+
+import pytest
+
+import cmvrp_tabu_search as cmvrp
+
+
+def _instance(seed=0, count=40):
+    rng = random.Random(seed)
+    depots = {"Barat": (0.0, 109.5, None), "Timur": (0.0, 110.5, None)}
+    customers = {f"P{i}": (rng.uniform(-0.5, 0.5), rng.uniform(109.3, 110.7), rng.randint(1, 8), 50000)
+                 for i in range(count)}
+    return depots, customers, cmvrp.build_distance_matrix(depots, customers)
+
+
+@pytest.mark.parametrize("method", ["nearest", "savings", "sweep"])
+def test_allocation_is_feasible_and_serves_everyone(method):
+    depots, customers, matrix = _instance()
+    vehicle_count = 5  # kapasitas total 360, total demand jauh di bawahnya
+    assignments = cmvrp.allocate_customers(customers, depots, vehicle_count, matrix=matrix, method=method)
+    assert len(assignments) == vehicle_count
+    served = [c for vehicle in assignments for c in vehicle["customers"]]
+    assert sorted(served) == sorted(customers)
+    for vehicle in assignments:
+        load = sum(customers[c][2] for c in vehicle["customers"])
+        assert load <= cmvrp.vehicle_capacity
+        assert vehicle["remaining_capacity"] == cmvrp.vehicle_capacity - load
+        assert vehicle["depot"] == (vehicle["depot"][0], depots[vehicle["depot"][0]])
+
+
+@pytest.mark.parametrize("method", ["nearest", "savings", "sweep"])
+def test_allocation_never_exceeds_capacity_when_fleet_is_short(method):
+    depots, customers, matrix = _instance(seed=1, count=60)
+    assignments = cmvrp.allocate_customers(customers, depots, 2, matrix=matrix, method=method)
+    served = [c for vehicle in assignments for c in vehicle["customers"]]
+    assert len(served) == len(set(served)) < len(customers)
+    assert all(sum(customers[c][2] for c in v["customers"]) <= cmvrp.vehicle_capacity for v in assignments)
+
+
+def test_savings_and_sweep_keep_customers_at_their_nearest_depot():
+    depots, customers, matrix = _instance(seed=2)
+    nearest = {c: cmvrp.find_nearest_depot(customers[c][:2], depots, matrix)[0] for c in customers}
+    for method in ("savings", "sweep"):
+        for depot_name, members, load in getattr(cmvrp, f"_{method}_routes")(customers, depots, matrix):
+            assert all(nearest[c] == depot_name for c in members)
+            assert load == sum(customers[c][2] for c in members) <= cmvrp.vehicle_capacity
+
+
+def test_unknown_method_is_rejected():
+    depots, customers, matrix = _instance()
+    with pytest.raises(ValueError):
+        cmvrp.allocate_customers(customers, depots, 2, matrix=matrix, method="acak")
@@ -0,0 +1,31 @@
+import cmvrp_tabu_search as cmvrp
+
+
+def test_empty_supply_means_no_depot_limit():
+    assert cmvrp.depot_supply((0.0, 110.0)) is None
+    assert cmvrp.depot_supply((0.0, 110.0, 0)) is None
+    assert cmvrp.depot_supply((0.0, 110.0, None)) is None
+    assert cmvrp.depot_supply((0.0, 110.0, 150)) == 150
+
+
+def _depot_loads(assignments, customers):
+    loads = {}
+    for vehicle in assignments:
+        name = vehicle["depot"][0]
+        loads[name] = loads.get(name, 0) + sum(customers[c][2] for c in vehicle["customers"])
+    return loads
+
+
+def test_multi_route_keeps_depot_loads_within_supply():
+    # Tanpa batas supply, langkah lintas depot memindahkan muatan ke Timur (60 -> 90). Supply Timur kecil:
+    # muatannya tidak boleh bertambah melebihi supply (atau muatan awalnya bila sudah melebihi)
+    depots = {"Barat": (0.0, 110.0, 0), "Timur": (0.0, 110.3, 20)}
+    customers = {f"P{i}": (0.01 * (i % 5), 110.02 + 0.05 * (i // 5), 6, 50000) for i in range(20)}
+    matrix = cmvrp.build_distance_matrix(depots, customers, {}, {})
+    assignments = [{"depot": (name, depots[name]), "customers": [f"P{i}" for i in range(k, 20, 4)],
+                    "remaining_capacity": 0, "route": []} for k, name in enumerate(["Barat", "Barat", "Timur", "Timur"])]
+    before = _depot_loads(assignments, customers)
+    cmvrp.tabu_search_multi_route(assignments, customers, {}, {}, iterations=50, matrix=matrix)
+    after = _depot_loads(assignments, customers)
+    assert after["Timur"] <= max(20, before["Timur"])
+    assert sum(after.values()) == sum(before.values())
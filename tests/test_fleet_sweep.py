@@ -0,0 +1,88 @@
+import pytest
+
+import benchmark
+import cmvrp_tabu_search as cmvrp
+import fleet_sweep
+from fleet_sweep import best_point, parse_counts, sweep_fleet
+
+config = {"tabu_iterations": 20, "sweep_iterations": 20}
+
+
+@pytest.fixture(scope="module")
+def instance():
+    return cmvrp.parse_locations(benchmark.generate_instance(40, seed=4))
+
+
+def _check_plan(instance, assignments, routes):
+    customers = instance[1]
+    served = [name for route in routes for _, name, _ in route[1]]
+    assert len(served) == len(set(served))
+    for vehicle, route in zip(assignments, routes):
+        assert {name for _, name, _ in route[1]} <= set(vehicle["customers"])
+        assert sum(customers[c][2] for c in vehicle["customers"]) == cmvrp.vehicle_capacity - vehicle["remaining_capacity"]
+        assert vehicle["remaining_capacity"] >= 0
+    return served
+
+
+def test_one_point_per_count_with_warm_start(instance):
+    results = list(sweep_fleet(*instance, counts=[3, 1, 2], config=config))
+    points = [point for point, _, _ in results]
+    assert [p["vehicles"] for p in points] == [1, 2, 3]
+    assert [p["warm_start"] for p in points] == [False, True, True]
+    assert points[0]["marginal_profit"] is None
+    assert all(set(p) == set(fleet_sweep.curve_fields) for p in points)
+    for point, assignments, routes in results:
+        served = _check_plan(instance, assignments, routes)
+        assert len(assignments) == point["vehicles"] == sum(point["split"].values())
+        assert point["served"] == len(served) <= point["customers"] == len(instance[1])
+        assert point["profit"] == round(sum(route[6] for route in routes), 2)
+    # Kendaraan tambahan mengambil pelanggan yang belum terlayani
+    assert points[0]["served"] < points[1]["served"] <= points[2]["served"]
+    assert points[1]["marginal_profit"] == round(points[1]["net_profit"] - points[0]["net_profit"], 2)
+
+
+def test_first_point_matches_cold_solve(instance):
+    point, assignments, routes = next(sweep_fleet(*instance, counts=[2], config=config))
+    expected = cmvrp.solve_instance(*instance, 2, config)
+    assert (assignments, routes) == expected
+    assert point["warm_start"] is False
+
+
+def test_splits_reach_each_target(instance):
+    depot_a, depot_b = list(instance[0])[:2]
+    splits = [{depot_a: 1, depot_b: 2}, {depot_a: 1, depot_b: 0}, {depot_a: 2, depot_b: 2}]
+    results = list(sweep_fleet(*instance, splits=splits, config=config))
+    assert [point["split"] for point, _, _ in results] == [splits[1], splits[0], splits[2]]
+    for point, assignments, routes in results:
+        _check_plan(instance, assignments, routes)
+        assert sorted(vehicle["depot"][0] for vehicle in assignments) == \
+            sorted(name for name, count in point["split"].items() for _ in range(count))
+
+
+@pytest.mark.parametrize("kwargs", [{"counts": [0, 2]}, {"splits": [{"Tidak Ada": 1}]}, {"splits": [{}]}])
+def test_invalid_fleet_is_rejected(instance, kwargs):
+    with pytest.raises(ValueError):
+        list(sweep_fleet(*instance, config=config, **kwargs))
+
+
+def test_stop_ends_the_sweep(instance):
+    points = []
+    for point, _, _ in sweep_fleet(*instance, counts=[1, 2, 3], config=config, stop=lambda: len(points) >= 1):
+        points.append(point)
+    assert len(points) == 1
+
+
+def test_fixed_cost_and_best_point(instance):
+    points = [point for point, _, _ in sweep_fleet(*instance, counts=[1, 2], config=dict(config, vehicle_fixed_cost=1000))]
+    assert [p["net_profit"] for p in points] == [round(p["profit"] - 1000 * p["vehicles"], 2) for p in points]
+    # Net profit sama: armada terkecil yang dipilih
+    assert best_point([{"vehicles": 3, "net_profit": 5}, {"vehicles": 2, "net_profit": 5}])["vehicles"] == 2
+    assert best_point(points) == max(points, key=lambda p: p["net_profit"])
+    assert best_point([]) is None
+
+
+def test_parse_counts():
+    assert parse_counts("2-4,6") == [2, 3, 4, 6]
+    assert parse_counts("3") == [3]
+    with pytest.raises(ValueError):
+        parse_counts("dua")
@@ -0,0 +1,58 @@
+import json
+import os
+
+import cmvrp_tabu_search as cmvrp
+
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _solution():
+    # Pelanggan berjauhan agar rute memuat istirahat (di rest area dekat pelanggan) dan menginap virtual
+    depots = {"Depot": (0.0, 109.3, None)}
+    customers = {f"P{i}": (0.0, 109.5 + 0.5 * i, 2, 50000) for i in range(8)}
+    customers["Kota </script>"] = (0.2, 109.4, 2, 50000)
+    rest_areas = {f"Rest {i}": (0.01, 109.5 + 0.5 * i) for i in range(8)}
+    assignments, routes = cmvrp.solve_instance(depots, customers, rest_areas, {}, 2, {"tabu_iterations": 10})
+    return assignments, routes, rest_areas
+
+
+def test_one_line_per_route_and_one_point_per_stop():
+    assignments, routes, rest_areas = _solution()
+    features = cmvrp.routes_geojson(routes, assignments, rest_areas)["features"]
+    lines = [f for f in features if f["geometry"]["type"] == "LineString"]
+    points = [f for f in features if f["geometry"]["type"] == "Point"]
+    non_empty = [route for route in routes if len(route[0])]
+    assert len(lines) == len(non_empty)
+    assert len(points) == sum(len(route[0]) for route in non_empty)
+    for line, route in zip(lines, non_empty):
+        # GeoJSON berurutan [lon, lat]
+        assert line["geometry"]["coordinates"] == [[round(lon, 6), round(lat, 6)] for _, _, (lat, lon) in route[0]]
+        assert line["properties"]["customers"] == len(route[1])
+        assert line["properties"]["cost"] == route[5]
+    kinds = {p["properties"]["kind"] for p in points}
+    assert {"depot", "customer", "rest"} <= kinds
+    manual_rests = [p for p in points if p["properties"]["kind"] == "rest" and p["properties"]["manual"]]
+    assert manual_rests
+    for p in manual_rests:
+        lon, lat = p["geometry"]["coordinates"]
+        assert rest_areas[p["properties"]["name"]] == (lat, lon)
+    assert {p["properties"]["name"] for p in points if p["properties"]["kind"] == "customer"} == \
+        {name for route in routes for _, name, _ in route[1]}
+
+
+def test_without_stops_only_lines_are_sent():
+    assignments, routes, rest_areas = _solution()
+    features = cmvrp.routes_geojson(routes, assignments, rest_areas, include_stops=False, precision=3)["features"]
+    assert features and all(f["geometry"]["type"] == "LineString" for f in features)
+    assert all(len(str(c).split(".")[-1]) <= 3 for f in features for point in f["geometry"]["coordinates"] for c in point)
+
+
+def test_embedded_map_escapes_location_names(monkeypatch):
+    monkeypatch.chdir(repo_dir)
+    assignments, routes, rest_areas = _solution()
+    geojson = cmvrp.routes_geojson(routes, assignments, rest_areas)
+    html = cmvrp.render_map_html(geojson)
+    assert "Kota </script>" not in html
+    embedded = html.split("var embedded = ", 1)[1].split(";\n", 1)[0]
+    assert json.loads(embedded.replace("<\\/", "</")) == geojson
+    assert "var jobUrl = null" in html
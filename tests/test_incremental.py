@@ -0,0 +1,47 @@
+import cmvrp_tabu_search as cmvrp
+
+config = {"tabu_iterations": 50, "seed": 0}
+
+
+def _previous():
+    depots = {"Depot": (-0.05, 109.32, 200)}
+    customers = {f"P{i}": (-0.05 + 0.02 * (i % 4), 109.32 + 0.02 * (i // 4), 4, 50000) for i in range(12)}
+    rest_areas = {"Rest 1": (-0.02, 109.35)}
+    assignments, routes = cmvrp.solve_instance(depots, customers, rest_areas, {}, 2, config)
+    instance = {"depots": depots, "customers": customers, "rest_areas": rest_areas, "menginap_locs": {},
+                "vehicle_count": 2, "parameters": cmvrp.solver_parameters(config)}
+    return {"assignments": assignments, "routes": routes, "instance": instance}
+
+
+def test_new_rest_area_keeps_incremental_solve():
+    previous = _previous()
+    instance = previous["instance"]
+    rest_areas = dict(instance["rest_areas"], **{"Rest 2": (-0.01, 109.36)})
+    customers = dict(instance["customers"], Baru=(-0.03, 109.33, 2, 50000))
+    result = cmvrp.reoptimise_instance(previous, instance["depots"], customers, rest_areas, {}, 2, config)
+    assert result is not None
+    _, routes = result
+    assert sum(len(route[1]) for route in routes) == len(customers)
+
+
+def test_depot_change_needs_full_solve():
+    previous = _previous()
+    instance = previous["instance"]
+    depots = dict(instance["depots"], **{"Depot 2": (-0.1, 109.3, 100)})
+    assert cmvrp.reoptimise_instance(previous, depots, instance["customers"], instance["rest_areas"], {}, 2, config) is None
+
+
+def test_incremental_serves_as_many_customers_as_full_solve():
+    # Depot tanpa supply, 12 pelanggan demand 8 untuk 2 kendaraan: solve penuh melayani semuanya (muatan 72 + 24)
+    depots = {"Depot": (-0.05, 109.32, None)}
+    customers = {f"P{i}": (-0.05 + 0.01 * (i % 4), 109.32 + 0.01 * (i // 4), 8, 50000) for i in range(12)}
+    assignments, routes = cmvrp.solve_instance(depots, customers, {}, {}, 2, config)
+    instance = {"depots": depots, "customers": customers, "rest_areas": {}, "menginap_locs": {},
+                "vehicle_count": 2, "parameters": cmvrp.solver_parameters(config)}
+    previous = {"assignments": assignments, "routes": routes, "instance": instance}
+    customers = dict(customers, Baru=(-0.02, 109.33, 2, 50000))
+    _, incremental = cmvrp.reoptimise_instance(previous, depots, customers, {}, {}, 2, config)
+    _, full = cmvrp.solve_instance(depots, customers, {}, {}, 2, config)
+    served = sum(len(route[1]) for route in full)
+    assert served == len(customers)
+    assert sum(len(route[1]) for route in incremental) == served
@@ -0,0 +1,45 @@
+import pytest
+
+import benchmark
+import cmvrp_tabu_search as cmvrp
+from solver_stats import SolverStats
+
+
+@pytest.fixture(scope="module")
+def instance():
+    return cmvrp.parse_locations(benchmark.generate_instance(30, seed=1))
+
+
+def _solve(instance, vehicle_count=3, **config):
+    stats = SolverStats()
+    assignments, routes = cmvrp.solve_instance(*instance, vehicle_count, {"tabu_iterations": 30, **config}, stats=stats)
+    return assignments, routes, stats.counters
+
+
+def test_parallel_islands_match_serial(instance):
+    # Tiap pulau punya seed sendiri, jadi hasil tidak bergantung pada jumlah worker
+    serial = _solve(instance, islands=3, island_epochs=2, workers=1)
+    parallel = _solve(instance, islands=3, island_epochs=2, workers=2)
+    assert parallel[0] == serial[0]
+    assert parallel[1] == serial[1]
+    assert serial[2]["island_epochs"] == parallel[2]["island_epochs"] == 2
+    assert serial[2]["island_migrations"] == 1
+
+
+def test_islands_never_worse_than_single_start(instance):
+    single = _solve(instance)[1]
+    for islands, epochs in ((3, 1), (4, 3)):
+        routes = _solve(instance, islands=islands, island_epochs=epochs, workers=1)[1]
+        assert cmvrp._plan_score(routes) >= cmvrp._plan_score(single)
+
+
+def test_island_plan_is_feasible(instance):
+    depots, customers = instance[0], instance[1]
+    assignments, routes, _ = _solve(instance, islands=4, island_epochs=3, workers=1)
+    served = [name for route in routes for _, name, _ in route[1]]
+    assert len(served) == len(set(served)) and set(served) <= set(customers)
+    for vehicle, route in zip(assignments, routes):
+        load = sum(customers[c][2] for c in vehicle["customers"])
+        assert vehicle["remaining_capacity"] == cmvrp.vehicle_capacity - load
+        assert sum(customers[name][2] for _, name, _ in route[1]) <= cmvrp.vehicle_capacity
+        assert vehicle["depot"][0] in depots
@@ -0,0 +1,54 @@
+import json
+import threading
+import time
+
+import pytest
+
+import location_store
+
+seed_items = [{"name": f"Depot {k}", "type": "depot", "lat": -0.1, "lon": 109.3 + k / 100, "supply": 50} for k in range(20)]
+
+@pytest.fixture
+def fresh_db(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / location_store.json_path).write_text(json.dumps(seed_items))
+    path = str(tmp_path / "lokasi.db")
+    monkeypatch.setattr(location_store, "db_path", path)
+    return path
+
+def test_concurrent_first_connections_seed_once(fresh_db, monkeypatch):
+    # Pengisian diperlambat agar permintaan lain datang saat database baru belum selesai diisi
+    insert = location_store._insert
+    monkeypatch.setattr(location_store, "_insert", lambda conn, items: (time.sleep(0.2), insert(conn, items)))
+    barrier = threading.Barrier(8)
+    errors = []
+
+    def first_request():
+        try:
+            barrier.wait()
+            location_store.connect().close()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=first_request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert len(location_store.load_locations()) == len(seed_items)
+
+def test_emptied_database_is_not_seeded_again(fresh_db):
+    assert len(location_store.load_locations()) == len(seed_items)
+    for _ in seed_items:
+        location_store.delete_location(0)
+    assert location_store.load_locations() == []
+
+def test_import_endpoint_appends_by_default(fresh_db):
+    from app import app
+    client = app.test_client()
+    item = {"name": "Tambahan", "type": "depot", "lat": 0.0, "lon": 110.0}
+    assert client.post("/lokasi/import", json=[item]).get_json() == {"imported": 1}
+    assert len(location_store.load_locations()) == len(seed_items) + 1
+    assert client.post("/lokasi/import?mode=replace", json=[item]).get_json() == {"imported": 1}
+    assert len(location_store.load_locations()) == 1
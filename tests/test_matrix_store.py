@@ -0,0 +1,154 @@
+import os
+import pickle
+import random
+
+import numpy as np
+import pytest
+
+import cmvrp_tabu_search as cmvrp
+import matrix_store
+from matrix_store import HaversineProvider, RowCache, dense_matrices, knn_matrices, submatrix_rows
+from spatial_index import haversine_matrix
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    path = str(tmp_path / "cache")
+    monkeypatch.setattr(matrix_store, "matrix_cache_dir", path)
+    return path
+
+
+def _points(seed=0, count=60):
+    rng = random.Random(seed)
+    lat = np.array([rng.uniform(-0.5, 0.5) for _ in range(count)])
+    lon = np.array([110.0 + rng.uniform(-0.5, 0.5) for _ in range(count)])
+    return lat, lon, HaversineProvider(lat, lon, cmvrp.speed)
+
+
+def test_memmap_matches_dense_distances(cache_dir, monkeypatch):
+    # Blok kecil agar pengisian per blok ikut teruji
+    monkeypatch.setattr(matrix_store, "block_rows", 7)
+    lat, lon, provider = _points()
+    dist, travel = dense_matrices(provider, len(lat), "uji")
+    assert isinstance(dist, np.memmap) and dist.dtype == np.float32
+    expected = haversine_matrix(lat, lon)
+    assert np.allclose(dist, expected, rtol=1e-6)
+    assert np.allclose(travel, expected / cmvrp.speed, rtol=1e-6)
+    # Pickle hanya membawa path, proses penerima membuka file yang sama
+    assert len(pickle.dumps(matrix_store.pack_array(dist))) < 1000
+    assert np.array_equal(pickle.loads(pickle.dumps(matrix_store.pack_array(dist))).open(), dist)
+
+
+def test_knn_stores_nearest_and_estimates_the_rest():
+    lat, lon, provider = _points()
+    n, k = len(lat), 5
+    dist, travel = knn_matrices(provider, lat, lon, "uji", k=k)
+    expected = haversine_matrix(lat, lon)
+    assert len(dist.keys) == n * k and np.all(np.diff(dist.keys) > 0)
+    for i in range(n):
+        stored = [int(key) % n for key in dist.keys[i * k:(i + 1) * k]]
+        order = [j for j in np.argsort(expected[i], kind="stable").tolist() if j != i]
+        assert sorted(stored) == sorted(order[:k])
+    # Semua pasangan, tersimpan maupun perkiraan, sama dengan matriks padat
+    ids = np.arange(n)
+    assert np.allclose(dist[np.ix_(ids, ids)], expected, rtol=1e-6)
+    assert np.allclose(travel[np.ix_(ids, ids)], expected / cmvrp.speed, rtol=1e-6)
+    for i, j in ((0, 1), (3, 40), (59, 0)):
+        assert dist[i, j] == pytest.approx(dist[np.ix_([i], [j])][0, 0])
+
+
+def test_knn_uses_exact_values_only_for_neighbours():
+    # Penyedia dengan estimate yang sengaja berbeda: pasangan tetangga harus memakai nilai block
+    lat, lon, provider = _points(seed=1, count=30)
+
+    class Provider(HaversineProvider):
+        __slots__ = ()
+
+        def estimate(self, rows, cols):
+            dist, travel = super().estimate(rows, cols)
+            return dist * 2, travel * 2
+
+        def block(self, rows, cols):
+            return HaversineProvider.estimate(self, rows, cols)
+
+    dist, _ = knn_matrices(Provider(lat, lon, cmvrp.speed), lat, lon, "uji", k=3)
+    expected = haversine_matrix(lat, lon)
+    stored = {(int(key) // 30, int(key) % 30) for key in dist.keys}
+    for i in range(30):
+        for j in range(30):
+            factor = 1 if (i, j) in stored else 2
+            assert dist[i, j] == pytest.approx(expected[i, j] * factor, rel=1e-6)
+
+
+def test_cache_files_are_reused(cache_dir):
+    lat, lon, provider = _points()
+    dense_matrices(provider, len(lat), "uji")
+    path = os.path.join(cache_dir, "uji.dist.npy")
+    os.utime(path, (0, 0))
+
+    class Unused(HaversineProvider):
+        __slots__ = ()
+
+        def block(self, rows, cols):
+            raise AssertionError("matriks dihitung ulang")
+
+    dist, _ = dense_matrices(Unused(lat, lon, cmvrp.speed), len(lat), "uji")
+    assert os.path.getmtime(path) > 0
+    assert np.allclose(dist, haversine_matrix(lat, lon), rtol=1e-6)
+
+
+def test_prune_cache_removes_least_recently_used(cache_dir):
+    lat, lon, provider = _points(count=20)
+    for age, key in enumerate(("lama", "baru")):
+        dense_matrices(provider, len(lat), key)
+        for name in ("dist", "time"):
+            os.utime(os.path.join(cache_dir, f"{key}.{name}.npy"), (age + 1, age + 1))
+    size = os.path.getsize(os.path.join(cache_dir, "baru.dist.npy")) * 2
+    assert matrix_store.prune_cache(max_bytes=size) == 1
+    assert sorted(os.listdir(cache_dir)) == ["baru.dist.npy", "baru.time.npy"]
+
+
+@pytest.mark.parametrize("storage", ["memmap", "knn"])
+def test_build_distance_matrix_storage_matches_memory(storage):
+    rng = random.Random(3)
+    depots = {"Depot": (0.0, 110.0, None)}
+    customers = {f"P{i}": (rng.uniform(-0.5, 0.5), 110.0 + rng.uniform(-0.5, 0.5), 1, 1000) for i in range(40)}
+    memory = cmvrp.build_distance_matrix(depots, customers, storage="memory")
+    stored = cmvrp.build_distance_matrix(depots, customers, storage=storage)
+    ids = list(range(len(memory.lat)))
+    assert np.allclose(np.asarray(submatrix_rows(stored.dist, ids)), np.asarray(memory.dist), rtol=1e-6)
+    assert np.allclose(np.asarray(submatrix_rows(stored.time, ids)), np.asarray(memory.time), rtol=1e-6)
+
+
+def _rows_equal(rows, dense):
+    return all(list(rows[a]) == dense[a].tolist() for a in range(len(dense)))
+
+
+def test_submatrix_rows_modes_match_dense(monkeypatch):
+    source = np.random.default_rng(0).random((60, 60))
+    ids = [5, 0, 17, 42, 8, 59, 33]
+    dense = source[np.ix_(ids, ids)]
+    assert submatrix_rows(source, ids) == dense.tolist()
+    monkeypatch.setattr(matrix_store, "route_rows_list_max", 2)
+    rows = submatrix_rows(source, ids)
+    assert isinstance(rows, list) and _rows_equal(rows, dense)
+    monkeypatch.setattr(matrix_store, "route_rows_max_bytes", 3 * len(ids) * 8)
+    rows = submatrix_rows(source, ids)
+    assert isinstance(rows, RowCache) and len(rows) == len(ids)
+    assert _rows_equal(rows, dense)
+
+
+def test_row_cache_keeps_at_most_max_rows():
+    source = np.arange(100.0).reshape(10, 10)
+    rows = RowCache(source, np.arange(10), 3)
+    for a in (0, 1, 2, 0, 3, 4):
+        assert rows[a][a] == source[a, a]
+    # 0 dipakai ulang sehingga 1 dan 2 yang paling lama tidak dipakai dikeluarkan
+    assert list(rows.rows) == [0, 3, 4]
+
+
+def test_resolve_storage_thresholds():
+    assert matrix_store.resolve_storage(10, "auto") == "memory"
+    assert matrix_store.resolve_storage(matrix_store.memmap_min_points, "auto") == "memmap"
+    assert matrix_store.resolve_storage(10 ** 6, "auto") == "knn"
+    assert matrix_store.resolve_storage(10 ** 6, "memmap") == "memmap"
@@ -0,0 +1,50 @@
+import random
+
+import numpy as np
+import pytest
+
+import cmvrp_tabu_search as cmvrp
+
+
+@pytest.mark.parametrize("move, expected", [
+    (("swap", 1, 3), [1, 4, 3, 2, 5]),
+    (("2opt", 1, 3), [1, 4, 3, 2, 5]),
+    (("relocate", 0, 1, 2), [2, 3, 1, 4, 5]),
+    (("relocate", 2, 1, -1), [3, 1, 2, 4, 5]),
+    (("oropt", 0, 2, 3), [3, 4, 1, 2, 5]),
+    (("oropt", 3, 2, 0), [1, 4, 5, 2, 3]),
+])
+def test_apply_move(move, expected):
+    start, neighbour = cmvrp.apply_move([1, 2, 3, 4, 5], move)
+    assert neighbour == expected
+    # Posisi sebelum start tidak berubah
+    assert neighbour[:start] == [1, 2, 3, 4, 5][:start]
+
+
+def _route(seed=2, count=25):
+    rng = random.Random(seed)
+    depots = {"Depot": (0.0, 110.0, None)}
+    customers = {f"P{i}": (rng.uniform(-0.3, 0.3), 110.0 + rng.uniform(-0.3, 0.3), 1, 50000) for i in range(count)}
+    matrix = cmvrp.build_distance_matrix(depots, customers)
+    return depots["Depot"], customers, matrix, rng
+
+
+def test_candidate_lists_are_nearest_neighbours():
+    depot, customers, matrix, _ = _route()
+    data = cmvrp.prepare_route_data([depot], list(customers), customers, matrix)
+    dist = np.array(data["dist"])
+    for a, near in enumerate(cmvrp.build_candidate_lists(data, k=5)):
+        others = [b for b in np.argsort(dist[a], kind="stable").tolist() if b != a]
+        assert near == others[:5]
+
+
+@pytest.mark.parametrize("operators", [("swap",), ("2opt",), ("relocate",), ("oropt",), cmvrp.neighbourhood_operators])
+def test_each_operator_improves_a_shuffled_route(operators):
+    depot, customers, matrix, rng = _route()
+    names = list(customers)
+    rng.shuffle(names)
+    data = cmvrp.prepare_route_data([depot], names, customers, matrix)
+    initial = cmvrp.route_cost(list(range(1, len(names) + 1)), data)
+    route = cmvrp.tabu_search_vrp(depot, names, customers, iterations=60, matrix=matrix, operators=operators)
+    assert sorted(name for _, name, _ in route[1]) == sorted(names)
+    assert route[5] < initial
@@ -0,0 +1,74 @@
+import pytest
+
+import cmvrp_tabu_search as cmvrp
+import road_network
+from road_network import RoadNetwork, parse_osm
+
+# Jalan utama A-B-C (primary, 50 km/jam) dan jalan pintas A-C yang lebih pendek tetapi lambat (track, 20 km/jam).
+# C-D satu arah, node 9 tidak dipakai jalan mana pun, dan sungai (bukan highway) diabaikan.
+osm = """<?xml version="1.0" encoding="UTF-8"?>
+<osm version="0.6">
+  <node id="1" lat="0.0" lon="110.0"/>
+  <node id="2" lat="0.1" lon="110.1"/>
+  <node id="3" lat="0.0" lon="110.2"/>
+  <node id="4" lat="0.0" lon="110.3"/>
+  <node id="9" lat="1.0" lon="111.0"/>
+  <way id="10"><nd ref="1"/><nd ref="2"/><nd ref="3"/><tag k="highway" v="primary"/></way>
+  <way id="11"><nd ref="1"/><nd ref="3"/><tag k="highway" v="track"/></way>
+  <way id="12"><nd ref="3"/><nd ref="4"/><tag k="highway" v="secondary"/><tag k="oneway" v="yes"/><tag k="maxspeed" v="60"/></way>
+  <way id="13"><nd ref="1"/><nd ref="9"/><tag k="waterway" v="river"/></way>
+</osm>
+"""
+
+
+@pytest.fixture
+def osm_path(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / "jalan.osm"
+    path.write_text(osm)
+    return str(path)
+
+
+def _km(a, b):
+    return road_network._haversine(a[0], a[1], b[0], b[1])
+
+
+def test_parse_keeps_only_drivable_ways(osm_path):
+    graph = parse_osm(osm_path)
+    assert len(graph.lat) == 4
+    # A-B dan B-C dua arah (4), pintas A-C dua arah (2), C-D satu arah (1)
+    assert len(graph.targets) == 7
+
+
+def test_dijkstra_takes_fastest_route(osm_path):
+    graph = parse_osm(osm_path)
+    a, b, c, d = (0.0, 110.0), (0.1, 110.1), (0.0, 110.2), (0.0, 110.3)
+    found = graph.shortest_paths(0, {2, 3})
+    main_km = _km(a, b) + _km(b, c)
+    # Lewat B lebih jauh tetapi lebih cepat daripada jalan pintas track
+    assert main_km / 50 < _km(a, c) / 20
+    assert found[2] == pytest.approx((main_km, main_km / 50))
+    assert found[3] == pytest.approx((main_km + _km(c, d), main_km / 50 + _km(c, d) / 60))
+    # Jalan satu arah: D tidak bisa kembali ke A
+    assert graph.shortest_paths(3, {0}) == {}
+
+
+def test_distance_matrix_uses_road_network(osm_path):
+    network = RoadNetwork(osm_path)
+    depots = {"Depot": (0.0, 110.0, None)}
+    customers = {"Ujung": (0.0, 110.3, 1, 1000)}
+    matrix = cmvrp.build_distance_matrix(depots, customers, road_network=network)
+    depot, customer = matrix.group_ids["depot"]["Depot"], matrix.group_ids["customer"]["Ujung"]
+    found = network.graph.shortest_paths(0, {3})[3]
+    assert float(matrix.dist[depot, customer]) == pytest.approx(found[0], rel=1e-6)
+    assert float(matrix.time[depot, customer]) == pytest.approx(found[1], rel=1e-6)
+    # Arah sebaliknya tidak terhubung: garis lurus x faktor belok dengan kecepatan cadangan
+    straight = _km((0.0, 110.3), (0.0, 110.0)) * road_network.detour_factor
+    assert float(matrix.dist[customer, depot]) == pytest.approx(straight, rel=1e-6)
+    assert float(matrix.time[customer, depot]) == pytest.approx(straight / road_network.fallback_speed, rel=1e-6)
+
+
+def test_config_selects_provider(osm_path):
+    assert road_network.road_network_from_config({}) is None
+    network = road_network.road_network_from_config({"distance_provider": "osm", "osm_file": osm_path})
+    assert network is road_network.load_road_network(osm_path)
@@ -0,0 +1,40 @@
+import time
+
+import cmvrp_tabu_search as cmvrp
+from search_budget import SearchBudget, SolveBudget
+
+
+def _instance(count=24):
+    depots = {"Depot": (-0.05, 109.32, 1000)}
+    customers = {f"P{i}": (-0.05 + 0.01 * (i % 6), 109.32 + 0.01 * (i // 6), 5, 100000) for i in range(count)}
+    return depots, customers, {}, {}
+
+
+def test_evaluations_are_shared_between_calls():
+    shared = SolveBudget(max_evaluations=10)
+    first = SearchBudget(shared=shared)
+    second = SearchBudget(shared=shared)
+    assert not first.exhausted(6)
+    assert second.exhausted(6)
+    assert second.reason == "max_evaluations"
+    assert shared.evaluations == 12
+
+
+def test_time_limit_covers_whole_solve():
+    depots, customers, rest_areas, menginap_locs = _instance()
+    config = {"tabu_iterations": 100000, "time_limit": 0.2, "seed": 0}
+    started = time.perf_counter()
+    _, routes = cmvrp.solve_instance(depots, customers, rest_areas, menginap_locs, 6, config)
+    assert time.perf_counter() - started < 1.0
+    assert len(routes) == 6
+
+
+def test_stop_ends_parallel_solve():
+    depots, customers, rest_areas, menginap_locs = _instance()
+    config = {"tabu_iterations": 100000, "workers": 2, "seed": 0}
+    stopped_at = time.perf_counter() + 0.3
+    started = time.perf_counter()
+    _, routes = cmvrp.solve_instance(depots, customers, rest_areas, menginap_locs, 2, config,
+                                     stop=lambda: time.perf_counter() >= stopped_at)
+    assert time.perf_counter() - started < 2.0
+    assert len(routes) == 2
@@ -0,0 +1,77 @@
+import random
+
+import numpy as np
+
+import cmvrp_tabu_search as cmvrp
+
+
+def _instance(seed=7, count=30):
+    # Titik tersebar ~1 derajat agar rute memicu istirahat, menginap, dan batas kapasitas
+    rng = random.Random(seed)
+    depots = {"Depot": (0.0, 110.0, 500)}
+    customers = {f"P{i}": (rng.uniform(-0.6, 0.6), 110.0 + rng.uniform(-0.6, 0.6), rng.randint(1, 8),
+                           rng.randint(1, 9) * 10000) for i in range(count)}
+    matrix = cmvrp.build_distance_matrix(depots, customers, {}, {})
+    data = cmvrp.prepare_route_data([depots["Depot"]], list(customers), customers, matrix)
+    return matrix, data, rng
+
+
+def test_batch_matches_simulate_route():
+    matrix, data, rng = _instance()
+    customer_count = len(data["ids"]) - 1
+    seqs = [rng.sample(range(1, customer_count + 1), rng.randint(1, customer_count)) for _ in range(40)]
+    nodes = np.full((len(seqs), customer_count), -1, dtype=np.int64)
+    for b, seq in enumerate(seqs):
+        nodes[b, :len(seq)] = seq
+    dist, travel, service, demand = cmvrp._route_arrays(data)
+    totals = cmvrp._simulate_batch(nodes, dist, travel, service, demand)
+    for b, seq in enumerate(seqs):
+        route = cmvrp.simulate_route([data["ids"][k] for k in seq], data["ids"][0], matrix)
+        assert round(totals["cost"][b], 2) == route[5]
+        assert round(totals["distance"][b], 2) == route[3]
+
+
+def test_route_metrics_batch_matches_simulate_route():
+    matrix, data, rng = _instance(seed=5)
+    ids = data["ids"][1:]
+    seqs = [rng.sample(ids, rng.randint(0, len(ids))) for _ in range(30)]
+    batch = cmvrp.route_metrics_batch(seqs, data["ids"][0], matrix)
+    assert batch == [cmvrp.simulate_route(seq, data["ids"][0], matrix) for seq in seqs]
+
+
+def _neighbourhood(seed):
+    _, data, rng = _instance(seed=seed)
+    seq = list(range(1, len(data["ids"])))
+    rng.shuffle(seq)
+    candidates = cmvrp.build_candidate_lists(data)
+    return data, seq, candidates, cmvrp.neighbourhood_params(seq, np.array(candidates))
+
+
+def test_neighbourhood_params_match_moves():
+    _, seq, candidates, params = _neighbourhood(seed=4)
+    assert [cmvrp.param_move(row) for row in params] == cmvrp.neighbourhood_moves(seq, candidates)
+    path = [0] + seq + [len(seq) + 1]
+    src, dst = cmvrp.added_arcs(path, params)
+    for row, a, b in zip(params, src.tolist(), dst.tolist()):
+        added = cmvrp.move_arcs(seq, cmvrp.param_move(row), path)[1]
+        assert sorted(arc for arc in zip(a, b) if arc != (path[-1], path[-1])) == sorted(added)
+
+
+def test_batch_neighbour_costs_match_scalar(monkeypatch):
+    data, seq, _, params = _neighbourhood(seed=3)
+    states = cmvrp.route_prefix_states(seq, data)
+    current = cmvrp.route_cost(seq, data)
+    assert (cmvrp.move_starts(params) < len(states)).sum() >= cmvrp.batch_min_moves
+    expected = []
+    for row in params:
+        start, neighbour = cmvrp.apply_move(seq, cmvrp.param_move(row))
+        expected.append(cmvrp.route_cost(neighbour, data) if start < len(states) else current)
+    assert cmvrp._neighbour_costs(seq, params, states, current, data).tolist() == expected
+    monkeypatch.setattr(cmvrp, "batch_min_moves", len(params) + 1)
+    assert cmvrp._neighbour_costs(seq, params, states, current, data).tolist() == expected
+
+
+def test_round_costs_matches_round():
+    values = np.random.default_rng(0).random(10000) * 1e6
+    values = np.concatenate([values, np.floor(values * 100) / 100 + 0.005])
+    assert cmvrp.round_costs(values).tolist() == [round(v, 2) for v in values.tolist()]
@@ -0,0 +1,101 @@
+import json
+import multiprocessing
+import os
+import shutil
+import time
+
+import pytest
+
+import benchmark
+import location_store
+import solve_jobs
+
+
+@pytest.fixture
+def job_dir(tmp_path, monkeypatch):
+    # Instance kecil di direktori sementara: database lokasi, config, cache solusi, dan hasil job
+    shutil.copy(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "visual_template.html"), tmp_path)
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / location_store.json_path).write_text(json.dumps(benchmark.generate_instance(8, seed=1)))
+    (tmp_path / "config.json").write_text(json.dumps({"vehicle_count": 2, "tabu_iterations": 20}))
+    monkeypatch.setattr(location_store, "db_path", str(tmp_path / "lokasi.db"))
+    yield tmp_path
+    if solve_jobs._executor is not None:
+        solve_jobs._executor.shutdown()
+        solve_jobs._executor = None
+
+
+def _wait(job_id, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = solve_jobs.get_job(job_id)
+        if job["finished"]:
+            return job
+        time.sleep(0.1)
+    raise AssertionError(f"job {job_id} tidak selesai")
+
+
+def _read_job(job_id, queue):
+    queue.put(solve_jobs.get_job(job_id))
+
+
+def test_job_state_is_shared_between_processes(job_dir):
+    # Worker gunicorn lain = proses lain tanpa memori bersama; status harus terbaca dari database
+    job_id = solve_jobs.submit_sweep_job([1])
+    queue = multiprocessing.Queue()
+    reader = multiprocessing.Process(target=_read_job, args=(job_id, queue))
+    reader.start()
+    job = queue.get(timeout=30)
+    reader.join()
+    assert job["id"] == job_id and job["kind"] == "sweep"
+    assert _wait(job_id)["status"] == "selesai"
+    assert not solve_jobs.stop_job(job_id)
+
+
+def test_solve_runs_in_another_process(job_dir, monkeypatch):
+    solve = solve_jobs.solve_cmvrp
+
+    def recording_solve(**kwargs):
+        (job_dir / "pid").write_text(str(os.getpid()))
+        return solve(**kwargs)
+
+    monkeypatch.setattr(solve_jobs, "solve_cmvrp", recording_solve)
+    job = _wait(solve_jobs.submit_solve_job())
+    assert job["status"] == "selesai", job["error"]
+    assert int((job_dir / "pid").read_text()) != os.getpid()
+    assert os.path.exists(job["html_path"])
+
+
+def test_visualisation_submits_job_and_polls(job_dir, monkeypatch):
+    import app as app_module
+
+    monkeypatch.setattr(app_module, "solve_cmvrp", lambda *a, **k: pytest.fail("solve di dalam request"))
+    client = app_module.app.test_client()
+    page = client.get("/visualisasi").get_data(as_text=True)
+    assert 'var jobUrl = "/jobs"' in page
+    response = client.post("/jobs")
+    assert response.status_code == 202
+    _wait(response.get_json()["job_id"])
+    status = client.get(response.get_json()["status_url"]).get_json()
+    assert status["status"] == "selesai"
+    features = client.get(status["geojson_url"]).get_json()["features"]
+    assert {f["geometry"]["type"] for f in features} == {"LineString", "Point"}
+    lines = client.get(status["geojson_url"] + "?stops=0").get_json()["features"]
+    assert lines and all(f["geometry"]["type"] == "LineString" for f in lines)
+
+
+def test_stop_request_reaches_job_process(job_dir, monkeypatch):
+    solve = solve_jobs.solve_cmvrp
+
+    def solve_until_stopped(progress=None, stop=None):
+        while not stop():
+            time.sleep(0.05)
+        return solve(progress=progress, stop=stop)
+
+    monkeypatch.setattr(solve_jobs, "solve_cmvrp", solve_until_stopped)
+    job_id = solve_jobs.submit_solve_job()
+    while solve_jobs.get_job(job_id)["status"] == "antri":
+        time.sleep(0.05)
+    assert solve_jobs.stop_job(job_id)
+    job = _wait(job_id)
+    assert job["status"] == "selesai" and job["stopped_early"]
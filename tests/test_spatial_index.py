@@ -0,0 +1,64 @@
+import random
+
+import numpy as np
+
+import cmvrp_tabu_search as cmvrp
+from spatial_index import GridIndex, haversine_matrix, haversine_pairs
+
+
+def _points(seed, count):
+    rng = random.Random(seed)
+    return [(f"T{i}", (rng.uniform(-1.0, 1.0), 110.0 + rng.uniform(-1.0, 1.0))) for i in range(count)]
+
+
+def _brute_force(points, coord, max_km=None, accept=None):
+    best = None
+    for key, point in points:
+        if accept is not None and not accept(key):
+            continue
+        d = cmvrp.haversine(coord, point)
+        if (max_km is None or d <= max_km) and (best is None or d < best[2]):
+            best = (key, point, d)
+    return best
+
+
+def test_nearest_matches_brute_force():
+    points = _points(0, 300)
+    index = GridIndex(points, cmvrp.haversine)
+    rng = random.Random(1)
+    for _ in range(200):
+        coord = (rng.uniform(-1.5, 1.5), 110.0 + rng.uniform(-1.5, 1.5))
+        assert index.nearest(coord) == _brute_force(points, coord)
+        assert index.nearest(coord, max_km=10) == _brute_force(points, coord, max_km=10)
+        even = lambda key: int(key[1:]) % 2 == 0
+        assert index.nearest(coord, accept=even) == _brute_force(points, coord, accept=even)
+
+
+def test_ties_keep_input_order_and_remove():
+    # Dua titik di koordinat yang sama: yang masuk lebih dulu menang, seperti pencarian linear
+    index = GridIndex([("A", (0.5, 110.5)), ("B", (0.5, 110.5)), ("C", (0.6, 110.6))], cmvrp.haversine)
+    assert index.nearest((0.5, 110.5))[0] == "A"
+    index.remove("A", (0.5, 110.5))
+    assert index.nearest((0.5, 110.5))[0] == "B"
+    assert len(index) == 2
+    assert GridIndex([], cmvrp.haversine).nearest((0.0, 110.0)) is None
+
+
+def test_nearest_stop_node_uses_rest_area_within_radius():
+    depots = {"Depot": (0.0, 110.0, None)}
+    customers = {"Dekat": (0.01, 110.01, 1, 1000), "Jauh": (0.5, 110.5, 1, 1000)}
+    rest_areas = {"Rest": (0.02, 110.02)}
+    matrix = cmvrp.build_distance_matrix(depots, customers, rest_areas, {})
+    ids = matrix.group_ids
+    assert cmvrp.nearest_stop_node(matrix, "rest_area", ids["customer"]["Dekat"]) == ids["rest_area"]["Rest"]
+    assert cmvrp.nearest_stop_node(matrix, "rest_area", ids["customer"]["Jauh"]) == -1
+    assert cmvrp.nearest_stop_node(matrix, "menginap", ids["customer"]["Dekat"]) == -1
+
+
+def test_haversine_matrix_matches_scalar():
+    points = _points(2, 20)
+    lat = [p[0] for _, p in points]
+    lon = [p[1] for _, p in points]
+    expected = [[cmvrp.haversine(a, b) for _, b in points] for _, a in points]
+    assert np.allclose(haversine_matrix(lat, lon), expected, rtol=1e-12, atol=1e-9)
+    assert np.allclose(haversine_pairs(lat[0], lon[0], lat, lon), expected[0], rtol=1e-12, atol=1e-9)